@@ -4,6 +4,7 @@ from datetime import timedelta
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -17,7 +18,12 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # SQLite: WAL + pragmas on every connection; server databases: pool sizing (app/database.py)
+    from .database import engine_options, init_engine
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
     db.init_app(app)
+    with app.app_context():
+        init_engine(app, db.engine)
 
     # Configure upload folder
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads') 
@@ -60,10 +66,24 @@ def create_app(config_class=Config):
     app.register_blueprint(bp_resources)
     app.register_blueprint(bp_task_items)
 
+    from .commands import register_commands
+    register_commands(app)
+
     with app.app_context():  # 必须使用应用上下文[5][8][9]
         db.create_all()  # 创建所有继承自db.Model的类对应的表[1][2][5]
+        # SQLite: 单词全文索引（FTS5 虚拟表 + 同步触发器）不在模型元数据里，单独创建
+        from .services import word_search
+        with db.engine.begin() as connection:
+            word_search.ensure_index(connection)
         print("数据库表已成功创建")
 
+    # 进程内只加载一次语音识别模型并预热；ASR_BACKEND=remote 时模型只在独立的 ASR 服务进程中加载。
+    # flask 命令行（db upgrade、rescore 等）创建应用时不预加载，需要时再按需加载
+    if (app.config.get('ASR_PRELOAD') and app.config.get('ASR_BACKEND') != 'remote'
+            and click.get_current_context(silent=True) is None):
+        from .services import asr_model
+        asr_model.preload(app)
+
     @app.route('/test')
     @jwt_required()
     def hello():
@@ -87,6 +107,17 @@ def create_app(config_class=Config):
         print(error)
         return jsonify({"error": error}), 401
     
+    # ASR 服务繁忙、不可达或超时：返回 503，客户端稍后重试
+    from .services.asr_client import ASRBackendError, ASRBusy
+    @app.errorhandler(ASRBackendError)
+    def asr_backend_error(error):
+        app.logger.warning(f"ASR backend: {error}")
+        response = jsonify({"success": False, "message": "语音识别服务繁忙或暂不可用，请稍后重试", "error": str(error)})
+        response.status_code = 503
+        if isinstance(error, ASRBusy):
+            response.headers['Retry-After'] = '1'
+        return response
+
     @app.after_request
     def add_cors_headers(response):
         response.headers['Access-Control-Allow-Origin'] = 'http://localhost:5173'
@@ -0,0 +1,198 @@
+# Flask CLI commands, registered in create_app (run with `flask <group> <command>`).
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from . import db
+from .models import Recording, Task, UploadedFile, User
+from .services import asr_server, query_plans, rescoring, storage, task_stats
+
+storage_cli = AppGroup('storage', help='Audio storage maintenance.')
+recordings_cli = AppGroup('recordings', help='Recording maintenance.')
+tasks_cli = AppGroup('tasks', help='Task maintenance.')
+perf_cli = AppGroup('perf', help='Performance checks.')
+asr_cli = AppGroup('asr', help='Speech recognition server.')
+resources_cli = AppGroup('resources', help='Uploaded resource maintenance.')
+
+
+def _migrate_path(path, upload_folder, dry_run, moved):
+    """Return the content-addressed location for path, copying the file into the store.
+
+    Originals are only deleted after the batch that references the new paths is committed,
+    so an interrupted run can simply be started again.
+    """
+    if not path or storage.is_blob_path(path, upload_folder):
+        return path
+    if path in moved:
+        return moved[path]
+    if not os.path.isfile(path):
+        click.echo(f'  missing, left as is: {path}')
+        return path
+    if dry_run:
+        moved[path] = path
+        return path
+    blob = storage.store_file(path, upload_folder, move=False)
+    moved[path] = blob.path
+    return blob.path
+
+
+def _remove_originals(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+        # the WAV->MP3 copies made before recognition was done in-process are no longer used
+        sidecar = path[:-4] + '.mp3'
+        if path.lower().endswith('.wav') and os.path.isfile(sidecar):
+            os.remove(sidecar)
+
+
+@storage_cli.command('migrate')
+@click.option('--dry-run', is_flag=True, help='Only report what would be moved.')
+@click.option('--batch-size', default=200, show_default=True)
+def migrate_storage(dry_run, batch_size):
+    """Move existing uploads from the flat UPLOAD_FOLDER into the sharded content-addressed tree."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    moved = {}
+    removed = set()
+    updated = 0
+    for model, column in ((UploadedFile, 'file_path'), (Recording, 'audio_file_path')):
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                old_path = getattr(row, column)
+                new_path = _migrate_path(old_path, upload_folder, dry_run, moved)
+                if new_path != old_path:
+                    setattr(row, column, new_path)
+                    updated += 1
+                elif dry_run and old_path in moved:
+                    click.echo(f'  would move {old_path}')
+            last_id = rows[-1].id
+            if dry_run:
+                db.session.rollback()
+                continue
+            db.session.commit()
+            pending = [p for p, new in moved.items() if new != p and p not in removed]
+            _remove_originals(pending)
+            removed.update(pending)
+    click.echo(f'{len(moved)} file(s) {"to migrate" if dry_run else "migrated"}, {updated} row(s) updated')
+
+
+@recordings_cli.command('rescore')
+@click.option('--chunk-size', default=200, show_default=True, help='Rows read and written per batch.')
+@click.option('--workers', default=2, show_default=True, help='Decode/ASR worker processes.')
+@click.option('--checkpoint', default=None, help='Checkpoint file (default: instance/rescore.checkpoint.json).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first row.')
+@click.option('--skip-asr', is_flag=True, help='Keep recognized_text and only recompute score/feedback.')
+@click.option('--only-stale', is_flag=True, help='Only rows produced by a different model version.')
+def rescore_recordings(chunk_size, workers, checkpoint, restart, skip_asr, only_stale):
+    """Recompute recognized_text, score and feedback for historical recordings."""
+    if checkpoint is None:
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        checkpoint = os.path.join(current_app.instance_path, 'rescore.checkpoint.json')
+    state = rescoring.rescore(
+        current_app.config,
+        chunk_size=chunk_size,
+        workers=workers,
+        checkpoint_path=checkpoint,
+        resume=not restart,
+        skip_asr=skip_asr,
+        only_stale=only_stale,
+        log=click.echo,
+    )
+    click.echo(f"Done: {state['processed']} recording(s) rescored with {state['model_version']}, {state['failed']} failed")
+
+
+@tasks_cli.command('rebuild-stats')
+@click.option('--check', is_flag=True, help='Only report counters that differ from the tasks table.')
+@click.option('--user', 'user_ids', multiple=True, help='Limit to these user ids (repeatable).')
+def rebuild_task_stats(check, user_ids):
+    """Rebuild the per-user task counters from scratch."""
+    mismatches = task_stats.rebuild(list(user_ids) or None, check_only=check)
+    for user_id, diff in mismatches:
+        detail = ', '.join(f'{k}: {stored} -> {actual}' for k, (stored, actual) in diff.items())
+        click.echo(f'  {user_id}: {detail}')
+    click.echo(f'{len(mismatches)} user(s) with inconsistent counters' + ('' if check else ' repaired'))
+    if check and mismatches:
+        raise SystemExit(1)
+
+
+@perf_cli.command('explain')
+def explain_hot_queries():
+    """Run EXPLAIN QUERY PLAN on the hot queries; exit non-zero if any scans a whole table."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('EXPLAIN QUERY PLAN checks are only implemented for SQLite')
+    failed = 0
+    for name, plan, scans in query_plans.check_hot_queries():
+        status = 'FULL SCAN of ' + ', '.join(scans) if scans else 'ok'
+        click.echo(f'{name}: {status}')
+        for line in plan:
+            click.echo(f'    {line}')
+        failed += bool(scans)
+    if failed:
+        raise click.ClickException(f'{failed} hot query(ies) fall back to a full table scan')
+
+
+@resources_cli.command('reassign-owners')
+@click.option('--dry-run', is_flag=True, help='Only report what would change.')
+@click.option('--resource-id', 'resource_ids', multiple=True, type=int, help='Resource to move (repeatable, needs --to-user).')
+@click.option('--to-user', default=None, help='New owner for --resource-id.')
+def reassign_resource_owners(dry_run, resource_ids, to_user):
+    """Fix owners of resources uploaded before /convert/speech-to-text required a login.
+
+    Those uploads were all assigned to the form's user_id or the first user. Without options,
+    a resource used by tasks of exactly one other user is given to that user; resources that
+    cannot be attributed are listed so they can be moved explicitly with --resource-id/--to-user.
+    """
+    if resource_ids:
+        if not to_user or db.session.get(User, to_user) is None:
+            raise click.ClickException('--resource-id needs --to-user with an existing user id')
+        changes = [(r, to_user) for r in UploadedFile.query.filter(UploadedFile.id.in_(resource_ids))]
+    else:
+        owners = {}
+        for resource_id, user_id in db.session.query(Task.resource_id, Task.user_id).filter(
+                Task.resource_id.isnot(None)).distinct():
+            owners.setdefault(resource_id, set()).add(user_id)
+        changes, unresolved = [], []
+        for resource in UploadedFile.query.order_by(UploadedFile.id):
+            users = owners.get(resource.id, set())
+            if len(users) == 1 and resource.user_id not in users:
+                changes.append((resource, users.pop()))
+            elif len(users) > 1:
+                unresolved.append(resource.id)
+        if unresolved:
+            click.echo(f'  used by tasks of several users, left as is: {", ".join(map(str, unresolved))}')
+    for resource, user_id in changes:
+        click.echo(f'  resource {resource.id}: {resource.user_id} -> {user_id}')
+        resource.user_id = user_id
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    click.echo(f'{len(changes)} resource(s) {"to reassign" if dry_run else "reassigned"}')
+
+
+@asr_cli.command('serve')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket path (default: ASR_SERVER_SOCKET).')
+@click.option('--workers', default=None, type=int, help='Model processes (default: ASR_SERVER_WORKERS).')
+def serve_asr(socket_path, workers):
+    """Run the shared ASR server that web workers use with ASR_BACKEND=remote."""
+    config = current_app.config
+    try:
+        asr_server.serve(config, socket_path or config['ASR_SERVER_SOCKET'],
+                         workers or config.get('ASR_SERVER_WORKERS', 1), log=click.echo)
+    except OSError as e:
+        raise click.ClickException(str(e))
+
+
+def register_commands(app):
+    app.cli.add_command(storage_cli)
+    app.cli.add_command(recordings_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(perf_cli)
+    app.cli.add_command(asr_cli)
+    app.cli.add_command(resources_cli)
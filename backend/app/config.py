@@ -5,4 +5,74 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine tuning (app/database.py): SQLite pragmas, or pool sizing when DATABASE_URL is a server database
+    DB_ENGINE_TUNING = os.environ.get('DB_ENGINE_TUNING', '1') == '1'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'  # durable in WAL mode except on power loss
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+    # Speech recognition model (shared per process, see app/services/asr_model.py)
+    ASR_MODEL_DIR = os.environ.get('ASR_MODEL_DIR') or 'iic/SenseVoiceSmall'
+    ASR_VAD_MODEL = os.environ.get('ASR_VAD_MODEL') or 'fsmn-vad'
+    ASR_DEVICE = os.environ.get('ASR_DEVICE') or 'auto'  # auto, cpu, cuda:0 ...
+    ASR_PRELOAD = os.environ.get('ASR_PRELOAD', '1') == '1'  # load + warm up at startup (not under the flask CLI)
+    ASR_WARMUP = os.environ.get('ASR_WARMUP', '1') == '1'
+    ASR_MODEL_VERSION = os.environ.get('ASR_MODEL_VERSION')  # defaults to ASR_MODEL_DIR
+    # Micro-batching of concurrent recognition requests (app/services/asr_batcher.py)
+    ASR_BATCH_WINDOW_MS = int(os.environ.get('ASR_BATCH_WINDOW_MS', 20))
+    ASR_BATCH_MAX_SIZE = int(os.environ.get('ASR_BATCH_MAX_SIZE', 16))
+    ASR_REQUEST_TIMEOUT = float(os.environ.get('ASR_REQUEST_TIMEOUT', 120))
+    # local: every web process loads the model; remote: recognition goes to `flask asr serve` (app/services/asr_server.py)
+    # remote also turns off /records/stream sessions (501), which would need a streaming model in every web process
+    ASR_BACKEND = os.environ.get('ASR_BACKEND') or 'local'
+    ASR_SERVER_SOCKET = os.environ.get('ASR_SERVER_SOCKET') or '/tmp/english-learning-asr.sock'
+    ASR_SERVER_AUTHKEY = os.environ.get('ASR_SERVER_AUTHKEY')  # defaults to SECRET_KEY
+    ASR_SERVER_WORKERS = int(os.environ.get('ASR_SERVER_WORKERS', 1))  # model copies in the server
+    ASR_SERVER_MAX_PENDING = int(os.environ.get('ASR_SERVER_MAX_PENDING', 64))  # queued requests per server worker (or local web process), then "busy"
+    ASR_CLIENT_MAX_INFLIGHT = int(os.environ.get('ASR_CLIENT_MAX_INFLIGHT', 8))  # per web process
+    ASR_CLIENT_QUEUE_TIMEOUT = float(os.environ.get('ASR_CLIENT_QUEUE_TIMEOUT', 5))
+    # Sentence segments of uploads (app/services/segmentation.py): VAD spans closer than the gap are merged up to the max length
+    ASR_SEGMENT_MERGE_GAP_MS = int(os.environ.get('ASR_SEGMENT_MERGE_GAP_MS', 300))
+    ASR_SEGMENT_MAX_SECONDS = int(os.environ.get('ASR_SEGMENT_MAX_SECONDS', 12))
+
+    # Recording submission: 'sync' keeps the old blocking response, 'async' returns 202 + job ID
+    RECORDING_SUBMIT_MODE = os.environ.get('RECORDING_SUBMIT_MODE') or 'sync'
+    RECORDING_JOB_WORKERS = int(os.environ.get('RECORDING_JOB_WORKERS', 2))
+    RECORDING_JOB_QUEUE_SIZE = int(os.environ.get('RECORDING_JOB_QUEUE_SIZE', 32))
+    RECORDING_JOB_TTL = int(os.environ.get('RECORDING_JOB_TTL', 3600))  # seconds a finished job stays pollable
+    RECORDING_JOB_STALE_SECONDS = int(os.environ.get('RECORDING_JOB_STALE_SECONDS', 600))  # then another worker resumes it; keep above ASR_REQUEST_TIMEOUT
+    # Streaming recognition sessions (/records/stream): partials from a chunked model, final text from the batch path
+    # Dedicated chunked model for live partials; empty by default because the available paraformer
+    # streaming checkpoints are Mandarin-only (set e.g. paraformer-zh-streaming for Chinese material)
+    ASR_STREAMING_MODEL = os.environ.get('ASR_STREAMING_MODEL', '')
+    ASR_STREAM_PARTIAL_STRIDES = int(os.environ.get('ASR_STREAM_PARTIAL_STRIDES', 2))  # without it: re-recognize the clip every N x 600 ms
+    ASR_STREAM_MAX_SESSIONS = int(os.environ.get('ASR_STREAM_MAX_SESSIONS', 32))
+    ASR_STREAM_SESSION_TTL = int(os.environ.get('ASR_STREAM_SESSION_TTL', 120))  # idle seconds before a session is dropped
+    ASR_STREAM_MAX_SECONDS = int(os.environ.get('ASR_STREAM_MAX_SECONDS', 120))
+
+    # Content-hash transcription cache for /convert/speech-to-text
+    TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_ENTRIES', 5000))
+
+    # Low-bitrate Opus playback variants transcoded after upload (app/services/transcoding.py)
+    PLAYBACK_VARIANTS_ENABLED = os.environ.get('PLAYBACK_VARIANTS_ENABLED', '1') == '1'
+    PLAYBACK_OPUS_BITRATE = os.environ.get('PLAYBACK_OPUS_BITRATE') or '32k'
+    TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', 1))
+
+    # Local text-to-speech with a per-sentence disk cache in TTS_AUDIO_FOLDER (app/services/tts.py)
+    TTS_ENGINE = os.environ.get('TTS_ENGINE') or 'stub'  # stub, espeak or package.module:factory
+    TTS_VOICE = os.environ.get('TTS_VOICE') or 'en-us'
+    TTS_CACHE_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    TTS_MAX_CHARS = int(os.environ.get('TTS_MAX_CHARS', 20000))
+
+    # Virtual recurrence of daily/weekly tasks (app/services/recurrence.py)
+    RECURRENCE_LOOKBACK_DAYS = int(os.environ.get('RECURRENCE_LOOKBACK_DAYS', 30))  # missed occurrences still listed as due
+    RECURRENCE_LOOKAHEAD_DAYS = int(os.environ.get('RECURRENCE_LOOKAHEAD_DAYS', 30))  # upcoming occurrences in /tasks/<id>/items
+    RECURRENCE_MAX_WINDOW_DAYS = int(os.environ.get('RECURRENCE_MAX_WINDOW_DAYS', 366))
+
     # Add other configurations here, e.g., for mail, JWT, etc.
\ No newline at end of file
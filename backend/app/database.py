@@ -0,0 +1,59 @@
+# Engine configuration for the deployment database.
+# SQLite (the default app.db) is switched to WAL with synchronous=NORMAL on every new
+# connection, so readers no longer block the writer and a commit is one append to the WAL
+# instead of a journal write plus two fsyncs; concurrent writers queue on busy_timeout
+# instead of failing with "database is locked". A server database (DATABASE_URL pointing at
+# PostgreSQL/MySQL) gets a sized, pre-pinged and recycled connection pool instead.
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_DRIVERS = ('sqlite', 'sqlite+pysqlite')
+
+
+def is_sqlite(uri: str) -> bool:
+    return make_url(uri).drivername in SQLITE_DRIVERS
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    if not config.get('DB_ENGINE_TUNING', True):
+        return {}
+    if is_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        # pysqlite's own lock wait, kept in line with PRAGMA busy_timeout
+        return {'connect_args': {'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),  # below typical server-side idle timeouts
+        'pool_pre_ping': True,  # drop connections the server closed while they sat in the pool
+    }
+
+
+def sqlite_pragmas(config) -> list:
+    return [
+        f"journal_mode={config.get('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"mmap_size={int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        # negative: size in KiB rather than pages
+        f"cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))}",
+        'temp_store=MEMORY',
+    ]
+
+
+def init_engine(app, engine) -> None:
+    """Run the SQLite pragmas on every new DBAPI connection of engine."""
+    if not app.config.get('DB_ENGINE_TUNING', True) or engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(f'PRAGMA {pragma}')
+        finally:
+            cursor.close()
+
@@ -6,4 +6,8 @@ from .recording import Recording
 from .uploaded_file import UploadedFile
 from .task import Task
 from .task_item import TaskItem
-__all__ = ['User', 'Word', 'Recording', 'UploadedFile', 'Task', 'TaskItem']
\ No newline at end of file
+from .transcription_cache import TranscriptionCache
+from .task_stats import TaskStats
+from .resource_segment import ResourceSegment
+from .recording_job import RecordingJob
+__all__ = ['User', 'Word', 'Recording', 'UploadedFile', 'Task', 'TaskItem', 'TranscriptionCache', 'TaskStats', 'ResourceSegment', 'RecordingJob']
\ No newline at end of file
@@ -1,8 +1,12 @@
 from .. import db
+from sqlalchemy.orm import joinedload
 import datetime
 
 class Recording(db.Model):
     __tablename__ = 'recordings'
+    __table_args__ = (
+        db.Index('ix_recordings_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(64), db.ForeignKey('users.id'), nullable=False)
     word_id = db.Column(db.Integer, db.ForeignKey('words.id'), nullable=False)
@@ -10,6 +14,7 @@ class Recording(db.Model):
     score = db.Column(db.Float) # Pronunciation score
     feedback = db.Column(db.Text) # Detailed feedback (e.g., mispronounced phonemes)
     recognized_text = db.Column(db.Text) # Text recognized from user's speech
+    model_version = db.Column(db.String(128)) # ASR model that produced recognized_text/score
     created_at = db.Column(db.DateTime, default=datetime.datetime.now)
 
     user = db.relationship('User', backref=db.backref('recordings', lazy='dynamic'))
@@ -18,6 +23,11 @@ class Recording(db.Model):
     def __repr__(self):
         return f'<Recording {self.id} by User {self.user_id} for Word {self.word_id}>'
 
+    @classmethod
+    def with_related(cls, query):
+        """Eager-load the relationships to_dict reads, so serializing a list costs no extra queries."""
+        return query.options(joinedload(cls.user), joinedload(cls.word))
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -27,6 +37,7 @@ class Recording(db.Model):
             'score': self.score,
             'feedback': self.feedback,
             'recognized_text': self.recognized_text,
+            'model_version': self.model_version,
             'created_at': self.created_at,
             'user_username': self.user.username if self.user else None,
             'word_text': self.word.text if self.word else None
@@ -0,0 +1,39 @@
+from .. import db
+import datetime
+
+class RecordingJob(db.Model):
+    """State of an asynchronous recording submission, shared by every web worker."""
+    __tablename__ = 'recording_jobs'
+    __table_args__ = (
+        # 过期清理与卡住任务的恢复按 (status, 时间) 查找
+        db.Index('ix_recording_jobs_status_created', 'status', 'created_at'),
+    )
+    id = db.Column(db.String(32), primary_key=True)  # job id handed to the client
+    owner_id = db.Column(db.String(64), nullable=False)  # JWT identity that submitted the job
+    user_id = db.Column(db.String(64), nullable=False)
+    word_id = db.Column(db.Integer, nullable=False)
+    file_path = db.Column(db.String(512), nullable=False)
+    reference_text = db.Column(db.Text, nullable=False, default='')
+    status = db.Column(db.String(16), nullable=False, default='queued')  # queued, running, done, failed
+    recording_id = db.Column(db.Integer, db.ForeignKey('recordings.id'), nullable=True)
+    text = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.now, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<RecordingJob {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'owner_id': self.owner_id,
+            'status': self.status,
+            'recording_id': self.recording_id,
+            'text': self.text,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
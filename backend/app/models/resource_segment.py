@@ -0,0 +1,28 @@
+from .. import db
+
+class ResourceSegment(db.Model):
+    """One VAD segment (roughly a sentence) of an uploaded resource, with its recognized text."""
+    __tablename__ = 'resource_segments'
+    __table_args__ = (
+        db.UniqueConstraint('uploaded_file_id', 'seq', name='uq_resource_segments_file_seq'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    uploaded_file_id = db.Column(db.Integer, db.ForeignKey('uploaded_files.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # 0-based position in the file
+    start_ms = db.Column(db.Integer, nullable=False)
+    end_ms = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+    uploaded_file = db.relationship('UploadedFile', backref=db.backref(
+        'segments', lazy='dynamic', cascade='all, delete-orphan', order_by='ResourceSegment.seq'))
+
+    def __repr__(self):
+        return f'<ResourceSegment {self.uploaded_file_id}#{self.seq} {self.start_ms}-{self.end_ms}ms>'
+
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'start_ms': self.start_ms,
+            'end_ms': self.end_ms,
+            'text': self.text
+        }
@@ -1,14 +1,22 @@
 from .. import db
+from sqlalchemy.orm import joinedload
 import datetime
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # 任务列表：按状态筛选并按创建时间倒序；不带状态筛选时用第二个索引
+        db.Index('ix_tasks_user_status_create', 'user_id', 'task_status', 'create_date'),
+        db.Index('ix_tasks_user_create', 'user_id', 'create_date'),
+    )
     id = db.Column(db.String(64), primary_key=True)
     user_id = db.Column(db.String(64), db.ForeignKey('users.id'), nullable=False)
     resource_id = db.Column(db.Integer, db.ForeignKey('uploaded_files.id'), nullable=True)  # 关联资源，可为空
     task_type = db.Column(db.String(32), nullable=False)  # 任务类型，如 'practice', 'review', 'test'
     cycle_type = db.Column(db.String(32), nullable=False)
     week_days = db.Column(db.String(32), nullable=True)
+    # 编译后的周期计划：bit i 表示星期 i（周一为 0）有任务；为空表示任务项已全部预先生成（旧任务、一次性任务）
+    weekday_mask = db.Column(db.Integer, nullable=True)
     task_plan_date = db.Column(db.DateTime, nullable=False)  # 任务计划日期
     task_finish_date = db.Column(db.DateTime, nullable=True)  # 任务完成日期，可为空
     task_num = db.Column(db.Integer, nullable=False, default=0)  # 任务项总数
@@ -24,6 +32,11 @@ class Task(db.Model):
     def __repr__(self):
         return f'<Task {self.id} by User {self.user_id}>'
     
+    @classmethod
+    def with_related(cls, query):
+        """Eager-load the relationships to_dict reads, so serializing a list costs no extra queries."""
+        return query.options(joinedload(cls.user), joinedload(cls.resource))
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -32,6 +45,7 @@ class Task(db.Model):
             'task_type': self.task_type,
             'cycle_type': self.cycle_type,
             'week_days': self.week_days,
+            'weekday_mask': self.weekday_mask,
             'task_plan_date': self.task_plan_date if self.task_plan_date else None,
             'task_finish_date': self.task_finish_date if self.task_finish_date else None,
             'task_num': self.task_num,
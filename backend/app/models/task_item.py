@@ -1,8 +1,19 @@
 from .. import db
+from sqlalchemy.orm import joinedload
 import datetime
 
 class TaskItem(db.Model):
     __tablename__ = 'task_items'
+    __table_args__ = (
+        # 未完成任务队列：user_id + 按 plan_time 倒序，部分索引只包含未完成的任务项
+        db.Index('ix_task_items_uncompleted', 'user_id', 'plan_time', 'id',
+                 sqlite_where=db.text('end_time IS NULL AND score IS NULL'),
+                 postgresql_where=db.text('end_time IS NULL AND score IS NULL')),
+        # 某任务下的任务项按 plan_time 排序
+        db.Index('ix_task_items_task_user_plan', 'task_id', 'user_id', 'plan_time'),
+        # 用户的任务项按创建时间倒序
+        db.Index('ix_task_items_user_create', 'user_id', 'create_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(64), db.ForeignKey('users.id'), nullable=False)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
@@ -22,6 +33,11 @@ class TaskItem(db.Model):
     def __repr__(self):
         return f'<TaskItem {self.id} for Task {self.task_id} by User {self.user_id}>'
     
+    @classmethod
+    def with_related(cls, query):
+        """Eager-load the relationships to_dict reads, so serializing a list costs no extra queries."""
+        return query.options(joinedload(cls.user), joinedload(cls.resource))
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -0,0 +1,23 @@
+from .. import db
+import datetime
+
+# 每个用户一行的任务计数器，由任务增删改在同一事务内维护（见 services/task_stats.py）
+class TaskStats(db.Model):
+    __tablename__ = 'task_stats'
+    user_id = db.Column(db.String(64), db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    # 按状态
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    in_progress = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+    # 按类型
+    practice = db.Column(db.Integer, nullable=False, default=0)
+    review = db.Column(db.Integer, nullable=False, default=0)
+    test = db.Column(db.Integer, nullable=False, default=0)
+    homework = db.Column(db.Integer, nullable=False, default=0)
+    exam = db.Column(db.Integer, nullable=False, default=0)
+    update_date = db.Column(db.DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f'<TaskStats for User {self.user_id}>'
@@ -0,0 +1,15 @@
+from .. import db
+import datetime
+
+class TranscriptionCache(db.Model):
+    __tablename__ = 'transcription_cache'
+    content_hash = db.Column(db.String(64), primary_key=True)  # sha256 of the uploaded audio bytes
+    model_version = db.Column(db.String(128), nullable=False)  # ASR model that produced text
+    text = db.Column(db.Text, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.now, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.datetime.now, nullable=False, index=True)  # LRU eviction order
+
+    def __repr__(self):
+        return f'<TranscriptionCache {self.content_hash[:12]} ({self.model_version})>'
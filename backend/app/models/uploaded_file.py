@@ -1,8 +1,13 @@
 from .. import db
+from sqlalchemy.orm import joinedload
 import datetime
 
 class UploadedFile(db.Model):
     __tablename__ = 'uploaded_files'
+    __table_args__ = (
+        # 资源库列表：当前用户的资源按 id（即上传顺序）倒序游标分页
+        db.Index('ix_uploaded_files_user', 'user_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(64), db.ForeignKey('users.id'), nullable=False)
     filename = db.Column(db.String(256), nullable=False)
@@ -16,6 +21,11 @@ class UploadedFile(db.Model):
     def __repr__(self):
         return f'<UploadedFile {self.id} {self.filename} by User {self.user_id}>'
 
+    @classmethod
+    def with_related(cls, query):
+        """Eager-load the relationships to_dict reads, so serializing a list costs no extra queries."""
+        return query.options(joinedload(cls.user))
+
     def to_dict(self):
         return {
             'id': self.id,
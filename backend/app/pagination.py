@@ -0,0 +1,137 @@
+# Keyset (cursor) pagination helpers.
+# A cursor is the sort key of the last row of a page, encoded as an opaque URL-safe token;
+# the next page seeks past it with a range condition instead of OFFSET, so every page
+# costs the same no matter how deep the client has scrolled.
+import base64
+import datetime
+import json
+
+from sqlalchemy import and_, false, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not produced by encode_cursor."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    """Decode a cursor back to typed values for the given sort columns."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("malformed cursor") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor("cursor does not match this listing")
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and column.type.python_type is datetime.datetime:
+            try:
+                value = datetime.datetime.fromisoformat(value)
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor("malformed cursor") from e
+        decoded.append(value)
+    return decoded
+
+
+def _nullable(column) -> bool:
+    return getattr(column.expression, "nullable", True)
+
+
+def seek_condition(columns, values, descending: bool):
+    """Rows strictly after `values` in (columns...) order.
+
+    Written as `a <= x AND (a < x OR (a = x AND b < y))` rather than a plain OR so the
+    leading column still bounds an index range scan. NULLs sort first in ascending and
+    last in descending order, as keyset_page orders them explicitly on every backend.
+    """
+    first, rest = columns[0], columns[1:]
+    value = values[0]
+    tie = seek_condition(rest, values[1:], descending) if rest else None
+    if value is None:
+        # inside the NULL block: its remaining rows, then (ascending only) every non-NULL row
+        after_null = and_(first.is_(None), tie) if tie is not None else false()
+        return after_null if descending else or_(first.isnot(None), after_null)
+    before = (lambda c, v: c < v) if descending else (lambda c, v: c > v)
+    not_after = (lambda c, v: c <= v) if descending else (lambda c, v: c >= v)
+    if tie is None:
+        condition = before(first, value)
+    else:
+        condition = and_(not_after(first, value), or_(before(first, value), and_(first == value, tie)))
+    if descending and _nullable(first):
+        # the NULL block follows every non-NULL value
+        condition = or_(condition, first.is_(None))
+    return condition
+
+
+def get_limit(args, default: int = DEFAULT_LIMIT) -> int:
+    limit = args.get("limit", default, type=int)
+    return max(1, min(limit or default, MAX_LIMIT))
+
+
+def wants_cursor(args) -> bool:
+    """Cursor mode is selected by sending `cursor` or `limit`; `page`/`per_page` keep OFFSET paging."""
+    return 'cursor' in args or 'limit' in args
+
+
+def keyset_page(query, columns, cursor: str = None, limit: int = DEFAULT_LIMIT, descending: bool = False):
+    """Fetch one page ordered by columns (the last one must be unique, e.g. the primary key).
+
+    :return: (items, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        query = query.filter(seek_condition(columns, decode_cursor(cursor, columns), descending))
+    order = [c.desc().nulls_last() if descending else c.asc().nulls_first() for c in columns]
+    items = query.order_by(None).order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return items, next_cursor
+
+
+def sort_key(values) -> tuple:
+    # NULLs first ascending (and so last when reversed), like keyset_page's ORDER BY
+    return tuple((v is not None, v) for v in values)
+
+
+def cursor_listing(query, columns, args, descending: bool = False, default_limit: int = DEFAULT_LIMIT, extra=None):
+    """keyset_page driven by request args; the exact total is only counted when `with_total=1`.
+
+    :param extra: optional (sort key tuple, item) pairs that are not rows of query (e.g. computed
+        entries); they are merged into the pages in the same order as the rows
+    :return: (items, meta) where meta holds next_cursor, has_more and optionally total
+    """
+    cursor = args.get("cursor")
+    limit = get_limit(args, default=default_limit)
+    items, next_cursor = keyset_page(query, columns, cursor=cursor, limit=limit, descending=descending)
+    extra = extra or []
+    total_extra = len(extra)
+    if extra:
+        if cursor:
+            after = sort_key(decode_cursor(cursor, columns))
+            extra = [e for e in extra if (sort_key(e[0]) < after if descending else sort_key(e[0]) > after)]
+        merged = [(tuple(getattr(item, c.key) for c in columns), item) for item in items] + extra
+        merged.sort(key=lambda e: sort_key(e[0]), reverse=descending)
+        has_more = next_cursor is not None or len(merged) > limit
+        merged = merged[:limit]
+        items = [item for _, item in merged]
+        next_cursor = encode_cursor(merged[-1][0]) if has_more else None
+    meta = {"next_cursor": next_cursor, "has_more": next_cursor is not None}
+    if args.get("with_total", type=int):
+        meta["total"] = query.order_by(None).count() + total_extra
+    return items, meta
@@ -1,25 +1,11 @@
-import tempfile
-import os
+import io
 from .. import db
-import uuid
 from ..models import UploadedFile
-from ..models import User
-from flask import Blueprint, request, jsonify, send_file,  current_app, send_from_directory
+from flask import Blueprint, request, jsonify, send_file,  current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
 
-from werkzeug.utils import secure_filename
-
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
-##/Users/louisw/.cache/modelscope/hub/models/iic/SenseVoiceSmall
-#/home/english_learning_app/backend/model/SenseVoiceSmall
-model_dir = "iic/SenseVoiceSmall"
-model = AutoModel(
-    model=model_dir,
-    disable_update=True,
-    vad_model="fsmn-vad",
-    vad_kwargs={"max_single_segment_time": 30000},
-    device="cuda:0",
-)
+from ..services import asr_model, asr_batcher, segmentation, storage, streaming_asr, transcoding, transcription_cache, tts
+from ..services.audio_loader import load_audio
 
 bp_convert = Blueprint('convert', __name__)
 
@@ -30,21 +16,31 @@ def text_to_speech():
     txt_file = request.files['file']
     if not txt_file.filename.endswith('.txt'):
         return jsonify({'message': '文件类型错误，仅支持txt'}), 400
-    text = txt_file.read().decode('utf-8')
-    mp3_path = tempfile.mktemp(suffix='.mp3')
-    with open(mp3_path, 'wb') as f:
-        f.write(b'MOCK_MP3_DATA')
-    return send_file(mp3_path, as_attachment=True, download_name='output.mp3', mimetype='audio/mpeg')
+    try:
+        text = txt_file.read().decode('utf-8')
+    except UnicodeDecodeError:
+        return jsonify({'message': '文本编码错误，仅支持UTF-8'}), 400
+    if len(text) > current_app.config['TTS_MAX_CHARS']:
+        return jsonify({'message': f'文本过长，最多 {current_app.config["TTS_MAX_CHARS"]} 字'}), 400
+    if not tts.split_sentences(text):
+        return jsonify({'message': '文本为空'}), 400
+    
+    # 按句合成，已合成过的句子直接从 TTS_AUDIO_FOLDER 缓存读取
+    try:
+        audio, sentences, cached = tts.synthesize(text)
+    except tts.TTSError as e:
+        current_app.logger.error(f"TTS failed: {e}")
+        return jsonify({'message': f'语音合成失败: {str(e)}'}), 500
+    response = send_file(io.BytesIO(audio), as_attachment=True, download_name='output.wav', mimetype='audio/wav')
+    response.headers['X-TTS-Sentences'] = str(sentences)
+    response.headers['X-TTS-Cached-Sentences'] = str(cached)
+    return response
 
 @bp_convert.route('/speech-to-text', methods=['POST'])
+@jwt_required()
 def speech_to_text():
-    user_id = request.form.get("user_id", type=int) 
-    if not user_id:
-        default_user = User.query.first()
-        if default_user:
-            user_id = default_user.id
-        else:
-            return jsonify({"success": False, "message": "User not found or not authenticated. Please create a user first."}), 401
+    # 上传的资源归当前登录用户所有（/resources 只列出调用者自己的资源）
+    user_id = get_jwt_identity()
 
     if 'file' not in request.files:
         return jsonify({'message': '缺少mp3文件'}), 400
@@ -53,35 +49,45 @@ def speech_to_text():
         return jsonify({'message': '文件类型错误，仅支持mp3'}), 400
     recognized_text = '模拟识别文本'
 
-    unique_file_stem = str(uuid.uuid4())
-    # Path for the original uploaded file (txt or mp3)
-    stored_original_filename = f"{unique_file_stem}.mp3"
-    original_save_path = os.path.join(current_app.config["UPLOAD_FOLDER"], stored_original_filename)
-    
     try:
-        audio_file.save(original_save_path)
+        # 按内容哈希分片存储（相同音频只存一份），哈希同时用于命中识别缓存
+        blob = storage.store_stream(audio_file.stream, audio_file.filename)
     except Exception as e:
         current_app.logger.error(f"Error saving original file: {e}")
         return jsonify({"success": False, "message": f"Error saving original file: {str(e)}"}), 500
 
-
-    res = model.generate(
-        input=original_save_path,
-        cache={},
-        language="auto",  # "zn", "en", "yue", "ja", "ko", "nospeech"
-        use_itn=True,
-        batch_size_s=60,
-        merge_vad=True,  #
-        merge_length_s=15,
-    )
-    recognized_text = rich_transcription_postprocess(res[0]["text"])
+    recognized_text = transcription_cache.lookup(blob.content_hash)
+    cached = recognized_text is not None
+    # 同一音频之前上传过时直接复用它的分句；否则按 VAD 切分后逐句识别，整段文本由各句拼接
+    segments = segmentation.segments_of_blob(blob.path) if cached else None
+    if segments is None:
+        waveform = load_audio(blob.path)
+        segments = segmentation.transcribe_segments(waveform)
+        segmentation.write_pcm_variant(blob.path, waveform)
+        if not cached:
+            recognized_text = segmentation.join_text(segments)
+            transcription_cache.store(blob.content_hash, recognized_text, blob.size)
     print(recognized_text)
     #mp3_path = tempfile.mktemp(suffix='.mp3')
     #with open(mp3_path, 'wb') as f:
     #    f.write(audio_file.read())
 
-    uploaded_file = UploadedFile(user_id=user_id, filename=audio_file.filename, text_content=recognized_text, file_type='mp3', file_path=original_save_path)
+    uploaded_file = UploadedFile(user_id=user_id, filename=audio_file.filename, text_content=recognized_text, file_type='mp3', file_path=blob.path)
     db.session.add(uploaded_file)
+    segmentation.attach(uploaded_file, segments)
     db.session.commit()
-    return jsonify({'text': recognized_text})
+    # 后台生成低码率 Opus 播放版本，/mp3 按 Accept 头选择
+    transcoding.schedule(current_app._get_current_object(), blob.path)
+    return jsonify({'text': recognized_text, 'cached': cached, 'resource_id': uploaded_file.id, 'segments': len(segments)})
+
+@bp_convert.route('/asr/stats', methods=['GET'])
+def asr_stats():
+    """模型加载耗时、批处理队列、识别缓存、流式会话与 TTS 句子缓存指标"""
+    return jsonify({
+        'model': asr_model.get_stats(),
+        'batching': asr_batcher.get_stats(),
+        'cache': transcription_cache.get_stats(),
+        'streaming': streaming_asr.get_stats(),
+        'tts': tts.get_stats()
+    }), 200
 
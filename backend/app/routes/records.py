@@ -1,23 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from ..models import Recording, User, UploadedFile
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .. import db
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
-import os
-from werkzeug.utils import secure_filename # For handling file uploads securely
-import subprocess
-from datetime import datetime
-
-
-model_dir = "iic/SenseVoiceSmall"
-model = AutoModel(
-    model=model_dir,
-    disable_update=True,
-    vad_model="fsmn-vad",
-    vad_kwargs={"max_single_segment_time": 30000},
-    device="cuda:0",
-)
+from ..services import recording_pipeline, storage, streaming_asr, transcoding
+
 
 bp_records = Blueprint('records', __name__)
 
@@ -29,10 +14,6 @@ bp_records = Blueprint('records', __name__)
 #     return '.' in filename and \
 #            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def convert_wav_to_mp3(input_path: str) -> str:
-        output_path = input_path.replace(".wav", ".mp3")
-        subprocess.run(["ffmpeg", "-i", input_path, "-ab", "192k", output_path])
-        return output_path
 #@jwt_required()
 @bp_records.route('/submitRecords', methods=['POST'])
 @jwt_required()
@@ -65,70 +46,138 @@ def create_recording():
         print("Word not found")
         return jsonify({'message': 'Word not found'}), 404
 
-    current_time = datetime.now()
-    formatted = current_time.strftime("%Y%m%d%H%M%S")
-
-    filename = f"user_{user_id}_word_{word_id}_{formatted}" + secure_filename(audio_file.filename) 
-    upload_folder = current_app.config.get('UPLOAD_FOLDER', os.path.join(current_app.root_path, '..', 'uploads', 'recordings'))
-    os.makedirs(upload_folder, exist_ok=True) # Ensure upload folder exists
-    file_path = os.path.join(upload_folder, filename)
-
     try:
-        audio_file.save(file_path)
+        # 录音按内容哈希分片存放在 UPLOAD_FOLDER/objects 下
+        file_path = storage.store_stream(audio_file.stream, audio_file.filename).path
     except Exception as e:
         current_app.logger.error(f"Error saving original file: {e}")
         return jsonify({"success": False, "message": f"Error saving original file: {str(e)}"}), 500
-   
-    # Initialize SpeechEvaluationService
-    # In a real app, API keys or model paths might come from config
-    output_path = convert_wav_to_mp3(file_path)
-    print(output_path)
-
-    res = model.generate(
-        input=output_path,
-        cache={},
-        language="auto",  # "zn", "en", "yue", "ja", "ko", "nospeech"
-        use_itn=True,
-        batch_size_s=60,
-        merge_vad=True,  #
-        merge_length_s=15,
-    )
-    recognized_text = rich_transcription_postprocess(res[0]["text"])
-
-    # Evaluate pronunciation
-    # score, feedback, recognized_text = speech_service.evaluate_pronunciation(
-    #     audio_file_path=file_path, # Pass the actual path in a real app
-    #     reference_text=word.text_content
-    # )
-    score, feedback = 0, ""
-
-    recording = Recording(
-        user_id=user.id,
-        word_id=word.id,
-        audio_file_path=file_path, # Store the path to the audio file
-        score=score,
-        feedback=feedback,
-        recognized_text=recognized_text
-    )
-    db.session.add(recording)
-    db.session.commit()
-
-    return jsonify({'text': recognized_text})
+
+    # 后台生成低码率 Opus 播放版本（回放录音时 /mp3 按 Accept 头选择）
+    transcoding.schedule(current_app._get_current_object(), file_path)
+    
+    # mode=async: 保存后立即返回 job_id，识别在后台线程池中完成；旧客户端默认走同步流程
+    mode = data.get('mode') or current_app.config.get('RECORDING_SUBMIT_MODE', 'sync')
+    if mode == 'async':
+        try:
+            job_id = recording_pipeline.submit_job(current_user_id, user.id, word.id, file_path, word.text_content)
+        except recording_pipeline.JobQueueFull:
+            return jsonify({'message': 'Too many recordings are being processed, please retry later'}), 503
+        return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/records/jobs/{job_id}'}), 202
+
+    recording = recording_pipeline.process_recording(user.id, word.id, file_path, word.text_content)
+    return jsonify({'text': recording.recognized_text})
     #return jsonify({'message': 'Recording created and evaluated successfully', 'recording': recording.to_dict()}), 201
     # else:
     #     return jsonify({'message': 'File type not allowed'}), 400
 
+@bp_records.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_recording_job(job_id):
+    job = recording_pipeline.get_job(job_id)
+    if not job or job['owner_id'] != get_jwt_identity():
+        return jsonify({'message': 'Job not found'}), 404
+
+    result = {
+        'job_id': job['job_id'],
+        'status': job['status'],  # queued, running, done, failed
+        'text': job['text'],
+        'error': job['error'],
+        'recording': None
+    }
+    if job['recording_id'] is not None:
+        recording = Recording.query.get(job['recording_id'])
+        result['recording'] = recording.to_dict() if recording else None
+    return jsonify(result), 200
+
+# 流式识别：边录边传 16 位 PCM 分片，每个分片返回当前的部分识别结果，结束时与 submitRecords 一样保存并评分
+@bp_records.route('/stream', methods=['POST'])
+@jwt_required()
+def start_recording_stream():
+    data = request.get_json(silent=True) or {}
+    word_id = data.get('word_id')
+    if not isinstance(word_id, int):
+        return jsonify({'message': 'Missing word_id'}), 400
+    sample_rate = data.get('sample_rate', 16000)
+    if not isinstance(sample_rate, int) or not 8000 <= sample_rate <= 48000:
+        return jsonify({'message': 'sample_rate must be an integer between 8000 and 48000'}), 400
+
+    # 录音归属于登录用户，不接受请求体中的 user_id
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({'message': 'User not found'}), 401
+    word = UploadedFile.query.get_or_404(word_id)
+
+    try:
+        session = streaming_asr.start(user.id, user.id, word.id, word.text_content, sample_rate)
+    except streaming_asr.SessionLimitReached:
+        return jsonify({'message': 'Too many streaming sessions are open, please retry later'}), 503
+    except streaming_asr.StreamingUnavailable:
+        return jsonify({'message': 'Streaming recognition is not available with the remote ASR backend, '
+                                   'submit the recording to /records/submitRecords instead'}), 501
+    return jsonify({
+        'session_id': session.id,
+        'sample_rate': sample_rate,
+        'format': 'pcm_s16le',
+        'chunk_url': f'/records/stream/{session.id}/chunk',
+        'finish_url': f'/records/stream/{session.id}/finish'
+    }), 201
+
+@bp_records.route('/stream/<session_id>/chunk', methods=['POST'])
+@jwt_required()
+def add_recording_stream_chunk(session_id):
+    session = streaming_asr.get_session(session_id, get_jwt_identity())
+    if session is None:
+        return jsonify({'message': 'Session not found'}), 404
+    try:
+        session = streaming_asr.add_chunk(session, request.get_data())
+    except streaming_asr.SessionClosed:
+        return jsonify({'message': 'Session not found'}), 404
+    except streaming_asr.SessionTooLong:
+        streaming_asr.discard(session)
+        return jsonify({'message': 'Recording is too long'}), 413
+    return jsonify({'partial': session.partial, 'received_ms': session.received_ms}), 200
+
+@bp_records.route('/stream/<session_id>/finish', methods=['POST'])
+@jwt_required()
+def finish_recording_stream(session_id):
+    session = streaming_asr.get_session(session_id, get_jwt_identity())
+    if session is None:
+        return jsonify({'message': 'Session not found'}), 404
+    chunk = request.get_data()
+    try:
+        if chunk:
+            streaming_asr.add_chunk(session, chunk)
+        recording, partial = streaming_asr.finish(session)
+    except streaming_asr.SessionClosed:
+        return jsonify({'message': 'Session not found'}), 404
+    except streaming_asr.SessionTooLong:
+        streaming_asr.discard(session)
+        return jsonify({'message': 'Recording is too long'}), 413
+    return jsonify({'text': recording.recognized_text, 'partial': partial, 'recording': recording.to_dict()}), 201
+
+@bp_records.route('/stream/<session_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_recording_stream(session_id):
+    session = streaming_asr.get_session(session_id, get_jwt_identity())
+    if session is None:
+        return jsonify({'message': 'Session not found'}), 404
+    streaming_asr.discard(session)
+    return jsonify({'message': 'Session cancelled'}), 200
+
 @bp_records.route('/user/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user_recordings(user_id):
     user = User.query.get_or_404(user_id)
-    recordings = Recording.query.filter_by(user_id=user.id).order_by(Recording.created_at.desc()).all()
+    recordings = Recording.with_related(
+        Recording.query.filter_by(user_id=user.id).order_by(Recording.created_at.desc())
+    ).all()
     return jsonify([rec.to_dict() for rec in recordings]), 200
 
 @bp_records.route('/<int:recording_id>', methods=['GET'])
 @jwt_required()
 def get_recording(recording_id):
-    recording = Recording.query.get_or_404(recording_id)
+    recording = Recording.with_related(Recording.query.filter_by(id=recording_id)).first_or_404()
     return jsonify(recording.to_dict()), 200
 
 # Add DELETE endpoint if needed
\ No newline at end of file
@@ -1,21 +1,57 @@
+import io
+import mimetypes
 import os
 from flask import Blueprint, jsonify, send_file, current_app, request
-from ..models import UploadedFile
-from flask_jwt_extended import jwt_required
+from ..models import ResourceSegment, Task, TaskItem, UploadedFile, User
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import exists, or_
 from .. import db
+from ..pagination import InvalidCursor, cursor_listing
+from ..services import segmentation, storage, transcoding
+from ..services.audio_loader import AudioDecodeError, load_audio
 
 bp_resources = Blueprint('resources', __name__)
 
+# 列表可选字段（fields=逗号分隔）；只查询被请求的列，例如列表页可以不取 text_content
+RESOURCE_FIELDS = {
+    'id': UploadedFile.id,
+    'user_id': UploadedFile.user_id,
+    'filename': UploadedFile.filename,
+    'file_path': UploadedFile.file_path,
+    'file_type': UploadedFile.file_type,
+    'text_content': UploadedFile.text_content,
+    'upload_time': UploadedFile.upload_time,
+    'user_username': User.username.label('user_username'),
+}
+
 @bp_resources.route('/resources', methods=['GET'])
 @jwt_required()
 def get_resources():
-    files = UploadedFile.query.all()
-    return jsonify([f.to_dict() for f in files]), 200
+    """当前用户的资源列表：按上传顺序倒序游标分页（?cursor=&limit=），fields= 选择返回字段"""
+    current_user_id = get_jwt_identity()
+    
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or list(RESOURCE_FIELDS)
+    unknown = [f for f in fields if f not in RESOURCE_FIELDS]
+    if unknown:
+        return jsonify({'error': f'不支持的字段: {", ".join(unknown)}，可选: {", ".join(RESOURCE_FIELDS)}'}), 400
+    if 'id' not in fields:
+        fields.insert(0, 'id')  # 游标按 id 定位
+    
+    query = db.session.query(*[RESOURCE_FIELDS[f] for f in fields]).select_from(UploadedFile)
+    if 'user_username' in fields:
+        query = query.outerjoin(User, User.id == UploadedFile.user_id)
+    query = query.filter(UploadedFile.user_id == current_user_id)
+    
+    try:
+        rows, meta = cursor_listing(query, [UploadedFile.id], request.args, descending=True, default_limit=50)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'resources': [{f: getattr(row, f) for f in fields} for row in rows], **meta}), 200
 
 @bp_resources.route('/resources/<int:id>', methods=['GET'])
 @jwt_required()
 def get_resource(id):
-    resource = UploadedFile.query.get_or_404(id)
+    resource = UploadedFile.with_related(UploadedFile.query.filter_by(id=id)).first_or_404()
     return jsonify(resource.to_dict()), 200
 
 @bp_resources.route('/resources/<int:id>', methods=['PUT'])
@@ -35,12 +71,104 @@ def update_resource(id):
         return jsonify({'error': str(e)}), 500
 
 
+# 内容寻址的文件名即内容哈希，文件永不改变，可以长期缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+PENDING_VARIANT_MAX_AGE = 60  # 秒：Opus 版本转码中时原文件的缓存时间
+
 @bp_resources.route('/mp3/<filename>', methods=['GET']) 
 @jwt_required()
 def get_mp3(filename):
-    saved_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-    return send_file(
+    saved_path = storage.resolve(filename)
+    if not os.path.isfile(saved_path):
+        return jsonify({'error': '文件不存在'}), 404
+    
+    # 客户端在 Accept 中声明支持 Ogg/Opus 且已生成低码率版本时返回该版本，否则返回原文件
+    content_hash = storage.content_hash_of(filename)
+    etag = content_hash or True  # 内容寻址文件用内容哈希作强 ETag，旧文件按 mtime/大小生成
+    mimetype = mimetypes.guess_type(filename)[0] or 'audio/mpeg'
+    variant = transcoding.playable_variant(saved_path, request.accept_mimetypes)
+    # 低码率版本尚未生成完：先返回原文件，但只短时间缓存，之后客户端能拿到 Opus 版本
+    variant_pending = not variant and transcoding.variant_expected(saved_path, request.accept_mimetypes, current_app.config)
+    if variant:
+        saved_path, mimetype = variant, transcoding.OPUS_MIMETYPE
+        etag = f'{content_hash}-opus' if content_hash else True
+    immutable = bool(content_hash) and not variant_pending
+    
+    # conditional=True：支持 Range（206 分段下载，播放器拖动进度不必重新下载）和 If-None-Match/If-Modified-Since（304）
+    response = send_file(
         saved_path,
-        mimetype='audio/mpeg',
-        conditional=False  # True时触发下载而非播放
-    )
\ No newline at end of file
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        max_age=IMMUTABLE_MAX_AGE if immutable else (PENDING_VARIANT_MAX_AGE if variant_pending else 0)
+    )
+    response.vary.add('Accept')
+    # 音频需要登录才能访问，只允许浏览器缓存，不允许共享缓存
+    response.cache_control.public = False
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.immutable = True
+    elif not variant_pending:
+        response.cache_control.no_cache = True  # 旧文件名可能被覆盖，每次用 ETag 重新验证
+    return response
+
+
+def _accessible_resource(id):
+    """上传者本人，或自己的任务/任务项引用了该资源的用户（例如练习老师布置的资源的学生）"""
+    user_id = get_jwt_identity()
+    return UploadedFile.query.filter(
+        UploadedFile.id == id,
+        or_(
+            UploadedFile.user_id == user_id,
+            exists().where(Task.resource_id == UploadedFile.id, Task.user_id == user_id),
+            exists().where(TaskItem.resource_id == UploadedFile.id, TaskItem.user_id == user_id),
+        )
+    ).first()
+
+@bp_resources.route('/resources/<int:id>/segments', methods=['GET'])
+@jwt_required()
+def get_resource_segments(id):
+    """资源的分句列表（识别时由 VAD 切分得到的句子文本与起止毫秒）"""
+    if _accessible_resource(id) is None:
+        return jsonify({'error': '资源不存在'}), 404
+    segments = ResourceSegment.query.filter_by(uploaded_file_id=id).order_by(ResourceSegment.seq).all()
+    return jsonify({'resource_id': id, 'segments': [s.to_dict() for s in segments]}), 200
+
+@bp_resources.route('/resources/<int:id>/segments/<int:seq>/audio', methods=['GET'])
+@jwt_required()
+def get_resource_segment_audio(id, seq):
+    """单句音频：从 16kHz PCM 版本中只读取该句的字节区间，加上 WAV 头返回，无需重新解码或识别"""
+    resource = _accessible_resource(id)
+    if resource is None:
+        return jsonify({'error': '资源不存在'}), 404
+    segment = ResourceSegment.query.filter_by(uploaded_file_id=id, seq=seq).first()
+    if segment is None:
+        return jsonify({'error': '分句不存在'}), 404
+
+    pcm_path = segmentation.pcm_variant_path(resource.file_path)
+    if not os.path.isfile(pcm_path):
+        # 旧资源或 PCM 文件被清理：从原文件重新生成一次
+        if not os.path.isfile(resource.file_path):
+            return jsonify({'error': '文件不存在'}), 404
+        try:
+            segmentation.write_pcm_variant(resource.file_path, load_audio(resource.file_path))
+        except AudioDecodeError as e:
+            current_app.logger.error(f"PCM variant for resource {id} failed: {e}")
+            return jsonify({'error': '音频解码失败'}), 500
+
+    offset, length = segmentation.segment_range(segment, os.path.getsize(pcm_path))
+    with open(pcm_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    content_hash = storage.content_hash_of(os.path.basename(resource.file_path))
+    response = send_file(
+        io.BytesIO(segmentation.wav_header(len(data)) + data),
+        mimetype='audio/wav',
+        download_name=f'{id}-{seq}.wav',
+        conditional=True,
+        etag=f'{content_hash}-{segment.start_ms}-{segment.end_ms}' if content_hash else True,
+        max_age=IMMUTABLE_MAX_AGE if content_hash else 0
+    )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
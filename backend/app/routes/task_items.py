@@ -1,10 +1,11 @@
-from datetime import datetime, date, time
-from flask import Blueprint, request, jsonify
+from datetime import datetime, date, time, timedelta
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.task_item import TaskItem
 from app.models.task import Task
-from app.models.uploaded_file import UploadedFile
 from app import db
+from app.pagination import InvalidCursor, cursor_listing, sort_key, wants_cursor
+from app.services import recurrence, task_progress
 from sqlalchemy import and_, or_
 
 bp_task_items = Blueprint('task_items', __name__)
@@ -26,8 +27,18 @@ def get_task_items():
     if task_id:
         query = query.filter_by(task_id=task_id)
     
-    # 按创建时间倒序排列
-    query = query.order_by(TaskItem.create_date.desc())
+    # 按创建时间倒序排列，并预加载 to_dict 用到的关联
+    query = TaskItem.with_related(query.order_by(TaskItem.create_date.desc()))
+    
+    # 游标分页：按 (create_date, id) 倒序直接定位下一页，不做 OFFSET
+    if wants_cursor(request.args):
+        try:
+            task_items, meta = cursor_listing(
+                query, [TaskItem.create_date, TaskItem.id], request.args, descending=True
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'task_items': [item.to_dict() for item in task_items], **meta}), 200
     
     # 分页
     task_items = query.paginate(
@@ -52,30 +63,49 @@ def get_uncompleted_task_items():
     today_end = datetime.combine(today, time(23, 59, 59))
     
     # 查询条件：结束时间和分数都为空（未完成），并且plan_time在今日23:59:59以前
-    query = TaskItem.query.filter(
+    # 单条联表查询（用户名、资源名随任务项一起取回），按 (plan_time, id) 倒序游标分页
+    query = TaskItem.with_related(TaskItem.query.filter(
         TaskItem.user_id == current_user_id,
         TaskItem.end_time.is_(None),
         TaskItem.score.is_(None),
         TaskItem.plan_time < today_end
-    ).order_by(TaskItem.plan_time.desc())
-    
-    task_items = query.all()
+    ))
+    
+    # 周期任务尚未生成任务项的计划（按编译后的周期计划即时展开）与已生成的任务项合并排序
+    due = recurrence.due_items(current_user_id, today_end, current_app.config['RECURRENCE_LOOKBACK_DAYS'])
+    
+    if wants_cursor(request.args):
+        try:
+            task_items, meta = cursor_listing(
+                query, [TaskItem.plan_time, TaskItem.id], request.args,
+                descending=True, default_limit=50,
+                extra=due
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        # 未传 cursor/limit：保持原来的完整列表和 total（首页一次显示全部未完成任务）
+        rows = query.order_by(TaskItem.plan_time.desc(), TaskItem.id.desc()).all()
+        merged = [((item.plan_time, item.id), item) for item in rows] + due
+        merged.sort(key=lambda pair: sort_key(pair[0]), reverse=True)
+        task_items = [item for _, item in merged]
+        meta = {'total': len(task_items)}
     
-    # 获取关联的资源信息
     result = []
     for item in task_items:
-        item_dict = item.to_dict()
-        # 获取关联的资源信息
-        if item.resource_id:
-            resource = UploadedFile.query.get(item.resource_id)
-            if resource:
-                item_dict['resource_name'] = resource.filename
+        if isinstance(item, dict):
+            item_dict = dict(item)
+            if item['resource_filename']:
+                item_dict['resource_name'] = item['resource_filename']
+        else:
+            item_dict = item.to_dict()
+            if item.resource:
+                item_dict['resource_name'] = item.resource.filename
         result.append(item_dict)
     
-    return jsonify({
-        'task_items': result,
-        'total': len(result)
-    }), 200
+    # 游标模式下总数需要额外的 COUNT，仅在客户端明确要求（with_total=1）时计算
+    response = {'task_items': result, **meta}
+    return jsonify(response), 200
 
 @bp_task_items.route('/task-items/<int:item_id>', methods=['GET'])
 @jwt_required()
@@ -83,10 +113,10 @@ def get_task_item(item_id):
     """获取指定任务项详情"""
     current_user_id = get_jwt_identity()
     
-    task_item = TaskItem.query.filter_by(
+    task_item = TaskItem.with_related(TaskItem.query.filter_by(
         id=item_id, 
         user_id=current_user_id
-    ).first()
+    )).first()
     
     if not task_item:
         return jsonify({'error': '任务项不存在'}), 404
@@ -118,8 +148,8 @@ def create_task_item():
         user_id=current_user_id,
         task_id=data['task_id'],
         resource_id=data.get('resource_id'),
-        begin_time=datetime.datetime.fromisoformat(data['begin_time'].replace('Z', '+00:00')) if data.get('begin_time') else None,
-        end_time=datetime.datetime.fromisoformat(data['end_time'].replace('Z', '+00:00')) if data.get('end_time') else None,
+        begin_time=datetime.fromisoformat(data['begin_time'].replace('Z', '+00:00')) if data.get('begin_time') else None,
+        end_time=datetime.fromisoformat(data['end_time'].replace('Z', '+00:00')) if data.get('end_time') else None,
         score=data.get('score')
     )
     
@@ -146,26 +176,20 @@ def update_task_item(item_id):
     if not task_item:
         return jsonify({'error': '任务项不存在'}), 404
     
-    # 记录原始score值，用于判断是否需要更新finished_task_num
-    original_score = task_item.score
-    
     # 更新字段
     if 'resource_id' in data:
         task_item.resource_id = data['resource_id']
     if 'begin_time' in data:
-        task_item.begin_time = datetime.datetime.fromisoformat(data['begin_time'].replace('Z', '+00:00')) if data['begin_time'] else None
+        task_item.begin_time = datetime.fromisoformat(data['begin_time'].replace('Z', '+00:00')) if data['begin_time'] else None
     if 'end_time' in data:
-        task_item.end_time = datetime.datetime.fromisoformat(data['end_time'].replace('Z', '+00:00')) if data['end_time'] else None
-    if 'score' in data:
-        task_item.score = data['score']
-        
-        # 如果score从None变为有值，说明任务完成了，需要增加finished_task_num
-        if original_score is None and data['score'] is not None:
-            task = task_item.task
-            if task:
-                task.finished_task_num += 1
+        task_item.end_time = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00')) if data['end_time'] else None
     
     try:
+        if 'score' in data:
+            # score从None变为有值说明任务项完成：条件UPDATE保证并发评分只计数一次，
+            # finished_task_num 在数据库中原子加一，全部完成时任务自动标记为completed
+            if data['score'] is None or not task_progress.complete_item(task_item, data['score']):
+                task_item.score = data['score']
         db.session.commit()
         return jsonify(task_item.to_dict()), 200
     except Exception as e:
@@ -201,10 +225,10 @@ def get_task_items_by_task(task_id):
     current_user_id = get_jwt_identity()
     
     # 验证任务是否存在且属于当前用户
-    task = Task.query.filter_by(
+    task = Task.with_related(Task.query.filter_by(
         id=task_id,
         user_id=current_user_id
-    ).first()
+    )).first()
     
     if not task:
         return jsonify({'error': '任务不存在或无权限'}), 404
@@ -214,10 +238,44 @@ def get_task_items_by_task(task_id):
     per_page = request.args.get('per_page', 10, type=int)
     
     # 查询任务项
-    task_items = TaskItem.query.filter_by(
+    query = TaskItem.with_related(TaskItem.query.filter_by(
         task_id=task_id,
         user_id=current_user_id
-    ).order_by(TaskItem.plan_time.asc()).paginate(
+    ).order_by(TaskItem.plan_time.asc()))
+    
+    # 周期任务的计划不预先生成任务项：有结束日期时合并全部计划，否则合并到未来 RECURRENCE_LOOKAHEAD_DAYS 天
+    upcoming = []
+    if task.weekday_mask is not None:
+        window_end = task.task_finish_date or \
+            datetime.now() + timedelta(days=current_app.config['RECURRENCE_LOOKAHEAD_DAYS'])
+        upcoming = recurrence.virtual_items([task], task.task_plan_date, window_end)
+    
+    # 游标分页：按 (plan_time, id) 正序
+    if wants_cursor(request.args):
+        try:
+            task_items, meta = cursor_listing(query, [TaskItem.plan_time, TaskItem.id], request.args, extra=upcoming)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'task_items': [item if isinstance(item, dict) else item.to_dict() for item in task_items],
+            **meta,
+            'task': task.to_dict()
+        }), 200
+    
+    if upcoming:
+        # 周期任务：已生成的任务项（只有开始练习过的计划）与虚拟计划按 (plan_time, id) 合并后分页
+        stored = [((item.plan_time, item.id), item.to_dict()) for item in query.all()]
+        merged = [item for _, item in sorted(stored + upcoming, key=lambda pair: sort_key(pair[0]))]
+        page, per_page = max(page, 1), max(per_page, 1)
+        return jsonify({
+            'task_items': merged[(page - 1) * per_page:page * per_page],
+            'total': len(merged),
+            'pages': -(-len(merged) // per_page),
+            'current_page': page,
+            'task': task.to_dict()
+        }), 200
+    
+    task_items = query.paginate(
         page=page, per_page=per_page, error_out=False
     )
     
@@ -1,12 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from .. import db
 from ..models.task import Task
 from ..models.user import User
 from ..models.uploaded_file import UploadedFile
 from ..models.task_item import TaskItem
+from ..pagination import InvalidCursor, cursor_listing, wants_cursor
+from ..services import recurrence, task_stats
 import datetime
 import uuid
+from sqlalchemy import insert
 
 bp_tasks = Blueprint('tasks', __name__)
 
@@ -30,8 +33,16 @@ def get_tasks():
     if task_type:
         query = query.filter_by(task_type=task_type)
     
-    # 按创建时间倒序排列
-    query = query.order_by(Task.create_date.desc())
+    # 按创建时间倒序排列，并预加载 to_dict 用到的关联（用户名、资源名）
+    query = Task.with_related(query.order_by(Task.create_date.desc()))
+    
+    # 游标分页：按 (create_date, id) 倒序直接定位下一页，总数仅在 with_total=1 时计算
+    if wants_cursor(request.args):
+        try:
+            tasks, meta = cursor_listing(query, [Task.create_date, Task.id], request.args, descending=True)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'tasks': [task.to_dict() for task in tasks], **meta}), 200
     
     # 分页
     tasks = query.paginate(
@@ -45,13 +56,13 @@ def get_tasks():
         'current_page': page
     }), 200
 
-@bp_tasks.route('/tasks/<int:task_id>', methods=['GET'])
+@bp_tasks.route('/tasks/<string:task_id>', methods=['GET'])
 @jwt_required()
 def get_task(task_id):
     """获取指定任务详情"""
     current_user_id = get_jwt_identity()
     
-    task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
+    task = Task.with_related(Task.query.filter_by(id=task_id, user_id=current_user_id)).first()
     if not task:
         return jsonify({'error': '任务不存在'}), 404
     
@@ -114,10 +125,16 @@ def create_task():
         )
         
         
-        # 根据cycle_type创建task_item
-        task_num = create_task_items_by_cycle(task, data['cycle_type'], data.get('week_days', ''), task_plan_date, task_finish_date)
-        task.task_num = task_num
-        db.session.add(task)
+        # 每日/每周任务只保存编译后的周期计划，任务项在开始或评分时才生成；
+        # 其他周期（一次性）仍根据cycle_type创建task_item（连同任务本身写入当前事务）
+        task.weekday_mask = recurrence.compile_schedule(data['cycle_type'], data.get('week_days', ''))
+        if task.weekday_mask is not None:
+            task.task_num = recurrence.count_occurrences(task.weekday_mask, task_plan_date, task_finish_date) if task_finish_date else 0
+            db.session.add(task)
+            db.session.flush()
+        else:
+            create_task_items_by_cycle(task, data['cycle_type'])
+        task_stats.apply_delta(current_user_id, added=(task.task_status, task.task_type))
         db.session.commit()
         
         return jsonify(task.to_dict()), 201
@@ -130,92 +147,42 @@ def create_task():
         return jsonify({'error': f'批量删除任务失败: {str(e)}'}), 500
 
 
-def create_task_items_by_cycle(task, cycle_type, week_days, start_date, end_date=None) -> int:
-    """根据周期类型创建任务项"""
-    from datetime import datetime, timedelta
-    
-    task_items_count = 0  # 统计创建的任务项数量
-    
-    if cycle_type == 'daily':
-        # 每日任务：在开始日期和结束日期范围内创建任务项
-        current_date = start_date
-        while end_date is None or current_date <= end_date:
-            task_item = TaskItem(
-                user_id=task.user_id,
-                task_id=task.id,
-                resource_id=task.resource_id,
-                plan_time=current_date,
-                end_time=None,
-                score=None
-            )
-            db.session.add(task_item)
-            task_items_count += 1
-            current_date += timedelta(days=1)
-            
-            # 如果没有结束日期，默认创建30天
-            if end_date is None and current_date > start_date + timedelta(days=29):
-                break
-    
-    elif cycle_type == 'weekly' and week_days:
-        # 每周任务：根据指定的星期几在日期范围内创建任务项
-        try:
-            week_day_list = [int(day.strip()) for day in week_days.split(',') if day.strip().isdigit()]
-        except:
-            week_day_list = []
-        
-        if week_day_list:
-            current_date = start_date
-            week = 0
-            
-            while True:
-                week_has_items = False
-                for week_day in week_day_list:
-                    # 计算该周的指定星期几
-                    days_ahead = week_day - current_date.weekday()
-                    if days_ahead < 0:  # 如果已经过了这个星期几
-                        days_ahead += 7
-                    
-                    item_date = current_date + timedelta(days=days_ahead + week * 7)
-                    
-                    # 检查是否在结束日期范围内
-                    if end_date is None or item_date <= end_date:
-                        task_item = TaskItem(
-                            user_id=task.user_id,
-                            task_id=task.id,
-                            resource_id=task.resource_id,
-                            plan_time=item_date,
-                            end_time=None,
-                            score=None
-                        )
-                        db.session.add(task_item)
-                        task_items_count += 1
-                        week_has_items = True
-                
-                week += 1
-                
-                # 如果没有结束日期，默认创建12周
-                if end_date is None and week >= 12:
-                    break
-                # 如果有结束日期且这周没有创建任何项目，说明已经超出范围
-                elif end_date is not None and not week_has_items:
-                    break
-    
-    elif cycle_type == 'once':
+def plan_times_by_cycle(cycle_type) -> list:
+    """没有编译成周期计划（weekday_mask）的任务的任务项计划时间；每日/每周任务由 recurrence 按需展开"""
+    if cycle_type == 'once':
         # 一次性任务：只创建一个任务项
-        task_item = TaskItem(
-            user_id=task.user_id,
-            task_id=task.id,
-            resource_id=task.resource_id,
-            plan_time=datetime.datetime.now(),
-            begin_time=None,
-            end_time=None,
-            score=None
-        )
-        db.session.add(task_item)
-        task_items_count += 1
-    return task_items_count
+        return [datetime.datetime.now()]
+    return []
 
-@bp_tasks.route('/tasks/<int:task_id>', methods=['PUT'])
+
+def create_task_items_by_cycle(task, cycle_type) -> int:
+    """根据周期类型创建任务项
+
+    任务项以普通字典批量插入（一次 executemany），不为每一项创建 ORM 对象。
+    任务本身也在这里 add 并 flush（task_num 已填好），保证任务行先于任务项写入同一事务。
+    """
+    plan_times = plan_times_by_cycle(cycle_type)
+    task.task_num = len(plan_times)
+    db.session.add(task)
+    db.session.flush()
+    
+    now = datetime.datetime.now()
+    rows = [
+        {
+            'user_id': task.user_id,
+            'task_id': task.id,
+            'resource_id': task.resource_id,
+            'plan_time': plan_time,
+            'create_date': now,
+            'update_date': now,
+        }
+        for plan_time in plan_times
+    ]
+    if rows:
+        db.session.execute(insert(TaskItem), rows)
+    return len(rows)
+
+@bp_tasks.route('/tasks/<string:task_id>', methods=['PUT'])
 @jwt_required()
 def update_task(task_id):
     """更新任务"""
@@ -226,6 +193,7 @@ def update_task(task_id):
     if not task:
         return jsonify({'error': '任务不存在'}), 404
     
+    old_bucket = (task.task_status, task.task_type)
     try:
         # 更新字段
         if 'task_type' in data:
@@ -260,9 +228,17 @@ def update_task(task_id):
             else:
                 task.task_finish_date = None
         
+        # 周期任务的任务项总数随计划/完成日期变化（无结束日期时不计数）
+        if task.weekday_mask is not None:
+            task.task_num = recurrence.count_occurrences(task.weekday_mask, task.task_plan_date, task.task_finish_date) if task.task_finish_date else 0
+        
         # 更新时间自动更新
         task.update_date = datetime.datetime.now()
         
+        db.session.flush()
+        new_bucket = (task.task_status, task.task_type)
+        if new_bucket != old_bucket:
+            task_stats.apply_delta(current_user_id, removed=old_bucket, added=new_bucket)
         db.session.commit()
         
         return jsonify(task.to_dict()), 200
@@ -273,7 +249,66 @@ def update_task(task_id):
         db.session.rollback()
         return jsonify({'error': f'更新任务失败: {str(e)}'}), 500
 
-@bp_tasks.route('/tasks/<int:task_id>', methods=['DELETE'])
+@bp_tasks.route('/tasks/<string:task_id>/occurrences', methods=['GET'])
+@jwt_required()
+def get_task_occurrences(task_id):
+    """按日期范围展开周期任务的计划（from/to 为 YYYY-MM-DD，默认今天起 7 天）"""
+    current_user_id = get_jwt_identity()
+    
+    task = Task.with_related(Task.query.filter_by(id=task_id, user_id=current_user_id)).first()
+    if not task:
+        return jsonify({'error': '任务不存在或无权限'}), 404
+    if task.weekday_mask is None:
+        return jsonify({'error': '该任务没有周期计划，请直接查询任务项'}), 400
+    
+    try:
+        today = datetime.date.today()
+        date_from = datetime.date.fromisoformat(request.args['from']) if request.args.get('from') else today
+        date_to = datetime.date.fromisoformat(request.args['to']) if request.args.get('to') else today + datetime.timedelta(days=6)
+    except ValueError as e:
+        return jsonify({'error': f'日期格式错误: {str(e)}'}), 400
+    if date_to < date_from or (date_to - date_from).days >= current_app.config['RECURRENCE_MAX_WINDOW_DAYS']:
+        return jsonify({'error': f'日期范围无效，最多 {current_app.config["RECURRENCE_MAX_WINDOW_DAYS"]} 天'}), 400
+    
+    window_start = datetime.datetime.combine(date_from, datetime.time.min)
+    window_end = datetime.datetime.combine(date_to, datetime.time.max)
+    stored = {item.plan_time: item for item in TaskItem.with_related(TaskItem.query.filter(
+        TaskItem.task_id == task.id,
+        TaskItem.user_id == current_user_id,
+        TaskItem.plan_time.between(window_start, window_end)
+    )).all()}
+    occurrences = []
+    for when in recurrence.expand(task, window_start, window_end):
+        item = stored.get(when)
+        occurrences.append(item.to_dict() if item else recurrence.virtual_item(task, when))
+    
+    return jsonify({'occurrences': occurrences, 'task': task.to_dict()}), 200
+
+@bp_tasks.route('/tasks/<string:task_id>/occurrences/<string:occurrence_date>', methods=['POST'])
+@jwt_required()
+def materialize_task_occurrence(task_id, occurrence_date):
+    """开始某一天的周期任务：为该次计划生成任务项（已存在则直接返回）"""
+    current_user_id = get_jwt_identity()
+    
+    task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
+    if not task:
+        return jsonify({'error': '任务不存在或无权限'}), 404
+    try:
+        day = datetime.date.fromisoformat(occurrence_date)
+    except ValueError as e:
+        return jsonify({'error': f'日期格式错误: {str(e)}'}), 400
+    if not recurrence.is_occurrence(task, day):
+        return jsonify({'error': '该日期没有这个任务的计划'}), 400
+    
+    try:
+        task_item, created = recurrence.materialize(task, day)
+        db.session.commit()
+        return jsonify(task_item.to_dict()), 201 if created else 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'创建任务项失败: {str(e)}'}), 500
+
+@bp_tasks.route('/tasks/<string:task_id>', methods=['DELETE'])
 @jwt_required()
 def delete_task(task_id):
     """删除任务"""
@@ -285,6 +320,8 @@ def delete_task(task_id):
     
     try:
         db.session.delete(task)
+        db.session.flush()
+        task_stats.apply_delta(current_user_id, removed=(task.task_status, task.task_type))
         db.session.commit()
         
         return jsonify({'message': '任务删除成功'}), 200
@@ -318,6 +355,9 @@ def batch_delete_tasks():
         for task in tasks:
             db.session.delete(task)
         
+        db.session.flush()
+        for task in tasks:
+            task_stats.apply_delta(current_user_id, removed=(task.task_status, task.task_type))
         db.session.commit()
         
         return jsonify({
@@ -336,27 +376,8 @@ def get_task_stats():
     current_user_id = get_jwt_identity()
     
     try:
-        # 统计各状态的任务数量
-        stats = {
-            'total': Task.query.filter_by(user_id=current_user_id).count(),
-            'pending': Task.query.filter_by(user_id=current_user_id, task_status='pending').count(),
-            'in_progress': Task.query.filter_by(user_id=current_user_id, task_status='in_progress').count(),
-            'completed': Task.query.filter_by(user_id=current_user_id, task_status='completed').count(),
-            'cancelled': Task.query.filter_by(user_id=current_user_id, task_status='cancelled').count()
-        }
-        
-        # 统计各类型的任务数量
-        type_stats = {}
-        task_types = ['practice', 'review', 'test', 'homework', 'exam']
-        for task_type in task_types:
-            type_stats[task_type] = Task.query.filter_by(
-                user_id=current_user_id, 
-                task_type=task_type
-            ).count()
-        
-        stats['by_type'] = type_stats
-        
-        return jsonify(stats), 200
+        # 计数器表单行查询；计数器缺失时用一条 GROUP BY 重建
+        return jsonify(task_stats.get_stats(current_user_id)), 200
         
     except Exception as e:
         return jsonify({'error': f'获取统计信息失败: {str(e)}'}), 500
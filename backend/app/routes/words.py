@@ -1,14 +1,50 @@
 from flask import Blueprint, request, jsonify
 from ..models import Word
 from .. import db
+from ..pagination import InvalidCursor, cursor_listing, get_limit
+from ..services import word_search
 
 bp_words = Blueprint('words', __name__)
 
+MAX_SEARCH_OFFSET = 1000
+
 @bp_words.route('/', methods=['GET'])
 def get_words():
-    # Add pagination and filtering later
-    words = Word.query.all()
-    return jsonify([word.to_dict() for word in words]), 200
+    # 按 id 游标分页（?cursor=&limit=），总数仅在 with_total=1 时计算
+    try:
+        words, meta = cursor_listing(Word.query, [Word.id], request.args, default_limit=50)
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'words': [word.to_dict() for word in words], **meta}), 200
+
+@bp_words.route('/search', methods=['GET'])
+def search_words():
+    """全文搜索单词、释义和例句；prefix=1 时最后一个词按前缀匹配（输入联想），column=text 只搜单词本身"""
+    limit = get_limit(request.args)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    if offset > MAX_SEARCH_OFFSET:
+        return jsonify({'message': f'offset 不能超过 {MAX_SEARCH_OFFSET}'}), 400
+    try:
+        words, total = word_search.search(
+            request.args.get('q', ''),
+            limit=limit + 1,
+            offset=offset,
+            prefix=bool(request.args.get('prefix', type=int)),
+            column=request.args.get('column') or None,
+            with_total=bool(request.args.get('with_total', type=int))
+        )
+    except word_search.InvalidQuery as e:
+        return jsonify({'message': str(e)}), 400
+    
+    has_more = len(words) > limit
+    response = {
+        'words': [word.to_dict() for word in words[:limit]],
+        'next_offset': offset + limit if has_more else None,
+        'has_more': has_more
+    }
+    if total is not None:
+        response['total'] = total
+    return jsonify(response), 200
 
 @bp_words.route('/<int:word_id>', methods=['GET'])
 def get_word(word_id):
@@ -0,0 +1,169 @@
+# Micro-batching front end for the shared ASR model.
+# Concurrent requests are queued, collected for a short window (or until the batch
+# cap is reached) and recognized with a single batched model call (one per kind: whole
+# recordings go through the pipeline's VAD, pre-cut speech spans do not).
+# transcribe/transcribe_many are the recognition facade used by the routes: with
+# ASR_BACKEND=remote they go to the standalone ASR server instead (app/services/asr_server.py),
+# which runs this same batcher next to the only copy of the model.
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import current_app
+
+from . import asr_client, asr_model
+
+
+class MicroBatcher:
+
+    def __init__(self, config, window_ms: int = 20, max_batch_size: int = 16, max_pending: int = 0):
+        self.config = config
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_pending = max_pending
+        self._queue = queue.Queue(maxsize=max_pending)  # 0: unbounded
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._batch_sizes = Counter()
+        self._wait_seconds = 0.0
+        self._inference_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio_input, vad: bool = True) -> Future:
+        """Queue one file path (or waveform) for recognition; the future resolves to its text.
+
+        vad=False marks a single speech span that must not be segmented again.
+
+        :raises asr_client.ASRBusy: when max_pending requests are already waiting
+        """
+        future = Future()
+        try:
+            self._queue.put_nowait((audio_input, vad, future, time.perf_counter()))
+        except queue.Full:
+            raise asr_client.ASRBusy(f"{self.max_pending} ASR requests already queued") from None
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            for vad in (True, False):
+                group = [item for item in batch if item[1] is vad]
+                if group:
+                    self._recognize(group, vad)
+
+    def _recognize(self, batch: list, vad: bool) -> None:
+        started = time.perf_counter()
+        inputs = [item[0] for item in batch]
+        try:
+            # inside the try: any failure must reach the callers' futures, not end this thread
+            from funasr.utils.postprocess_utils import rich_transcription_postprocess
+
+            res = asr_model.recognize(inputs, vad=vad, config=self.config)
+            texts = [rich_transcription_postprocess(r["text"]) for r in res]
+            if len(texts) != len(batch):
+                raise RuntimeError(f"ASR returned {len(texts)} results for a batch of {len(batch)}")
+        except Exception as e:
+            with self._stats_lock:
+                self._failed_batches += 1
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes[len(batch)] += 1
+            self._wait_seconds += sum(started - queued_at for _, _, _, queued_at in batch)
+            self._inference_seconds += finished - started
+        for (_, _, future, _), text in zip(batch, texts):
+            future.set_result(text)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "requests": self._requests,
+                "batches": self._batches,
+                "failed_batches": self._failed_batches,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": round(self._wait_seconds / self._requests * 1000, 2) if self._requests else 0,
+                "avg_inference_ms": round(self._inference_seconds / self._batches * 1000, 2) if self._batches else 0,
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(config=None) -> MicroBatcher:
+    """Return the process-wide batcher, starting its worker thread on first use."""
+    global _batcher
+    if _batcher is None:
+        config = config if config is not None else current_app.config
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    config,
+                    window_ms=config.get("ASR_BATCH_WINDOW_MS", 20),
+                    max_batch_size=config.get("ASR_BATCH_MAX_SIZE", 16),
+                    max_pending=config.get("ASR_SERVER_MAX_PENDING", 64),
+                )
+    return _batcher
+
+
+def _remote(config) -> bool:
+    return config.get("ASR_BACKEND") == "remote"
+
+
+def transcribe(audio_input, timeout: float = None) -> str:
+    """Recognize one input through the batching queue and wait for its text."""
+    return transcribe_many([audio_input], timeout)[0]
+
+
+def transcribe_many(inputs: list, timeout: float = None, vad: bool = True) -> list:
+    """Recognize several inputs at once (they share batches); texts are returned in order.
+
+    Pass vad=False for speech spans already cut at VAD boundaries (segmentation).
+
+    :raises asr_client.ASRBackendError: when recognition is too slow or too many requests are
+        queued (locally or in the server), or with ASR_BACKEND=remote when the server is unreachable
+    """
+    if not inputs:
+        return []
+    if _remote(current_app.config):
+        return asr_client.get_client().transcribe(inputs, timeout, vad=vad)
+    batcher = get_batcher()
+    if timeout is None:
+        timeout = batcher.config.get("ASR_REQUEST_TIMEOUT")
+    futures = [batcher.submit(audio_input, vad) for audio_input in inputs]
+    try:
+        return [future.result(timeout=timeout) for future in futures]
+    except FutureTimeout:
+        raise asr_client.ASRTimeout(f"no recognition result within {timeout}s") from None
+
+
+def get_stats() -> dict:
+    if _remote(current_app.config):
+        return {"backend": "remote", **asr_client.get_client().stats()}
+    return _batcher.stats() if _batcher is not None else {"queue_depth": 0, "requests": 0, "batches": 0}
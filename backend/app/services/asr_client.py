@@ -0,0 +1,149 @@
+# Thin client for the standalone ASR server (app/services/asr_server.py).
+# Used by the recognition facade (asr_batcher.transcribe / transcribe_many) when
+# ASR_BACKEND=remote, so web workers never load a model themselves. Connections are
+# authenticated multiprocessing.connection sockets, kept in a small per-process pool.
+# Backpressure is applied on both sides: a web process has at most ASR_CLIENT_MAX_INFLIGHT
+# requests outstanding (waiting up to ASR_CLIENT_QUEUE_TIMEOUT for a slot), and a server
+# worker answers "busy" instead of queueing beyond ASR_SERVER_MAX_PENDING.
+import queue
+import threading
+from multiprocessing.connection import AuthenticationError, Client
+
+from flask import current_app
+
+
+class ASRBackendError(Exception):
+    """Base class for failures talking to the ASR server."""
+
+
+class ASRUnavailable(ASRBackendError):
+    """The server socket cannot be reached or the connection dropped."""
+
+
+class ASRBusy(ASRBackendError):
+    """Too many requests are in flight, locally or on the server."""
+
+
+class ASRTimeout(ASRBackendError):
+    """No reply within the request timeout."""
+
+
+class ASRServerError(ASRBackendError):
+    """The server failed to process the request."""
+
+
+def authkey_of(config) -> bytes:
+    return (config.get("ASR_SERVER_AUTHKEY") or config.get("SECRET_KEY") or "").encode()
+
+
+class ASRClient:
+
+    def __init__(self, address: str, authkey: bytes, timeout: float = 120, max_inflight: int = 8,
+                 queue_timeout: float = 5):
+        self.address, self.authkey = address, authkey
+        self.timeout, self.queue_timeout = timeout, queue_timeout
+        self.max_inflight = max_inflight
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._idle = queue.LifoQueue()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "busy": 0, "timeouts": 0, "unavailable": 0, "errors": 0}
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _connect(self):
+        try:
+            return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        except (OSError, EOFError, AuthenticationError) as e:
+            self._count("unavailable")
+            raise ASRUnavailable(f"cannot connect to ASR server at {self.address}: {e}") from e
+
+    def _exchange(self, conn, request, timeout: float):
+        conn.send(request)
+        if not conn.poll(timeout):
+            raise ASRTimeout(f"no reply from ASR server within {timeout}s")
+        return conn.recv()
+
+    def call(self, op: str, payload=None, timeout: float = None):
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count("busy")
+            raise ASRBusy(f"{self.max_inflight} ASR requests already in flight")
+        try:
+            self._count("requests")
+            try:
+                conn, pooled = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, pooled = self._connect(), False
+            try:
+                status, result = self._exchange(conn, (op, payload), timeout)
+            except (OSError, EOFError) as e:
+                conn.close()
+                if not pooled:
+                    self._count("unavailable")
+                    raise ASRUnavailable(f"ASR server connection lost: {e}") from e
+                # an idle connection may have been closed by a server restart: retry once on a fresh one
+                conn = self._connect()
+                try:
+                    status, result = self._exchange(conn, (op, payload), timeout)
+                except (OSError, EOFError) as e2:
+                    conn.close()
+                    self._count("unavailable")
+                    raise ASRUnavailable(f"ASR server connection lost: {e2}") from e2
+            except ASRTimeout:
+                conn.close()  # the late reply would be read by the next request on this connection
+                self._count("timeouts")
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+        if status == "busy":
+            self._count("busy")
+            raise ASRBusy(result)
+        if status != "ok":
+            self._count("errors")
+            raise ASRServerError(result)
+        return result
+
+    def transcribe(self, inputs: list, timeout: float = None, vad: bool = True) -> list:
+        """Texts for a list of file paths or 16 kHz float32 waveforms, in order.
+
+        vad=False: the inputs are single speech spans, recognized without another VAD pass.
+        """
+        return self.call("transcribe" if vad else "transcribe_spans", list(inputs), timeout)
+
+    def detect_speech(self, waveform, timeout: float = None) -> list:
+        return [tuple(span) for span in self.call("vad", waveform, timeout)]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(address=self.address, max_inflight=self.max_inflight, idle_connections=self._idle.qsize())
+        try:
+            stats["server"] = self.call("stats", timeout=5)
+        except ASRBackendError as e:
+            stats["server"] = {"error": str(e)}
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(config=None) -> ASRClient:
+    """Return the process-wide client for ASR_SERVER_SOCKET."""
+    global _client
+    if _client is None:
+        config = config if config is not None else current_app.config
+        with _client_lock:
+            if _client is None:
+                _client = ASRClient(
+                    config["ASR_SERVER_SOCKET"],
+                    authkey_of(config),
+                    timeout=config.get("ASR_REQUEST_TIMEOUT", 120),
+                    max_inflight=config.get("ASR_CLIENT_MAX_INFLIGHT", 8),
+                    queue_timeout=config.get("ASR_CLIENT_QUEUE_TIMEOUT", 5),
+                )
+    return _client
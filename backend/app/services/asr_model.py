@@ -0,0 +1,155 @@
+# Process-wide registry for the SenseVoice ASR model.
+# The model is built once per process (lazily, or eagerly at startup via preload)
+# and shared by every route and service instead of each module creating its own copy.
+import threading
+import time
+
+from flask import current_app
+
+# Keyword arguments shared by every model.generate call for recognition
+GENERATE_KWARGS = {
+    "language": "auto",  # "zn", "en", "yue", "ja", "ko", "nospeech"
+    "use_itn": True,
+    "batch_size_s": 60,
+    "merge_vad": True,
+    "merge_length_s": 15,
+}
+
+# Recognition of spans that were already cut at VAD boundaries: the pipeline's VAD pass is
+# skipped, so language/ITN options are all that is left
+SPAN_KWARGS = {
+    "language": GENERATE_KWARGS["language"],
+    "use_itn": GENERATE_KWARGS["use_itn"],
+}
+
+_lock = threading.Lock()
+_model = None
+_streaming_model = None
+_stats = {
+    "model_dir": None,
+    "device": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "loaded_at": None,
+}
+
+
+def resolve_device(requested: str) -> str:
+    """Map the configured device to one that exists on this node ("auto" picks cuda when available)."""
+    requested = (requested or "auto").strip().lower()
+    if requested == "cpu":
+        return "cpu"
+    try:
+        import torch
+        cuda_available = torch.cuda.is_available()
+    except ImportError:
+        cuda_available = False
+    if requested == "auto":
+        return "cuda:0" if cuda_available else "cpu"
+    if requested.startswith("cuda") and not cuda_available:
+        print(f"[asr_model] {requested} requested but CUDA is not available, falling back to cpu")
+        return "cpu"
+    return requested
+
+
+def _load(config) -> None:
+    global _model
+    from funasr import AutoModel
+
+    device = resolve_device(config.get("ASR_DEVICE"))
+    model_dir = config.get("ASR_MODEL_DIR")
+    started = time.perf_counter()
+    _model = AutoModel(
+        model=model_dir,
+        disable_update=True,
+        vad_model=config.get("ASR_VAD_MODEL"),
+        vad_kwargs={"max_single_segment_time": 30000},
+        device=device,
+    )
+    _stats.update(
+        model_dir=model_dir,
+        device=device,
+        load_seconds=round(time.perf_counter() - started, 3),
+        loaded_at=time.time(),
+    )
+    print(f"[asr_model] Loaded {model_dir} on {device} in {_stats['load_seconds']}s")
+
+
+def _warmup() -> None:
+    # One second of silence is enough to trigger kernel selection and allocator growth
+    import numpy as np
+
+    started = time.perf_counter()
+    _model.generate(input=np.zeros(16000, dtype=np.float32), cache={}, **GENERATE_KWARGS)
+    _stats["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    print(f"[asr_model] Warmup inference took {_stats['warmup_seconds']}s")
+
+
+def get_model(config=None):
+    """Return the shared AutoModel, loading it on first use."""
+    if _model is None:
+        config = config if config is not None else current_app.config
+        with _lock:
+            if _model is None:
+                _load(config)
+    return _model
+
+
+def vad_spans(waveform, config=None) -> list:
+    """Raw VAD speech spans [(start_ms, end_ms)] of a 16 kHz waveform.
+
+    Runs the VAD model the recognition pipeline was built with (ASR_VAD_MODEL), so no second
+    VAD instance is loaded.
+    """
+    model = get_model(config)
+    res = model.inference(waveform, model=model.vad_model, kwargs=model.vad_kwargs)
+    return [(int(start), int(end)) for start, end in res[0]["value"]]
+
+
+def recognize(inputs: list, vad: bool = True, config=None) -> list:
+    """Raw model results for a batch of file paths or waveforms.
+
+    With vad=False the inputs are already single speech spans: they go straight to the
+    recognizer instead of through the pipeline's VAD again.
+    """
+    model = get_model(config)
+    if vad or model.vad_model is None:
+        return model.generate(input=inputs, cache={}, **GENERATE_KWARGS)
+    return model.inference(inputs, cache={}, batch_size=len(inputs), **SPAN_KWARGS)
+
+
+def get_streaming_model(config=None):
+    """Return the chunk-by-chunk model used for partial transcripts (ASR_STREAMING_MODEL)."""
+    global _streaming_model
+    if _streaming_model is None:
+        config = config if config is not None else current_app.config
+        with _lock:
+            if _streaming_model is None:
+                from funasr import AutoModel
+
+                _streaming_model = AutoModel(
+                    model=config.get("ASR_STREAMING_MODEL"),
+                    disable_update=True,
+                    device=resolve_device(config.get("ASR_DEVICE")),
+                )
+    return _streaming_model
+
+
+def preload(app) -> None:
+    """Load the model and run a warmup inference; called once from create_app."""
+    with _lock:
+        if _model is None:
+            _load(app.config)
+        if _stats["warmup_seconds"] is None and app.config.get("ASR_WARMUP", True):
+            _warmup()
+
+
+def model_version(config=None) -> str:
+    """Identifier stored next to cached/derived results so they can be invalidated on model change."""
+    config = config if config is not None else current_app.config
+    return config.get("ASR_MODEL_VERSION") or config.get("ASR_MODEL_DIR")
+
+
+def get_stats() -> dict:
+    """Load/warmup timings and placement of the shared model."""
+    return dict(_stats, loaded=_model is not None)
@@ -0,0 +1,174 @@
+# Standalone ASR server: the only processes that hold the recognition model (and its VAD).
+# `flask asr serve` binds one Unix socket and starts a small pool of worker processes
+# (spawned, so no model or thread state is inherited) that all accept on it. Each worker
+# loads the models once, serves every connection from its own thread and feeds recognition
+# requests into its MicroBatcher, so concurrent requests from all web workers are batched.
+# Requests and replies are pickled tuples on authenticated multiprocessing connections:
+#   ("transcribe", [path or waveform, ...]) -> ("ok", [text, ...])
+#   ("transcribe_spans", [waveform, ...])   -> ("ok", [text, ...])  speech spans, no second VAD pass
+#   ("vad", waveform)                       -> ("ok", [(start_ms, end_ms), ...])
+#   ("stats", None)                         -> ("ok", {...})
+# A worker with ASR_SERVER_MAX_PENDING requests already queued replies ("busy", message).
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Connection, answer_challenge, deliver_challenge
+
+from . import asr_batcher, asr_model
+from .asr_client import authkey_of
+
+
+def worker_config(config) -> dict:
+    """The picklable subset of the app config a worker needs."""
+    return {k: v for k, v in config.items() if k.startswith("ASR_") or k == "SECRET_KEY"}
+
+
+class Worker:
+
+    def __init__(self, config: dict, index: int):
+        self.config, self.index = config, index
+        self.authkey = authkey_of(config)
+        self.batcher = asr_batcher.MicroBatcher(
+            config,
+            window_ms=config.get("ASR_BATCH_WINDOW_MS", 20),
+            max_batch_size=config.get("ASR_BATCH_MAX_SIZE", 16),
+        )
+        self.max_pending = config.get("ASR_SERVER_MAX_PENDING", 64)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._vad_lock = threading.Lock()
+        self._connections = 0
+        self._busy = 0
+
+    def _reserve(self, n: int) -> bool:
+        with self._lock:
+            if self._pending + n > self.max_pending:
+                self._busy += 1
+                return False
+            self._pending += n
+            return True
+
+    def _release(self, n: int) -> None:
+        with self._lock:
+            self._pending -= n
+
+    def handle(self, op, payload):
+        if op in ("transcribe", "transcribe_spans"):
+            if not self._reserve(len(payload)):
+                return "busy", f"ASR worker {self.index} has {self.max_pending} requests pending"
+            try:
+                futures = [self.batcher.submit(item, vad=op == "transcribe") for item in payload]
+                return "ok", [f.result() for f in futures]
+            finally:
+                self._release(len(payload))
+        if op == "vad":
+            with self._vad_lock:
+                return "ok", asr_model.vad_spans(payload, self.config)
+        if op == "stats":
+            with self._lock:
+                pending, connections, busy = self._pending, self._connections, self._busy
+            return "ok", {"worker": self.index, "pid": os.getpid(), "pending": pending,
+                          "connections": connections, "busy_replies": busy,
+                          "model": asr_model.get_stats(), "batching": self.batcher.stats()}
+        return "error", f"unknown op {op!r}"
+
+    def serve_connection(self, sock) -> None:
+        conn = Connection(sock.detach())
+        try:
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+        except (AuthenticationError, OSError, EOFError):
+            conn.close()
+            return
+        with self._lock:
+            self._connections += 1
+        try:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handle(op, payload)
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                conn.send(reply)
+        except (OSError, EOFError):
+            pass
+        finally:
+            with self._lock:
+                self._connections -= 1
+            conn.close()
+
+    def run(self, listen_sock) -> None:
+        while True:
+            sock, _ = listen_sock.accept()
+            sock.setblocking(True)
+            threading.Thread(target=self.serve_connection, args=(sock,), daemon=True,
+                             name=f"asr-conn-{self.index}").start()
+
+
+def _worker_main(listen_sock, config: dict, index: int) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor decides when workers stop
+    started = time.perf_counter()
+    asr_model.get_model(config)  # with its VAD model, which also serves "vad" requests
+    print(f"[asr_server] worker {index} (pid {os.getpid()}) ready in {time.perf_counter() - started:.1f}s")
+    Worker(config, index).run(listen_sock)
+
+
+def bind(path: str) -> socket.socket:
+    """Listen on a Unix socket at path, replacing a stale socket file left by a crashed server."""
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+        else:
+            raise OSError(f"an ASR server is already listening on {path}")
+        finally:
+            probe.close()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o600)  # only the account running the app may connect
+    sock.listen(128)
+    return sock
+
+
+def serve(config, path: str, workers: int = 1, log=print) -> None:
+    """Run the worker pool until SIGINT/SIGTERM; workers that die are restarted."""
+    ctx = multiprocessing.get_context("spawn")
+    sock = bind(path)
+    cfg = worker_config(config)
+    stopping = threading.Event()
+
+    def start(index):
+        process = ctx.Process(target=_worker_main, args=(sock, cfg, index), name=f"asr-worker-{index}", daemon=True)
+        process.start()
+        return process
+
+    def stop(*_):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    processes = [start(i) for i in range(workers)]
+    log(f"ASR server listening on {path} with {workers} worker(s)")
+    try:
+        while not stopping.wait(1.0):
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    log(f"worker {i} exited with code {process.exitcode}, restarting")
+                    processes[i] = start(i)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(10)
+        sock.close()
+        if os.path.exists(path):
+            os.remove(path)
+        log("ASR server stopped")
@@ -0,0 +1,115 @@
+# In-process audio decoding for recognition.
+# Uploads are decoded straight to the 16 kHz mono float32 waveform the ASR model consumes,
+# so the hot path no longer encodes a temporary MP3 only to have the model decode it again.
+import struct
+import subprocess
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioDecodeError(Exception):
+    """Raised when an upload cannot be decoded to PCM."""
+
+
+def _parse_wav(data: bytes):
+    """Return (samples[frames, channels] as float32, sample_rate) for a RIFF/WAVE byte string."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise AudioDecodeError("not a RIFF/WAVE file")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", data, body)
+            if fmt[0] == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                # the real format tag is the first two bytes of the sub-format GUID
+                fmt = (struct.unpack_from("<H", data, body + 24)[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioDecodeError("data chunk before fmt chunk")
+            # browsers streaming a recording may leave the size as 0 or 0xFFFFFFFF
+            end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(len(data), body + chunk_size)
+            return _pcm_to_float(data[body:end], fmt), fmt[2]
+        pos = body + chunk_size + (chunk_size & 1)
+    raise AudioDecodeError("no data chunk found")
+
+
+def _pcm_to_float(raw: bytes, fmt) -> np.ndarray:
+    format_tag, channels, _, _, _, bits = fmt
+    width = bits // 8
+    raw = raw[:len(raw) - len(raw) % (width * channels)]
+    if format_tag == _WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(raw, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 24:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    elif format_tag == _WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise AudioDecodeError(f"unsupported WAV encoding (format {format_tag}, {bits} bit)")
+    return samples.reshape(-1, channels)
+
+
+def resample(samples: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Resample a mono waveform, preferring torchaudio's band-limited resampler."""
+    if orig_sr == target_sr or samples.size == 0:
+        return samples
+    try:
+        import torch
+        import torchaudio.functional as F
+        return F.resample(torch.from_numpy(samples), orig_sr, target_sr).numpy()
+    except ImportError:
+        duration = samples.shape[0] / orig_sr
+        target_len = int(round(duration * target_sr))
+        src_t = np.arange(samples.shape[0]) / orig_sr
+        dst_t = np.arange(target_len) / target_sr
+        return np.interp(dst_t, src_t, samples).astype(np.float32)
+
+
+def _decode_with_ffmpeg(path: str) -> np.ndarray:
+    # Compressed formats: decode to raw float PCM on a pipe, no intermediate file or re-encode
+    try:
+        proc = subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-i", path,
+             "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+            capture_output=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise AudioDecodeError(f"ffmpeg could not decode {path}: {e}") from e
+    return np.frombuffer(proc.stdout, dtype="<f4").copy()
+
+
+def decode_wav_bytes(data: bytes) -> np.ndarray:
+    """Decode an in-memory WAV file to a 16 kHz mono float32 waveform."""
+    samples, sample_rate = _parse_wav(data)
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    return np.ascontiguousarray(resample(mono.astype(np.float32), sample_rate), dtype=np.float32)
+
+
+def load_audio(path: str) -> np.ndarray:
+    """Decode any upload to a 16 kHz mono float32 waveform ready for model.generate."""
+    if path.lower().endswith(".pcm"):
+        # headerless 16-bit little-endian mono at 16 kHz, as sent by some recorder SDKs
+        with open(path, "rb") as f:
+            raw = f.read()
+        return np.frombuffer(raw[:len(raw) - len(raw) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return decode_wav_bytes(head + f.read())
+    return _decode_with_ffmpeg(path)
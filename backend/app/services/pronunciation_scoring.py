@@ -0,0 +1,178 @@
+# Pronunciation scoring by aligning recognized text against the reference text.
+# Edit distances for a whole batch are computed with NumPy: the DP runs one reference
+# position at a time, vectorized over every item in the batch and every hypothesis position,
+# so thousands of recordings are scored without per-cell Python loops.
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+# Weights of the combined score (0-100)
+WORD_WEIGHT = 0.5
+CHAR_WEIGHT = 0.3
+COMPLETENESS_WEIGHT = 0.2
+
+# Upper bound on DP cells (items * (m+1) * (n+1)) held in memory per chunk
+MAX_CELLS_PER_CHUNK = 20_000_000
+
+_CJK = r"㐀-䶿一-鿿豈-﫿"
+_TOKEN = re.compile(rf"[{_CJK}]|[^\W_]+(?:'[^\W_]+)*")
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens; CJK characters count as one token each, punctuation and tags are dropped."""
+    text = unicodedata.normalize("NFKC", text or "").lower().replace("’", "'")
+    return _TOKEN.findall(text)
+
+
+def _chars(tokens: list) -> list:
+    return [c for token in tokens for c in token if c != "'"]
+
+
+def _encode(seqs_a: list, seqs_b: list):
+    """Map tokens to ints with a shared vocabulary and pad to rectangular arrays.
+
+    Padding values differ between the two sides so padded cells never count as matches.
+    """
+    vocab = {}
+    lens_a = np.array([len(s) for s in seqs_a], dtype=np.int64)
+    lens_b = np.array([len(s) for s in seqs_b], dtype=np.int64)
+    a = np.full((len(seqs_a), max(1, lens_a.max(initial=0))), -1, dtype=np.int64)
+    b = np.full((len(seqs_b), max(1, lens_b.max(initial=0))), -2, dtype=np.int64)
+    for i, seq in enumerate(seqs_a):
+        a[i, :len(seq)] = [vocab.setdefault(t, len(vocab)) for t in seq]
+    for i, seq in enumerate(seqs_b):
+        b[i, :len(seq)] = [vocab.setdefault(t, len(vocab)) for t in seq]
+    return a, lens_a, b, lens_b
+
+
+def _dp(refs: list, hyps: list, keep_matrix: bool):
+    """Levenshtein DP over a batch.
+
+    Returns the full matrices, shape (batch, max_ref + 1, max_hyp + 1), when keep_matrix is set
+    (needed for backtracking); otherwise only keeps a rolling row and returns the distances.
+    """
+    r, lr, h, lh = _encode(refs, hyps)
+    batch, m = r.shape
+    n = h.shape[1]
+    cols = np.arange(n + 1, dtype=np.int32)
+    rows = np.arange(batch)
+    prev = np.broadcast_to(cols, (batch, n + 1)).copy()
+    if keep_matrix:
+        d = np.empty((batch, m + 1, n + 1), dtype=np.int32)
+        d[:, 0, :] = prev
+    else:
+        distances = lh.copy()  # empty references: distance is the hypothesis length
+    for i in range(1, m + 1):
+        tmp = np.empty((batch, n + 1), dtype=np.int32)
+        tmp[:, 0] = i
+        # substitution/match and deletion only look at the previous row ...
+        np.minimum(prev[:, :-1] + (r[:, i - 1, None] != h), prev[:, 1:] + 1, out=tmp[:, 1:])
+        # ... insertions chain along the row: d[j] = min_k<=j(tmp[k] + j - k), a running minimum
+        prev = np.minimum.accumulate(tmp - cols, axis=1) + cols
+        if keep_matrix:
+            d[:, i, :] = prev
+        else:
+            done = lr == i
+            distances[done] = prev[rows[done], lh[done]]
+    return d if keep_matrix else distances
+
+
+def _chunks(refs: list, hyps: list):
+    """Group indices (sorted by size) so each chunk's DP tensor stays under MAX_CELLS_PER_CHUNK."""
+    order = sorted(range(len(refs)), key=lambda k: (len(refs[k]), len(hyps[k])))
+    chunk, max_m, max_n = [], 0, 0
+    for k in order:
+        m, n = max(max_m, len(refs[k])), max(max_n, len(hyps[k]))
+        if chunk and (len(chunk) + 1) * (m + 1) * (n + 1) > MAX_CELLS_PER_CHUNK:
+            yield chunk
+            chunk, m, n = [], len(refs[k]), len(hyps[k])
+        chunk.append(k)
+        max_m, max_n = m, n
+    if chunk:
+        yield chunk
+
+
+def edit_distances(refs: list, hyps: list) -> np.ndarray:
+    """Levenshtein distance for each (reference, hypothesis) token sequence pair."""
+    out = np.zeros(len(refs), dtype=np.int64)
+    for idx in _chunks(refs, hyps):
+        out[idx] = _dp([refs[k] for k in idx], [hyps[k] for k in idx], keep_matrix=False)
+    return out
+
+
+def _backtrace(d: list, ref: list, hyp: list) -> list:
+    """Walk one DP matrix back from the end and list the word-level differences in reading order."""
+    ops = []
+    i, j = len(ref), len(hyp)
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and ref[i - 1] == hyp[j - 1] and d[i][j] == d[i - 1][j - 1]:
+            i, j = i - 1, j - 1
+        elif i > 0 and j > 0 and d[i][j] == d[i - 1][j - 1] + 1:
+            ops.append({"type": "substitution", "position": i - 1, "reference": ref[i - 1], "recognized": hyp[j - 1]})
+            i, j = i - 1, j - 1
+        elif i > 0 and d[i][j] == d[i - 1][j] + 1:
+            ops.append({"type": "deletion", "position": i - 1, "reference": ref[i - 1], "recognized": None})
+            i -= 1
+        else:
+            ops.append({"type": "insertion", "position": i, "reference": None, "recognized": hyp[j - 1]})
+            j -= 1
+    ops.reverse()
+    return ops
+
+
+def _accuracy(distance: int, ref_len: int, hyp_len: int) -> float:
+    if ref_len == 0:
+        return 100.0 if hyp_len == 0 else 0.0
+    return max(0.0, 1.0 - distance / ref_len) * 100
+
+
+def score_batch(references: list, recognized: list) -> list:
+    """Score many recordings in one call.
+
+    :param references: reference texts (e.g. UploadedFile.text_content)
+    :param recognized: texts recognized from the recordings, same order
+    :return: one dict per pair with score, accuracy, char_accuracy, completeness and differences
+    """
+    if len(references) != len(recognized):
+        raise ValueError("references and recognized must have the same length")
+    ref_words = [tokenize(t) for t in references]
+    hyp_words = [tokenize(t) for t in recognized]
+    ref_chars = [_chars(t) for t in ref_words]
+    hyp_chars = [_chars(t) for t in hyp_words]
+
+    char_dist = edit_distances(ref_chars, hyp_chars)
+
+    results = [None] * len(references)
+    for idx in _chunks(ref_words, hyp_words):
+        d = _dp([ref_words[k] for k in idx], [hyp_words[k] for k in idx], keep_matrix=True)
+        for row, k in enumerate(idx):
+            ref, hyp = ref_words[k], hyp_words[k]
+            matrix = d[row, :len(ref) + 1, :len(hyp) + 1].tolist()
+            differences = _backtrace(matrix, ref, hyp)
+            errors = sum(1 for op in differences if op["type"] != "insertion")
+            accuracy = _accuracy(matrix[-1][-1], len(ref), len(hyp))
+            char_accuracy = _accuracy(int(char_dist[k]), len(ref_chars[k]), len(hyp_chars[k]))
+            completeness = (len(ref) - errors) / len(ref) * 100 if ref else 100.0
+            score = WORD_WEIGHT * accuracy + CHAR_WEIGHT * char_accuracy + COMPLETENESS_WEIGHT * completeness
+            results[k] = {
+                "score": round(score, 1),
+                "accuracy": round(accuracy, 1),
+                "char_accuracy": round(char_accuracy, 1),
+                "completeness": round(completeness, 1),
+                "differences": differences,
+            }
+    return results
+
+
+def score(reference: str, recognized: str) -> dict:
+    return score_batch([reference], [recognized])[0]
+
+
+def feedback_text(result: dict) -> str:
+    """Serialized form stored in Recording.feedback."""
+    return json.dumps(
+        {k: result[k] for k in ("accuracy", "char_accuracy", "completeness", "differences")},
+        ensure_ascii=False,
+    )
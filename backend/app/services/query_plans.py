@@ -0,0 +1,69 @@
+# EXPLAIN QUERY PLAN checks for the hot list/queue queries (SQLite).
+# Each statement mirrors the filter and order of a route query (keyset pages with the
+# explicit NULLS FIRST/LAST of app/pagination.py); a plain `SCAN <table>` in its plan
+# means the query would read the whole table instead of an index range.
+import datetime
+import re
+
+from sqlalchemy import select
+
+from .. import db
+from ..models import Recording, Task, TaskItem, UploadedFile
+from ..pagination import seek_condition
+
+
+def hot_queries(user_id: str = 'u') -> dict:
+    now = datetime.datetime.now()
+    uncompleted = select(TaskItem).where(
+        TaskItem.user_id == user_id,
+        TaskItem.end_time.is_(None),
+        TaskItem.score.is_(None),
+        TaskItem.plan_time < now,
+    )
+    return {
+        'task_items uncompleted (first page)': uncompleted
+            .order_by(TaskItem.plan_time.desc().nulls_last(), TaskItem.id.desc().nulls_last()).limit(51),
+        'task_items uncompleted (cursor page)': uncompleted
+            .where(seek_condition([TaskItem.plan_time, TaskItem.id], [now, 1], descending=True))
+            .order_by(TaskItem.plan_time.desc().nulls_last(), TaskItem.id.desc().nulls_last()).limit(51),
+        'task_items by task': select(TaskItem)
+            .where(TaskItem.task_id == 't', TaskItem.user_id == user_id)
+            .order_by(TaskItem.plan_time.asc()).limit(10),
+        'task_items by user': select(TaskItem)
+            .where(TaskItem.user_id == user_id)
+            .order_by(TaskItem.create_date.desc()).limit(10),
+        'tasks by user': select(Task)
+            .where(Task.user_id == user_id)
+            .order_by(Task.create_date.desc()).limit(10),
+        'tasks by user and status': select(Task)
+            .where(Task.user_id == user_id, Task.task_status == 'pending')
+            .order_by(Task.create_date.desc()).limit(10),
+        'recordings by user': select(Recording)
+            .where(Recording.user_id == user_id)
+            .order_by(Recording.created_at.desc()),
+        'resources by user (cursor page)': select(UploadedFile.id, UploadedFile.filename)
+            .where(UploadedFile.user_id == user_id, UploadedFile.id < 1000)
+            .order_by(UploadedFile.id.desc().nulls_last()).limit(51),
+    }
+
+
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def explain(statement) -> list:
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    compiled = statement.compile(dialect=db.engine.dialect)
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), tuple(
+        compiled.params[name] for name in compiled.positiontup
+    ))
+    return [row[-1] for row in rows]
+
+
+def check_hot_queries() -> list:
+    """[(name, plan lines, full-scan tables)] for every hot query."""
+    results = []
+    for name, statement in hot_queries().items():
+        plan = explain(statement)
+        scans = [m.group(1) for m in map(_FULL_SCAN.match, plan) if m]
+        results.append((name, plan, scans))
+    return results
@@ -0,0 +1,163 @@
+# Recognition pipeline for submitted recordings, plus a bounded local worker pool
+# so /records/submitRecords can hand slow clips off and return a job ID right away.
+# Job state lives in the recording_jobs table, so a poll can reach any web worker and jobs
+# survive a restart: a job that stays queued or running past RECORDING_JOB_STALE_SECONDS is
+# taken over by the worker that answers the next poll.
+import datetime
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import delete, update
+
+from .. import db
+from ..models import Recording, RecordingJob
+from . import asr_batcher, asr_model
+from .audio_loader import load_audio
+from .speech_evaluation_service import SpeechEvaluationService
+
+
+class JobQueueFull(Exception):
+    """Raised when the worker pool already holds RECORDING_JOB_QUEUE_SIZE jobs."""
+
+
+def process_recording(user_id, word_id, file_path: str, reference_text: str, recognized_text: str = None) -> Recording:
+    """Decode, recognize, score and store one saved upload; must run inside an app context.
+
+    Callers that already recognized the audio (streaming sessions) pass recognized_text.
+    """
+    if recognized_text is None:
+        recognized_text = asr_batcher.transcribe(load_audio(file_path))
+    score, feedback = SpeechEvaluationService().score_text(reference_text, recognized_text)
+
+    recording = Recording(
+        user_id=user_id,
+        word_id=word_id,
+        audio_file_path=file_path, # Store the path to the audio file
+        score=score,
+        feedback=feedback,
+        recognized_text=recognized_text,
+        model_version=asr_model.model_version()
+    )
+    db.session.add(recording)
+    db.session.commit()
+    return recording
+
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+# a job is handed to another worker when it made no progress for RECORDING_JOB_STALE_SECONDS
+MAX_ATTEMPTS = 3
+
+
+def _get_executor(config):
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = config.get("RECORDING_JOB_WORKERS", 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recording-job")
+            # running + waiting jobs are capped so a burst cannot grow memory without bound
+            _slots = threading.BoundedSemaphore(workers + config.get("RECORDING_JOB_QUEUE_SIZE", 32))
+    return _executor
+
+
+def _prune(ttl: float) -> None:
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=ttl)
+    db.session.execute(delete(RecordingJob).where(RecordingJob.finished_at < cutoff))
+
+
+def _claim(job) -> bool:
+    """Move a job to running; attempts doubles as a version so only one worker wins."""
+    result = db.session.execute(
+        update(RecordingJob)
+        .where(RecordingJob.id == job.id, RecordingJob.status == job.status, RecordingJob.attempts == job.attempts)
+        .values(status="running", started_at=datetime.datetime.now(), attempts=RecordingJob.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _finish(job_id: str, **values) -> None:
+    db.session.execute(
+        update(RecordingJob).where(RecordingJob.id == job_id)
+        .values(finished_at=datetime.datetime.now(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _run_job(app, job_id: str, claimed: bool = False) -> None:
+    try:
+        with app.app_context():
+            job = db.session.get(RecordingJob, job_id)
+            if job is None or (not claimed and (job.status != "queued" or not _claim(job))):
+                return  # pruned, or picked up by another worker meanwhile
+            try:
+                recording = process_recording(job.user_id, job.word_id, job.file_path, job.reference_text)
+                _finish(job_id, status="done", recording_id=recording.id, text=recording.recognized_text)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Recording job {job_id} failed: {e}")
+                _finish(job_id, status="failed", error=str(e))
+    finally:
+        _slots.release()
+
+
+def submit_job(owner_id, user_id, word_id, file_path: str, reference_text: str) -> str:
+    """Store a saved upload as a queued job, hand it to this process's pool and return its ID."""
+    app = current_app._get_current_object()
+    executor = _get_executor(app.config)
+    if not _slots.acquire(blocking=False):
+        raise JobQueueFull()
+
+    job_id = uuid.uuid4().hex
+    try:
+        _prune(app.config.get("RECORDING_JOB_TTL", 3600))
+        db.session.add(RecordingJob(id=job_id, owner_id=owner_id, user_id=user_id, word_id=word_id,
+                                    file_path=file_path, reference_text=reference_text or "",
+                                    status="queued", attempts=0))
+        db.session.commit()
+        executor.submit(_run_job, app, job_id)
+    except Exception:
+        db.session.rollback()
+        _slots.release()
+        raise
+    return job_id
+
+
+def _is_stale(job, stale_seconds: float) -> bool:
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=stale_seconds)
+    if job.status == "queued":
+        return job.created_at < cutoff
+    return job.status == "running" and job.started_at is not None and job.started_at < cutoff
+
+
+def _recover(job) -> None:
+    """Take over a job whose worker died (restart, crash) or never picked it up."""
+    if job.attempts >= MAX_ATTEMPTS:
+        _finish(job.id, status="failed", error=f"abandoned after {job.attempts} attempts")
+        return
+    app = current_app._get_current_object()
+    executor = _get_executor(app.config)
+    if not _slots.acquire(blocking=False):
+        return  # this process is busy; a later poll retries
+    if not _claim(job):
+        _slots.release()
+        return
+    app.logger.warning(f"Recording job {job.id} was stale, resuming it in this worker")
+    executor.submit(_run_job, app, job.id, True)
+
+
+def get_job(job_id: str):
+    """Job state as a dict, from any web worker; stale jobs are resumed here."""
+    job = db.session.get(RecordingJob, job_id)
+    if job is None:
+        return None
+    if _is_stale(job, current_app.config.get("RECORDING_JOB_STALE_SECONDS", 600)):
+        _recover(job)
+        db.session.refresh(job)
+    return job.to_dict()
@@ -0,0 +1,158 @@
+# Virtual recurrence for daily/weekly tasks.
+# A recurring task stores its schedule compiled to a 7-bit weekday mask (Task.weekday_mask);
+# occurrences are task_plan_date's time of day on every matching day from task_plan_date up
+# to task_finish_date (or forever). They are expanded on demand for a date window and only
+# written as TaskItem rows once started or scored (materialize), so an open-ended task costs
+# one row no matter how long it runs.
+import datetime
+import zlib
+
+from sqlalchemy import select
+
+from .. import db
+from ..models import Task, TaskItem
+
+ALL_DAYS = 0b1111111
+ACTIVE_STATUSES = ('pending', 'in_progress')
+
+
+def compile_schedule(cycle_type: str, week_days: str):
+    """Weekday mask for a cycle, or None when the task keeps materialized items ('once', no valid days)."""
+    if cycle_type == 'daily':
+        return ALL_DAYS
+    if cycle_type == 'weekly' and week_days:
+        mask = 0
+        for day in week_days.split(','):
+            day = day.strip()
+            if day.isdigit() and int(day) < 7:
+                mask |= 1 << int(day)
+        return mask or None
+    return None
+
+
+def _occurs_on(mask: int, day: datetime.date) -> bool:
+    return bool(mask >> day.weekday() & 1)
+
+
+def occurrence_time(task, day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, task.task_plan_date.time(), tzinfo=task.task_plan_date.tzinfo)
+
+
+def _last_day(start: datetime.datetime, end: datetime.datetime) -> datetime.date:
+    # the occurrence on end's date only counts if it is not later than end itself
+    return end.date() if end.time() >= start.time() else end.date() - datetime.timedelta(days=1)
+
+
+def count_occurrences(mask: int, start: datetime.datetime, end: datetime.datetime) -> int:
+    """Number of occurrences between start and end (inclusive) without expanding them."""
+    days = (_last_day(start, end) - start.date()).days + 1
+    if days <= 0:
+        return 0
+    weeks, rest = divmod(days, 7)
+    first = start.weekday()
+    return weeks * bin(mask).count('1') + sum(mask >> ((first + i) % 7) & 1 for i in range(rest))
+
+
+def expand(task, window_start: datetime.datetime, window_end: datetime.datetime) -> list:
+    """Occurrence times of a recurring task within [window_start, window_end]."""
+    start, end = task.task_plan_date, task.task_finish_date
+    lower = max(start, window_start)
+    upper = min(end, window_end) if end is not None else window_end
+    if lower > upper:
+        return []
+    day, last = lower.date(), _last_day(start, upper)
+    times = []
+    while day <= last:
+        if _occurs_on(task.weekday_mask, day):
+            when = occurrence_time(task, day)
+            if when >= lower:
+                times.append(when)
+        day += datetime.timedelta(days=1)
+    return times
+
+
+def is_occurrence(task, day: datetime.date) -> bool:
+    when = occurrence_time(task, day)
+    return (task.weekday_mask is not None and _occurs_on(task.weekday_mask, day)
+            and when >= task.task_plan_date
+            and (task.task_finish_date is None or when <= task.task_finish_date))
+
+
+def _materialized_times(task_ids, window_start, window_end) -> set:
+    if not task_ids:
+        return set()
+    rows = db.session.execute(
+        select(TaskItem.task_id, TaskItem.plan_time).where(
+            TaskItem.task_id.in_(task_ids),
+            TaskItem.plan_time >= window_start,
+            TaskItem.plan_time <= window_end,
+        )
+    )
+    return {(str(task_id), plan_time) for task_id, plan_time in rows}
+
+
+def virtual_item(task, when: datetime.datetime) -> dict:
+    """An occurrence that has no TaskItem row yet, shaped like TaskItem.to_dict()."""
+    return {
+        'id': None,
+        'user_id': task.user_id,
+        'task_id': task.id,
+        'resource_id': task.resource_id,
+        'plan_time': when,
+        'begin_time': None,
+        'end_time': None,
+        'score': None,
+        'create_date': None,
+        'update_date': None,
+        'user_username': task.user.username if task.user else None,
+        'resource_filename': task.resource.filename if task.resource else None,
+        'occurrence_date': when.date().isoformat(),
+        'virtual': True,
+    }
+
+
+def _tiebreak(task_id) -> int:
+    # stable stand-in for TaskItem.id in (plan_time, id) cursors; negative so it never equals a row id
+    return -(zlib.crc32(str(task_id).encode()) + 1)
+
+
+def virtual_items(tasks, window_start, window_end) -> list:
+    """Not-yet-materialized occurrences of the given tasks within the window.
+
+    :return: ((plan_time, id) sort key, item) pairs, ready to merge into a keyset listing
+    """
+    tasks = [t for t in tasks if t.weekday_mask is not None]
+    stored = _materialized_times([t.id for t in tasks], window_start, window_end)
+    items = []
+    for task in tasks:
+        for when in expand(task, window_start, window_end):
+            if (task.id, when) not in stored:
+                items.append(((when, _tiebreak(task.id)), virtual_item(task, when)))
+    return items
+
+
+def due_items(user_id, until: datetime.datetime, lookback_days: int) -> list:
+    """Virtual occurrences of a user's active recurring tasks due in the last lookback_days up to until."""
+    window_start = datetime.datetime.combine(until.date() - datetime.timedelta(days=lookback_days), datetime.time.min)
+    tasks = Task.with_related(Task.query.filter(
+        Task.user_id == user_id,
+        Task.weekday_mask.isnot(None),
+        Task.task_status.in_(ACTIVE_STATUSES),
+        Task.task_plan_date <= until,
+    )).all()
+    return virtual_items(tasks, window_start, until)
+
+
+def materialize(task, day: datetime.date):
+    """Return the TaskItem for one occurrence, creating it if needed.
+
+    :return: (task_item, created); the caller commits
+    """
+    when = occurrence_time(task, day)
+    item = TaskItem.query.filter_by(task_id=task.id, user_id=task.user_id, plan_time=when).first()
+    if item:
+        return item, False
+    item = TaskItem(user_id=task.user_id, task_id=task.id, resource_id=task.resource_id, plan_time=when)
+    db.session.add(item)
+    db.session.flush()
+    return item, True
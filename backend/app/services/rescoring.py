@@ -0,0 +1,212 @@
+# Batch re-scoring of historical recordings after a scoring or ASR model change.
+# Rows are streamed in id order; decoding and recognition run in a process pool (one model
+# per worker), scoring runs vectorized in the parent and results are written back with one
+# bulk UPDATE per chunk. A checkpoint file records the last committed id and the ids that
+# failed, so an interrupted run resumes where it stopped and still retries those rows.
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sqlalchemy import or_, select, update
+
+from .. import db
+from ..models import Recording, UploadedFile
+from . import asr_model, pronunciation_scoring
+
+_worker_config = None
+
+
+def _init_worker(config: dict) -> None:
+    global _worker_config
+    _worker_config = config
+    asr_model.get_model(config)
+
+
+def recognize_files(paths: list) -> list:
+    """Decode and recognize a sub-batch of files in a pool worker; None marks a failed file.
+
+    Errors never escape: if the batched call fails, the files are recognized one by one so
+    only the offending ones are marked.
+    """
+    from funasr.utils.postprocess_utils import rich_transcription_postprocess
+    from .audio_loader import load_audio
+
+    texts = [None] * len(paths)
+    waves, positions = [], []
+    for i, path in enumerate(paths):
+        try:
+            waves.append(load_audio(path))
+            positions.append(i)
+        except Exception as e:
+            print(f"[rescoring] cannot decode {path}: {e}")
+    if not waves:
+        return texts
+    model = asr_model.get_model(_worker_config)
+    try:
+        raw = [r["text"] for r in model.generate(input=waves, cache={}, **asr_model.GENERATE_KWARGS)]
+    except Exception as e:
+        print(f"[rescoring] batch of {len(waves)} failed ({e}), recognizing them one by one")
+        raw = []
+        for i, wave in zip(positions, waves):
+            try:
+                raw.append(model.generate(input=wave, cache={}, **asr_model.GENERATE_KWARGS)[0]["text"])
+            except Exception as e:
+                print(f"[rescoring] cannot recognize {paths[i]}: {e}")
+                raw.append(None)
+    for i, text in zip(positions, raw):
+        if text is not None:
+            texts[i] = rich_transcription_postprocess(text)
+    return texts
+
+
+def read_checkpoint(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_checkpoint(path: str, state: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)  # never leave a half-written checkpoint behind
+
+
+def iter_chunks(after_id: int, chunk_size: int, only_version: str = None, ids: list = None):
+    """Yield lists of (id, audio_file_path, recognized_text, reference_text) rows in id order.
+
+    :param ids: only these recordings (used to retry failed rows)
+    """
+    last_id = after_id
+    while True:
+        query = (
+            select(Recording.id, Recording.audio_file_path, Recording.recognized_text, UploadedFile.text_content)
+            .outerjoin(UploadedFile, UploadedFile.id == Recording.word_id)
+            .where(Recording.id > last_id)
+            .order_by(Recording.id)
+            .limit(chunk_size)
+        )
+        if only_version is not None:
+            query = query.where(or_(Recording.model_version.is_(None), Recording.model_version != only_version))
+        if ids is not None:
+            query = query.where(Recording.id.in_(ids))
+        rows = db.session.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def rescore(config, chunk_size: int = 200, workers: int = 2, checkpoint_path: str = None,
+            resume: bool = True, skip_asr: bool = False, only_stale: bool = False, log=print) -> dict:
+    """Recompute recognized_text, score and feedback for every recording.
+
+    Rows that cannot be decoded or recognized keep their old values (and model_version) and
+    are listed in the checkpoint's failed_ids; they are retried once at the end of the run,
+    and again by the next run that resumes from the checkpoint.
+
+    :param skip_asr: keep the stored recognized_text and only re-run scoring (model_version
+        is left as it is, since the text still comes from that model)
+    :param only_stale: only rows whose model_version differs from the current model
+    """
+    version = asr_model.model_version(config)
+    state = read_checkpoint(checkpoint_path) if resume else {}
+    if state.get("model_version") != version or state.get("skip_asr") != skip_asr:
+        state = {}
+    state = {
+        "model_version": version,
+        "skip_asr": skip_asr,
+        "last_id": state.get("last_id", 0),
+        "processed": state.get("processed", 0),
+        "failed_ids": state.get("failed_ids", []),
+    }
+    if state["last_id"]:
+        log(f"Resuming after recording id {state['last_id']} ({state['processed']} already done, "
+            f"{len(state['failed_ids'])} failed to retry)")
+
+    pool = None
+    worker_config = {k: v for k, v in config.items() if k.startswith("ASR_")}
+
+    def start_pool():
+        # spawn: CUDA/torch state must not be inherited through fork
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(worker_config,),
+        )
+
+    def recognize(rows) -> list:
+        nonlocal pool
+        per_worker = max(1, -(-len(rows) // workers))
+        parts = [rows[i:i + per_worker] for i in range(0, len(rows), per_worker)]
+        futures = [pool.submit(recognize_files, [r[1] for r in part]) for part in parts]
+        texts, broken = [], False
+        for part, future in zip(parts, futures):
+            try:
+                texts += future.result()
+            except Exception as e:
+                # e.g. a worker killed by the OOM killer: only these rows are marked failed
+                log(f"  recognition of ids {part[0][0]}..{part[-1][0]} failed: {type(e).__name__}: {e}")
+                texts += [None] * len(part)
+                broken = broken or isinstance(e, BrokenProcessPool)
+        if broken:
+            pool.shutdown(wait=False)
+            pool = start_pool()
+        return texts
+
+    def process(rows) -> list:
+        """Rescore one chunk and commit it; returns the ids that failed."""
+        texts = [row[2] or "" for row in rows] if skip_asr else recognize(rows)
+        done = [(row, text) for row, text in zip(rows, texts) if text is not None]
+        results = pronunciation_scoring.score_batch([row[3] or "" for row, _ in done], [text for _, text in done])
+        if done:
+            values = []
+            for (row, text), result in zip(done, results):
+                row_values = {"id": row[0], "score": result["score"],
+                              "feedback": pronunciation_scoring.feedback_text(result)}
+                if not skip_asr:
+                    # the text (and so the row) now comes from the current model
+                    row_values.update(recognized_text=text, model_version=version)
+                values.append(row_values)
+            db.session.execute(update(Recording), values)
+        db.session.commit()
+        state["processed"] += len(done)
+        return [row[0] for row, text in zip(rows, texts) if text is None]
+
+    if not skip_asr:
+        pool = start_pool()
+    started = time.perf_counter()
+    try:
+        for rows in iter_chunks(state["last_id"], chunk_size, version if only_stale else None):
+            state["failed_ids"] += process(rows)
+            state["last_id"] = rows[-1][0]
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, state)
+            rate = state["processed"] / max(time.perf_counter() - started, 1e-9)
+            log(f"  up to id {state['last_id']}: {state['processed']} rescored, "
+                f"{len(state['failed_ids'])} failed ({rate:.1f}/s)")
+
+        if state["failed_ids"]:
+            log(f"Retrying {len(state['failed_ids'])} failed recording(s)")
+            retry, state["failed_ids"] = state["failed_ids"], []
+            for rows in iter_chunks(0, chunk_size, ids=retry):
+                state["failed_ids"] += process(rows)
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, state)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    state["failed"] = len(state["failed_ids"])
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)  # finished: the next run starts from the beginning
+    if state["failed_ids"]:
+        # they kept their old model_version, so --only-stale picks them up again
+        log(f"Still failing: {', '.join(map(str, state['failed_ids'][:20]))}"
+            + (" ..." if len(state["failed_ids"]) > 20 else ""))
+    return state
@@ -0,0 +1,139 @@
+# Sentence-level segments of uploaded resources.
+# The upload is cut at the VAD boundaries and every speech span is recognized on its own
+# (through the shared micro-batcher), so one ASR pass yields both the flat text and per-sentence
+# text with start/end offsets. Next to the upload a 16 kHz mono 16-bit PCM WAV is kept
+# (<hash>.16k.wav): a segment is then a fixed byte range of that file and can be streamed for
+# sentence-level follow-reading without decoding or recognizing anything again.
+import os
+import struct
+import uuid
+
+import numpy as np
+from flask import current_app
+
+from .. import db
+from ..models import ResourceSegment, UploadedFile
+from . import asr_batcher, asr_client, asr_model
+from .audio_loader import SAMPLE_RATE
+
+PCM_SUFFIX = ".16k.wav"
+BYTES_PER_MS = SAMPLE_RATE * 2 // 1000  # mono int16
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(data_size: int) -> bytes:
+    """Canonical 44-byte header of a 16 kHz mono 16-bit PCM WAV with data_size bytes of samples."""
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+                       SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16, b"data", data_size)
+
+
+def pcm_variant_path(original_path: str) -> str:
+    return os.path.splitext(original_path)[0] + PCM_SUFFIX
+
+
+def write_pcm_variant(original_path: str, waveform: np.ndarray) -> str:
+    """Store the decoded waveform next to the upload (written to a temp name, then renamed)."""
+    dest = pcm_variant_path(original_path)
+    if os.path.exists(dest):
+        return dest
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(wav_header(len(pcm)))
+            f.write(pcm)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return dest
+
+
+def segment_range(segment, file_size: int) -> tuple:
+    """(offset, length) of a segment's samples inside its PCM variant."""
+    start = min(WAV_HEADER_SIZE + segment.start_ms * BYTES_PER_MS, file_size)
+    end = min(WAV_HEADER_SIZE + segment.end_ms * BYTES_PER_MS, file_size)
+    return start, max(0, end - start)
+
+
+def merge_spans(spans, max_gap_ms: int, max_ms: int) -> list:
+    """Join VAD spans separated by short pauses, as long as the result stays under max_ms."""
+    merged = []
+    for start, end in sorted(spans):
+        if end <= start:
+            continue
+        if merged and start - merged[-1][1] <= max_gap_ms and end - merged[-1][0] <= max_ms:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(span) for span in merged]
+
+
+def detect_speech(waveform: np.ndarray, config=None) -> list:
+    """Speech spans [(start_ms, end_ms)] of a 16 kHz waveform; the whole clip when VAD is disabled."""
+    config = config if config is not None else current_app.config
+    duration_ms = len(waveform) * 1000 // SAMPLE_RATE
+    if duration_ms == 0:
+        return []
+    if not config.get("ASR_VAD_MODEL"):
+        return [(0, duration_ms)]
+    if config.get("ASR_BACKEND") == "remote":
+        spans = asr_client.get_client(config).detect_speech(waveform)
+    else:
+        spans = asr_model.vad_spans(waveform, config)
+    spans = [(start, min(end, duration_ms)) for start, end in spans]
+    return merge_spans(spans, config.get("ASR_SEGMENT_MERGE_GAP_MS", 300),
+                       config.get("ASR_SEGMENT_MAX_SECONDS", 12) * 1000)
+
+
+def _joiner(left: str, right: str) -> str:
+    # no space between CJK text (SenseVoice already emits its punctuation), one space otherwise
+    if not left or not right or ord(left[-1]) >= 0x2E80 or ord(right[0]) >= 0x2E80:
+        return ""
+    return " "
+
+
+def join_text(segments) -> str:
+    text = ""
+    for segment in segments:
+        text += _joiner(text, segment["text"]) + segment["text"]
+    return text
+
+
+def transcribe_segments(waveform: np.ndarray) -> list:
+    """Recognize every speech span of the waveform; returns [{start_ms, end_ms, text}] in order.
+
+    All spans are queued at once, so the micro-batcher (local or in the ASR server) recognizes
+    them in a few batched calls, without running VAD on them a second time.
+    Spans without recognized text (noise, breathing) are dropped.
+    """
+    spans = detect_speech(waveform)
+    texts = asr_batcher.transcribe_many(
+        [waveform[start * SAMPLE_RATE // 1000:end * SAMPLE_RATE // 1000] for start, end in spans], vad=False)
+    segments = []
+    for (start, end), text in zip(spans, texts):
+        text = text.strip()
+        if text:
+            segments.append({"start_ms": start, "end_ms": end, "text": text})
+    return segments
+
+
+def segments_of_blob(file_path: str):
+    """Segments already stored for another upload of the same content-addressed file, or None."""
+    source = (
+        db.session.query(UploadedFile.id)
+        .filter(UploadedFile.file_path == file_path, UploadedFile.segments.any())
+        .order_by(UploadedFile.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    if source is None:
+        return None
+    rows = ResourceSegment.query.filter_by(uploaded_file_id=source).order_by(ResourceSegment.seq)
+    return [{"start_ms": s.start_ms, "end_ms": s.end_ms, "text": s.text} for s in rows]
+
+
+def attach(uploaded_file, segments) -> None:
+    """Add the segments of a new upload to the session (committed together with it)."""
+    for seq, segment in enumerate(segments):
+        uploaded_file.segments.append(ResourceSegment(seq=seq, **segment))
@@ -1,14 +1,6 @@
-# Placeholder for speech evaluation service logic
-# This service would typically interact with a third-party API or a local model
-import subprocess
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
-##/Users/louisw/.cache/modelscope/hub/models/iic/SenseVoiceSmall
-def convert_wav_to_mp3(input_path: str) -> str:
-        output_path = input_path.replace(".wav", ".mp3")
-        subprocess.run(["ffmpeg", "-i", input_path, "-ab", "192k", output_path])
-        return output_path
-        #return os.path.join(current_app.config["UPLOAD_FOLDER"], "7b393faa-33d9-4856-98f6-3c06917c93a5.mp3")
+# Speech evaluation: recognition with the shared ASR model, then text alignment scoring
+from . import asr_batcher, pronunciation_scoring
+from .audio_loader import load_audio
 
 class SpeechEvaluationService:
 
@@ -28,61 +20,30 @@ class SpeechEvaluationService:
                  - feedback (str): Detailed feedback on pronunciation.
                  - recognized_text (str): The text recognized from the audio.
         """
-        # --- Placeholder Logic --- 
-        # In a real application, this would involve:
-        # 1. Sending the audio to a speech-to-text engine.
-        # 2. Sending the audio and reference text (or recognized text) to a pronunciation assessment engine.
-        # 3. Parsing the results to extract score, detailed feedback (e.g., phoneme accuracy), etc.
-
         print(f"[SpeechEvaluationService] Evaluating: {audio_file_path} against '{reference_text}'")
 
-        # Simulate API call or model processing delay
-        # import time
-        # time.sleep(1) 
-
-        # Mocked results
-        mock_score = 88.5
-        mock_feedback = {
-            "overall_accuracy": mock_score,
-            "fluency": "Good",
-            "completeness": "Complete",
-            "phonemes": [
-                {"phoneme": "/ð/", "accuracy": 70, "suggestion": "Try to make the 'th' sound more distinct."},
-                {"phoneme": "/ə/", "accuracy": 90},
-            ],
-            "stress_and_intonation": "Generally good, but could improve on word emphasis."
-        }
-        output_path = convert_wav_to_mp3(audio_file_path)
-        print(output_path)
+        recognized_text = asr_batcher.transcribe(load_audio(audio_file_path))
+        score, feedback = self.score_text(reference_text, recognized_text)
+        return score, feedback, recognized_text
 
-        model_dir = "/home/english_learning_app/backend/model/SenseVoiceSmall"
-        model = AutoModel(
-            model=model_dir,
-            disable_update=True,
-            vad_model="fsmn-vad",
-            vad_kwargs={"max_single_segment_time": 30000},
-            device="cuda:0",
-        )
-        res = model.generate(
-            input=output_path,
-            cache={},
-            language="auto",  # "zn", "en", "yue", "ja", "ko", "nospeech"
-            use_itn=True,
-            batch_size_s=60,
-            merge_vad=True,  #
-            merge_length_s=15,
-        )
-        recognized_text = rich_transcription_postprocess(res[0]["text"])
-        print(recognized_text)
+    def score_text(self, reference_text: str, recognized_text: str) -> tuple:
+        """
+        Scores already recognized text against the reference text.
 
+        :return: A tuple (score, feedback) where feedback is a JSON string with accuracy,
+                 char_accuracy, completeness and the list of differing words.
+        """
+        result = pronunciation_scoring.score(reference_text, recognized_text)
+        return result["score"], pronunciation_scoring.feedback_text(result)
 
-        # Format feedback into a string or structured JSON as needed
-        detailed_feedback_str = f"Overall Score: {mock_score}. Fluency: Good. Completeness: Complete. " \
-                                f"Note: Try to make the 'th' sound more distinct. " \
-                                f"Stress and intonation generally good."
+    def score_batch(self, reference_texts: list, recognized_texts: list) -> list:
+        """
+        Scores many recognized texts in one vectorized pass.
 
-        print(f"[SpeechEvaluationService] Mocked evaluation complete.")
-        return mock_score, detailed_feedback_str, recognized_text
+        :return: A list of (score, feedback) tuples in input order.
+        """
+        results = pronunciation_scoring.score_batch(reference_texts, recognized_texts)
+        return [(r["score"], pronunciation_scoring.feedback_text(r)) for r in results]
 
 
     def transcribe_audio(self, audio_file_path: str) -> str:
@@ -91,11 +52,7 @@ class SpeechEvaluationService:
         :param audio_file_path: Path to the audio file.
         :return: Transcribed text.
         """
-        # Placeholder for actual speech-to-text transcription
-        print(f"[SpeechEvaluationService] Transcribing: {audio_file_path}")
-        mock_transcription = "This is a mock transcription of the audio."
-        print(f"[SpeechEvaluationService] Mock transcription: {mock_transcription}")
-        return mock_transcription
+        return asr_batcher.transcribe(load_audio(audio_file_path))
 
 # Example usage (for testing this service directly):
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+# Content-addressed storage for uploaded audio.
+# Every blob is stored once, named by its sha256, under a two-level sharded tree:
+#   UPLOAD_FOLDER/objects/ab/cd/abcd...<ext>
+# so identical uploads share one file and no single directory grows without bound.
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from collections import namedtuple
+
+from flask import current_app
+
+CHUNK_SIZE = 64 * 1024
+OBJECTS_DIR = "objects"
+
+_HASH_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]+)?$")
+
+StoredBlob = namedtuple("StoredBlob", ["content_hash", "path", "size", "created"])
+
+
+def save_stream(stream, dest_path: str) -> tuple:
+    """Copy an upload stream to dest_path in chunks, hashing it on the way.
+
+    :return: (sha256 hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as out:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_ext(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,8}", ext) else ""
+
+
+def objects_root(upload_folder: str = None) -> str:
+    return os.path.join(upload_folder or current_app.config["UPLOAD_FOLDER"], OBJECTS_DIR)
+
+
+def blob_path(content_hash: str, ext: str = "", upload_folder: str = None) -> str:
+    """Sharded location of a blob: objects/<h[0:2]>/<h[2:4]>/<hash><ext>."""
+    return os.path.join(objects_root(upload_folder), content_hash[:2], content_hash[2:4], content_hash + ext)
+
+
+def is_blob_path(path: str, upload_folder: str = None) -> bool:
+    root = os.path.abspath(objects_root(upload_folder)) + os.sep
+    return os.path.abspath(path).startswith(root) and bool(_HASH_NAME.match(os.path.basename(path)))
+
+
+def _commit(tmp_path: str, content_hash: str, size: int, ext: str, upload_folder: str = None) -> StoredBlob:
+    final_path = blob_path(content_hash, ext, upload_folder)
+    if os.path.exists(final_path):
+        os.remove(tmp_path)  # identical content already stored
+        return StoredBlob(content_hash, final_path, size, False)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+    return StoredBlob(content_hash, final_path, size, True)
+
+
+def _tmp_path(upload_folder: str = None) -> str:
+    # temp files live on the same filesystem as the tree so the final move is an atomic rename
+    tmp_dir = os.path.join(objects_root(upload_folder), "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return os.path.join(tmp_dir, uuid.uuid4().hex)
+
+
+def store_stream(stream, filename: str) -> StoredBlob:
+    """Store an upload stream, deduplicating by content; filename only supplies the extension."""
+    tmp_path = _tmp_path()
+    try:
+        content_hash, size = save_stream(stream, tmp_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return _commit(tmp_path, content_hash, size, normalize_ext(filename))
+
+
+def store_file(src_path: str, upload_folder: str = None, move: bool = True) -> StoredBlob:
+    """Bring an existing file into the store (used by the layout migration)."""
+    tmp_path = _tmp_path(upload_folder)
+    if move:
+        shutil.move(src_path, tmp_path)
+    else:
+        shutil.copyfile(src_path, tmp_path)
+    content_hash = hash_file(tmp_path)
+    return _commit(tmp_path, content_hash, os.path.getsize(tmp_path), normalize_ext(src_path), upload_folder)
+
+
+def content_hash_of(filename: str):
+    """The sha256 a content-addressed file name carries, or None for legacy names."""
+    match = _HASH_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def resolve(filename: str) -> str:
+    """Map a public file name (as used by /mp3/<filename>) to its location on disk.
+
+    Content-addressed names resolve into the sharded tree; anything else is looked up
+    in the legacy flat UPLOAD_FOLDER layout.
+    """
+    match = _HASH_NAME.match(filename)
+    if match:
+        return blob_path(match.group(1), (match.group(2) or "").lower())
+    return os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
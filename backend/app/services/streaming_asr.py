@@ -0,0 +1,285 @@
+# Streaming recognition of a recording while the student speaks.
+# A session receives raw 16-bit PCM chunks over plain HTTP. Every full stride of audio is fed
+# to the streaming model together with a `cache` dict, which carries the encoder and decoder
+# state between calls, so each chunk costs one small inference and returns a partial
+# transcript right away. Without a dedicated streaming model (ASR_STREAMING_MODEL empty, the
+# default) the shared recognizer re-reads the whole buffered clip every
+# ASR_STREAM_PARTIAL_STRIDES strides instead, which costs more per partial but works for every
+# language the main model supports. On finish the whole clip goes through the regular batch recognizer
+# and is stored and scored exactly like /records/submitRecords, so recordings from both paths
+# are comparable.
+# Session state lives on the upload volume every web worker already shares, not in process
+# memory: UPLOAD_FOLDER/streams/<session id>/ holds meta.json (owner, word, partial text,
+# counters) and audio.pcm (every sample received, 16 kHz s16le), and a flock on its lock file
+# serializes the chunks of one session across processes. Any worker can therefore take any
+# chunk or finish any session. Only the streaming model's cache stays in the process that fed
+# the last stride; when a chunk lands on another worker it continues with a fresh cache, so
+# partials are best with sticky routing on the session id but the final text never depends
+# on it. Idle sessions expire after ASR_STREAM_SESSION_TTL seconds.
+# With ASR_BACKEND=remote no session is started: the chunk-by-chunk model state cannot live
+# in the ASR server across requests, and web workers must not load a model of their own.
+import contextlib
+import fcntl
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+from flask import current_app
+
+from . import asr_batcher, asr_model, recording_pipeline, storage, transcoding
+from .audio_loader import SAMPLE_RATE, resample
+from .segmentation import wav_header
+
+# paraformer streaming: chunk_size[1] frames of 60 ms per step, i.e. 600 ms of audio
+CHUNK_SIZE = [0, 10, 5]
+ENCODER_CHUNK_LOOK_BACK = 4
+DECODER_CHUNK_LOOK_BACK = 1
+STRIDE = CHUNK_SIZE[1] * 960
+
+STREAMS_DIR = "streams"
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SessionLimitReached(Exception):
+    """Raised when ASR_STREAM_MAX_SESSIONS sessions are already open."""
+
+
+class SessionTooLong(Exception):
+    """Raised when a session receives more than ASR_STREAM_MAX_SECONDS of audio."""
+
+
+class StreamingUnavailable(Exception):
+    """Raised when sessions are requested from a deployment that runs ASR_BACKEND=remote."""
+
+
+class SessionClosed(Exception):
+    """Raised when a session was finished, cancelled or expired by another request."""
+
+
+def streams_root(config=None) -> str:
+    config = config if config is not None else current_app.config
+    return os.path.join(config["UPLOAD_FOLDER"], STREAMS_DIR)
+
+
+class StreamSession:
+    """Metadata of one session, as stored in its meta.json."""
+
+    FIELDS = ("id", "owner_id", "user_id", "word_id", "reference_text", "sample_rate",
+              "samples", "fed", "partial", "touched_at")
+
+    def __init__(self, id, owner_id, user_id, word_id, reference_text, sample_rate,
+                 samples=0, fed=0, partial="", touched_at=None):
+        self.id = id
+        self.owner_id, self.user_id, self.word_id = owner_id, user_id, word_id
+        self.reference_text = reference_text
+        self.sample_rate = sample_rate
+        self.samples = samples  # samples received, at 16 kHz
+        self.fed = fed  # samples already given to the streaming model (whole strides)
+        self.partial = partial
+        self.touched_at = touched_at if touched_at is not None else time.time()
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(streams_root(), self.id)
+
+    @property
+    def received_ms(self) -> int:
+        return self.samples * 1000 // SAMPLE_RATE
+
+    @classmethod
+    def load(cls, session_id: str):
+        if not _SESSION_ID.match(session_id or ""):
+            return None
+        try:
+            with open(os.path.join(streams_root(), session_id, "meta.json"), encoding="utf-8") as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def save(self) -> None:
+        path = os.path.join(self.directory, "meta.json")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({name: getattr(self, name) for name in self.FIELDS}, f)
+        os.replace(tmp, path)
+
+    def append(self, samples: np.ndarray) -> None:
+        with open(os.path.join(self.directory, "audio.pcm"), "ab") as f:
+            f.write((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+    def read(self, start: int = 0) -> np.ndarray:
+        """Received samples from index start on, as a 16 kHz float32 waveform."""
+        try:
+            with open(os.path.join(self.directory, "audio.pcm"), "rb") as f:
+                f.seek(start * 2)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+# streaming model state per session, only for sessions whose last stride was fed here:
+# {session id: (cache, session.fed after that stride)}
+_caches = {}
+_caches_lock = threading.Lock()
+_model_lock = threading.Lock()  # one streaming inference at a time per process
+
+
+@contextlib.contextmanager
+def _locked(session_id: str):
+    """Hold the session's cross-process lock and yield its current metadata."""
+    directory = os.path.join(streams_root(), session_id)
+    try:
+        fd = os.open(os.path.join(directory, "lock"), os.O_RDWR)
+    except FileNotFoundError:
+        raise SessionClosed() from None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        session = StreamSession.load(session_id)
+        if session is None:
+            raise SessionClosed()
+        yield session
+    finally:
+        os.close(fd)
+
+
+def _remove(session_id: str) -> None:
+    shutil.rmtree(os.path.join(streams_root(), session_id), ignore_errors=True)
+    with _caches_lock:
+        _caches.pop(session_id, None)
+
+
+def _open_sessions(ttl: float) -> int:
+    """Drop sessions idle for more than ttl seconds; return how many remain."""
+    root = streams_root()
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return 0
+    cutoff, remaining = time.time() - ttl, 0
+    for name in names:
+        try:
+            touched = os.path.getmtime(os.path.join(root, name, "meta.json"))
+        except OSError:
+            continue  # being created or removed right now
+        if touched < cutoff:
+            _remove(name)
+        else:
+            remaining += 1
+    with _caches_lock:
+        for session_id in [k for k in _caches if k not in names]:
+            del _caches[session_id]
+    return remaining
+
+
+def start(owner_id, user_id, word_id, reference_text, sample_rate: int = SAMPLE_RATE) -> StreamSession:
+    config = current_app.config
+    if config.get("ASR_BACKEND") == "remote":
+        raise StreamingUnavailable()
+    if _open_sessions(config.get("ASR_STREAM_SESSION_TTL", 120)) >= config.get("ASR_STREAM_MAX_SESSIONS", 32):
+        raise SessionLimitReached()
+    session = StreamSession(uuid.uuid4().hex, owner_id, user_id, word_id, reference_text, sample_rate)
+    os.makedirs(session.directory)
+    open(os.path.join(session.directory, "lock"), "wb").close()
+    session.save()
+    return session
+
+
+def get_session(session_id: str, owner_id):
+    session = StreamSession.load(session_id)
+    return session if session is not None and session.owner_id == owner_id else None
+
+
+def discard(session: StreamSession) -> None:
+    _remove(session.id)
+
+
+def decode_chunk(data: bytes, sample_rate: int) -> np.ndarray:
+    """Raw little-endian int16 mono PCM to a 16 kHz float32 waveform."""
+    samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    return resample(samples, sample_rate)
+
+
+def _feed(session: StreamSession, samples: np.ndarray, is_final: bool) -> str:
+    model_name = current_app.config.get("ASR_STREAMING_MODEL")
+    if not model_name or current_app.config.get("ASR_BACKEND") == "remote" or (samples.size == 0 and not is_final):
+        return ""
+    with _caches_lock:
+        cache, fed = _caches.get(session.id, (None, None))
+    if fed != session.fed:
+        cache = {}  # the previous stride was fed by another worker: continue from a fresh state
+    model = asr_model.get_streaming_model()
+    with _model_lock:
+        res = model.generate(
+            input=samples, cache=cache, is_final=is_final, chunk_size=CHUNK_SIZE,
+            encoder_chunk_look_back=ENCODER_CHUNK_LOOK_BACK, decoder_chunk_look_back=DECODER_CHUNK_LOOK_BACK,
+        )
+    with _caches_lock:
+        _caches[session.id] = (cache, session.fed + samples.size)
+    return res[0]["text"] if res else ""
+
+
+def add_chunk(session: StreamSession, data: bytes) -> StreamSession:
+    """Append a chunk and update the partial transcript.
+
+    With a streaming model every complete stride is fed to it; otherwise the whole clip is
+    recognized again with the shared model each time another ASR_STREAM_PARTIAL_STRIDES
+    strides have arrived.
+
+    :return: the updated session; its partial is the text recognized so far
+    """
+    max_samples = current_app.config.get("ASR_STREAM_MAX_SECONDS", 120) * SAMPLE_RATE
+    with _locked(session.id) as session:
+        samples = decode_chunk(data, session.sample_rate)
+        if session.samples + samples.size > max_samples:
+            raise SessionTooLong()
+        session.append(samples)
+        previous, session.samples = session.samples, session.samples + samples.size
+        if current_app.config.get("ASR_STREAMING_MODEL"):
+            buffered = session.read(session.fed)
+            usable = buffered.size - buffered.size % STRIDE
+            for offset in range(0, usable, STRIDE):
+                session.partial += _feed(session, buffered[offset:offset + STRIDE], is_final=False)
+                session.fed += STRIDE
+        else:
+            step = STRIDE * max(1, current_app.config.get("ASR_STREAM_PARTIAL_STRIDES", 2))
+            if session.samples // step > previous // step:
+                session.partial = asr_batcher.transcribe(session.read())
+        session.touched_at = time.time()
+        session.save()
+        return session
+
+
+def finish(session: StreamSession):
+    """Flush the stream, then store and score the recording like the batch path.
+
+    :return: (Recording, last streaming partial)
+    """
+    with _locked(session.id) as session:
+        session.partial += _feed(session, session.read(session.fed), is_final=True)
+        waveform = session.read()
+        _remove(session.id)
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    file_path = storage.store_stream(io.BytesIO(wav_header(len(pcm)) + pcm), "stream.wav").path
+    transcoding.schedule(current_app._get_current_object(), file_path)
+    recognized_text = asr_batcher.transcribe(waveform) if waveform.size else ""
+    recording = recording_pipeline.process_recording(
+        session.user_id, session.word_id, file_path, session.reference_text, recognized_text=recognized_text)
+    if not current_app.config.get("ASR_STREAMING_MODEL"):
+        session.partial = recognized_text  # the re-recognized partials end with the full text
+    return recording, session.partial
+
+
+def get_stats() -> dict:
+    try:
+        open_sessions = len(os.listdir(streams_root()))
+    except FileNotFoundError:
+        open_sessions = 0
+    with _caches_lock:
+        return {"open_sessions": open_sessions, "model_states_here": len(_caches)}
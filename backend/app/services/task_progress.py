@@ -0,0 +1,65 @@
+# Task progress counters updated in SQL.
+# Scoring a task item is a conditional `UPDATE task_items ... WHERE score IS NULL`; only the
+# request whose UPDATE matched bumps tasks.finished_task_num with `col = col + 1`, so concurrent
+# completions of one task neither lose increments nor count an item twice. The task is marked
+# completed in the same transaction once every item is finished.
+import datetime
+
+from sqlalchemy import func, select, update
+
+from .. import db
+from ..models import Task, TaskItem
+from . import task_stats
+
+ACTIVE_STATUSES = ('pending', 'in_progress')
+
+
+def complete_item(task_item, score) -> bool:
+    """Set the score of an unscored item and count it towards its task.
+
+    The item's in-session state is not refreshed; the caller commits (which expires it).
+    :return: True if this call scored the item, False if it already had a score
+    """
+    now = datetime.datetime.now()
+    result = db.session.execute(
+        update(TaskItem)
+        .where(TaskItem.id == task_item.id, TaskItem.score.is_(None))
+        .values(score=score, update_date=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return False
+    task_id = task_item.task_id
+    db.session.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(finished_task_num=Task.finished_task_num + 1, update_date=now)
+        .execution_options(synchronize_session=False)
+    )
+    _complete_task_if_done(task_id, task_item.user_id, now)
+    return True
+
+
+def _complete_task_if_done(task_id, user_id, now) -> None:
+    # one UPDATE per previous status, so the task_stats counters know which bucket the task left
+    for old_status in ACTIVE_STATUSES:
+        stmt = (
+            update(Task)
+            .where(
+                Task.id == task_id,
+                Task.task_status == old_status,
+                Task.task_num > 0,
+                Task.finished_task_num >= Task.task_num,
+            )
+            .values(task_status='completed', task_finish_date=func.coalesce(Task.task_finish_date, now))
+            .execution_options(synchronize_session=False)
+        )
+        if db.engine.dialect.update_returning:
+            task_type = db.session.execute(stmt.returning(Task.task_type)).scalar()
+        elif db.session.execute(stmt).rowcount:
+            task_type = db.session.execute(select(Task.task_type).where(Task.id == task_id)).scalar()
+        else:
+            task_type = None
+        if task_type is not None:
+            task_stats.apply_delta(user_id, removed=(old_status, task_type), added=('completed', task_type))
+            return
@@ -0,0 +1,104 @@
+# Per-user task counters.
+# The task_stats row of a user is adjusted with atomic `col = col + delta` UPDATEs in the same
+# transaction as every task create/update/delete, so /tasks/stats is a primary-key lookup.
+# A missing row is (re)built from a single GROUP BY over tasks.
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from ..models import Task, TaskStats
+
+STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+TYPES = ('practice', 'review', 'test', 'homework', 'exam')
+COUNTER_COLUMNS = ('total',) + STATUSES + TYPES
+
+
+def aggregate(user_id) -> dict:
+    """Count a user's tasks by status and type with one GROUP BY query."""
+    counts = dict.fromkeys(COUNTER_COLUMNS, 0)
+    rows = db.session.execute(
+        select(Task.task_status, Task.task_type, func.count())
+        .where(Task.user_id == user_id)
+        .group_by(Task.task_status, Task.task_type)
+    )
+    for status, task_type, n in rows:
+        counts['total'] += n
+        if status in STATUSES:
+            counts[status] += n
+        if task_type in TYPES:
+            counts[task_type] += n
+    return counts
+
+
+def _create_row(user_id) -> TaskStats:
+    # savepoint: a concurrent transaction may insert the same user's row first
+    try:
+        with db.session.begin_nested():
+            row = TaskStats(user_id=user_id, **aggregate(user_id))
+            db.session.add(row)
+        return row
+    except IntegrityError:
+        return db.session.get(TaskStats, user_id, populate_existing=True)
+
+
+def apply_delta(user_id, removed=None, added=None) -> None:
+    """Adjust counters for one task leaving and/or entering a (status, type) bucket.
+
+    Call after the task change has been flushed and before commit. If the user has no
+    counter row yet it is built from the tasks table, which already reflects the change.
+    """
+    deltas = {}
+    for bucket, sign in ((removed, -1), (added, 1)):
+        if bucket is None:
+            continue
+        status, task_type = bucket
+        deltas['total'] = deltas.get('total', 0) + sign
+        for key in (status, task_type):
+            if key in STATUSES or key in TYPES:
+                deltas[key] = deltas.get(key, 0) + sign
+    values = {k: getattr(TaskStats, k) + v for k, v in deltas.items() if v}
+    if not values:
+        return
+    result = db.session.execute(
+        update(TaskStats).where(TaskStats.user_id == user_id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        _create_row(user_id)
+
+
+def get_stats(user_id) -> dict:
+    """Counters in the /tasks/stats response shape."""
+    row = db.session.get(TaskStats, user_id)
+    if row is None:
+        row = _create_row(user_id)
+        db.session.commit()
+    stats = {k: getattr(row, k) for k in ('total',) + STATUSES}
+    stats['by_type'] = {k: getattr(row, k) for k in TYPES}
+    return stats
+
+
+def rebuild(user_ids=None, check_only: bool = False) -> list:
+    """Recompute counters from tasks; returns [(user_id, {column: (stored, actual)})] for mismatches."""
+    if user_ids is None:
+        user_ids = db.session.scalars(
+            select(Task.user_id).distinct().union(select(TaskStats.user_id))
+        ).all()
+    mismatches = []
+    for user_id in user_ids:
+        actual = aggregate(user_id)
+        row = db.session.get(TaskStats, user_id)
+        stored = {k: getattr(row, k) for k in COUNTER_COLUMNS} if row else dict.fromkeys(COUNTER_COLUMNS, None)
+        diff = {k: (stored[k], actual[k]) for k in COUNTER_COLUMNS if stored[k] != actual[k]}
+        if diff:
+            mismatches.append((user_id, diff))
+        if check_only:
+            continue
+        if row is None:
+            db.session.add(TaskStats(user_id=user_id, **actual))
+        else:
+            for k, v in actual.items():
+                setattr(row, k, v)
+    if not check_only:
+        db.session.commit()
+    return mismatches
@@ -0,0 +1,125 @@
+# Low-bitrate playback variants of uploaded audio.
+# After an upload is stored, a background worker transcodes it with ffmpeg into a compact
+# speech-tuned Opus file written next to the original (<hash>.<ext> -> <hash>.opus). /mp3
+# serves the variant to clients that ask for Ogg/Opus in their Accept header and falls back
+# to the original otherwise, so a missing or failed variant never breaks playback. A failed
+# transcode leaves a <hash>.opus.failed marker so the file is neither retried on every upload
+# nor served as "variant pending" forever.
+import os
+import shutil
+import subprocess
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+OPUS_EXT = ".opus"
+OPUS_MIMETYPE = "audio/ogg"
+FAILED_SUFFIX = ".failed"
+# media types a client may list in Accept (with or without a codecs parameter) to receive the Opus variant
+OPUS_ACCEPT = ("audio/ogg", "audio/opus")
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def variant_path(original_path: str) -> str:
+    return os.path.splitext(original_path)[0] + OPUS_EXT
+
+
+def failure_marker(original_path: str) -> str:
+    return variant_path(original_path) + FAILED_SUFFIX
+
+
+def _mark_failed(original_path: str, reason: str) -> None:
+    try:
+        with open(failure_marker(original_path), "w", encoding="utf-8") as f:
+            f.write(reason)
+    except OSError:
+        pass
+
+
+def transcode_opus(src_path: str, bitrate: str = "32k") -> str:
+    """Write the Opus variant of src_path (mono, VoIP tuning) and return its path.
+
+    The file is written under a temporary name and renamed into place, so readers never
+    see a partial variant.
+    """
+    dest = variant_path(src_path)
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", src_path, "-vn",
+             "-ac", "1", "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+             "-f", "ogg", tmp],
+            check=True, capture_output=True,
+        )
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return dest
+
+
+def _run(app, path: str) -> None:
+    try:
+        transcode_opus(path, app.config.get("PLAYBACK_OPUS_BITRATE", "32k"))
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        reason = f"{e} {stderr.decode(errors='replace').strip()}"
+        app.logger.warning(f"Opus variant for {path} failed: {reason}")
+        _mark_failed(path, reason)
+    finally:
+        with _lock:
+            _pending.discard(path)
+
+
+def schedule(app, path: str) -> bool:
+    """Queue the playback variant of a stored upload; returns False if nothing was queued.
+
+    Skipped when variants are disabled, ffmpeg is not installed, the variant already exists,
+    is being produced or failed before.
+    """
+    global _executor
+    if not app.config.get("PLAYBACK_VARIANTS_ENABLED") or shutil.which("ffmpeg") is None:
+        return False
+    if (path.lower().endswith(OPUS_EXT) or os.path.exists(variant_path(path))
+            or os.path.exists(failure_marker(path))):
+        return False
+    with _lock:
+        if path in _pending:
+            return False
+        _pending.add(path)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config.get("TRANSCODE_WORKERS", 1),
+                                           thread_name_prefix="transcode")
+    _executor.submit(_run, app, path)
+    return True
+
+
+def accepts_opus(accept_mimetypes) -> bool:
+    """True if the client explicitly lists an Opus container (a bare */* does not count)."""
+    return any(value.split(";")[0].strip().lower() in OPUS_ACCEPT and quality > 0
+               for value, quality in accept_mimetypes)
+
+
+def playable_variant(original_path: str, accept_mimetypes):
+    """Path of the variant to serve for this request, or None to serve the original."""
+    if not accepts_opus(accept_mimetypes):
+        return None
+    path = variant_path(original_path)
+    return path if path != original_path and os.path.isfile(path) else None
+
+
+def variant_expected(original_path: str, accept_mimetypes, config) -> bool:
+    """True if this client would get an Opus variant that does not exist yet (queued or transcoding).
+
+    False once the transcode has failed: that variant will never be written.
+
+    A response served in the meantime must not be cached for long, or the client keeps the
+    original instead of switching to the variant once it is written.
+    """
+    return (accepts_opus(accept_mimetypes) and bool(config.get("PLAYBACK_VARIANTS_ENABLED"))
+            and shutil.which("ffmpeg") is not None and not original_path.lower().endswith(OPUS_EXT)
+            and not os.path.isfile(variant_path(original_path))
+            and not os.path.exists(failure_marker(original_path)))
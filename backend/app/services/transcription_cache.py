@@ -0,0 +1,75 @@
+# Persistent cache from uploaded-audio content hash to recognized text.
+# Identical uploads (e.g. the same course MP3 uploaded again) skip inference entirely.
+import datetime
+import threading
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from ..models import TranscriptionCache
+from . import asr_model
+
+_counter_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _counter_lock:
+        _counters[key] += n
+
+
+def lookup(content_hash: str):
+    """Return the cached text for this audio under the current model, or None on a miss."""
+    entry = db.session.get(TranscriptionCache, content_hash)
+    if entry is None or entry.model_version != asr_model.model_version():
+        _count("misses")
+        return None
+    entry.hits += 1
+    entry.last_used_at = datetime.datetime.now()
+    db.session.commit()
+    _count("hits")
+    return entry.text
+
+
+def store(content_hash: str, text: str, size_bytes: int = 0) -> None:
+    """Insert or refresh an entry, then evict least recently used rows over the size bound."""
+    now = datetime.datetime.now()
+    values = {"model_version": asr_model.model_version(), "text": text, "size_bytes": size_bytes,
+              "last_used_at": now}
+    entry = db.session.get(TranscriptionCache, content_hash)
+    if entry is not None:
+        for key, value in values.items():
+            setattr(entry, key, value)
+        db.session.flush()
+    else:
+        # savepoint: a concurrent request for the same audio may insert the row first
+        try:
+            with db.session.begin_nested():
+                db.session.add(TranscriptionCache(content_hash=content_hash, hits=0, created_at=now, **values))
+        except IntegrityError:
+            db.session.execute(
+                update(TranscriptionCache).where(TranscriptionCache.content_hash == content_hash).values(**values))
+
+    max_entries = current_app.config.get("TRANSCRIPTION_CACHE_MAX_ENTRIES", 5000)
+    overflow = db.session.scalar(select(func.count()).select_from(TranscriptionCache)) - max_entries
+    if overflow > 0:
+        oldest = (
+            select(TranscriptionCache.content_hash)
+            .order_by(TranscriptionCache.last_used_at.asc())
+            .limit(overflow)
+            .scalar_subquery()
+        )
+        result = db.session.execute(delete(TranscriptionCache).where(TranscriptionCache.content_hash.in_(oldest)))
+        _count("evictions", result.rowcount)
+    db.session.commit()
+
+
+def get_stats() -> dict:
+    with _counter_lock:
+        stats = dict(_counters)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0
+    stats["entries"] = db.session.scalar(select(func.count()).select_from(TranscriptionCache))
+    return stats
@@ -0,0 +1,235 @@
+# Local text-to-speech with a sentence-level disk cache.
+# Text is split into sentences; each sentence is synthesized once per engine, normalized to
+# 16 kHz mono 16-bit WAV and stored in TTS_AUDIO_FOLDER under the hash of its normalized
+# text. A request only synthesizes the sentences it has not seen before and concatenates the
+# rest from disk. Files are touched on every hit and the least recently used ones are
+# deleted once the folder grows past TTS_CACHE_MAX_BYTES.
+import hashlib
+import importlib
+import io
+import os
+import re
+import subprocess
+import threading
+import unicodedata
+import uuid
+import wave
+
+import numpy as np
+from flask import current_app
+
+from .audio_loader import SAMPLE_RATE, AudioDecodeError, decode_wav_bytes
+
+SENTENCE_GAP_SECONDS = 0.25
+# evict down to this fraction of the budget so a full cache does not rescan on every write
+EVICT_TO = 0.9
+
+_SENTENCE = re.compile(r"[^.!?。！？;；\n]+[.!?。！？;；]*")
+_SPACES = re.compile(r"\s+")
+
+
+class TTSError(Exception):
+    """Raised when the configured engine cannot synthesize a sentence."""
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in _SENTENCE.findall(text or "") if s.strip() and re.search(r"\w", s)]
+
+
+def normalize(sentence: str) -> str:
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", sentence)).strip()
+
+
+class StubEngine:
+    """Offline placeholder: a quiet tone whose length follows the sentence length."""
+
+    id = "stub-v1"
+
+    def synthesize(self, sentence: str) -> bytes:
+        seconds = min(0.3 + 0.06 * len(sentence), 15.0)
+        t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+        return _wav_bytes((0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+
+
+class EspeakEngine:
+    """eSpeak NG command-line synthesizer (fully offline)."""
+
+    def __init__(self, voice: str = "en-us", binary: str = "espeak-ng"):
+        self.voice, self.binary = voice, binary
+        self.id = f"espeak-{voice}"
+
+    def synthesize(self, sentence: str) -> bytes:
+        try:
+            proc = subprocess.run([self.binary, "-v", self.voice, "--stdout", sentence],
+                                  check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise TTSError(f"{self.binary} failed: {e}") from e
+        return proc.stdout
+
+
+def _load_engine(config):
+    """TTS_ENGINE is 'stub', 'espeak' or 'package.module:factory' (factory(config) -> engine).
+
+    An engine has an `id` (part of the cache key, change it when the voice changes) and
+    `synthesize(sentence) -> WAV bytes`.
+    """
+    name = config.get("TTS_ENGINE") or "stub"
+    if name == "stub":
+        return StubEngine()
+    if name == "espeak":
+        return EspeakEngine(config.get("TTS_VOICE") or "en-us")
+    module_name, _, factory = name.partition(":")
+    return getattr(importlib.import_module(module_name), factory or "create_engine")(config)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(config=None):
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _load_engine(config or current_app.config)
+    return _engine
+
+
+def _wav_bytes(samples: np.ndarray) -> bytes:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm.tobytes())
+    return out.getvalue()
+
+
+class SentenceCache:
+    """Sentence WAVs in a two-level folder, bounded by total size with LRU eviction."""
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder, self.max_bytes = folder, max_bytes
+        self._lock = threading.Lock()
+        self._usage = None  # bytes on disk, scanned lazily once per process
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def usage(self):
+        return self._usage
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], key + ".wav")
+
+    def get(self, key: str):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime is the LRU clock
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._usage is None:
+                self._usage = self._scan_usage()
+            else:
+                self._usage += len(data)
+            if self._usage > self.max_bytes:
+                self._evict()
+
+    def _files(self) -> list:
+        entries = []
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                if name.endswith(".wav"):
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, os.path.join(root, name)))
+        return entries
+
+    def _scan_usage(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict(self) -> None:
+        entries = sorted(self._files())
+        usage = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if usage <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            usage -= size
+            self.stats["evictions"] += 1
+        self._usage = usage
+
+
+_cache = None
+
+
+def get_cache(config=None) -> SentenceCache:
+    global _cache
+    config = config or current_app.config
+    if _cache is None:
+        _cache = SentenceCache(config["TTS_AUDIO_FOLDER"], config.get("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    return _cache
+
+
+def sentence_audio(sentence: str, engine, cache: SentenceCache):
+    """16 kHz mono int16 PCM of one sentence; returns (pcm bytes, served from cache)."""
+    key = hashlib.sha256(f"{engine.id}\n{normalize(sentence)}".encode()).hexdigest()
+    data = cache.get(key)
+    cached = data is not None
+    if not cached:
+        try:
+            data = _wav_bytes(decode_wav_bytes(engine.synthesize(normalize(sentence))))
+        except AudioDecodeError as e:
+            raise TTSError(f"{engine.id} returned unreadable audio: {e}") from e
+        cache.put(key, data)
+    with wave.open(io.BytesIO(data)) as w:
+        return w.readframes(w.getnframes()), cached
+
+
+def synthesize(text: str):
+    """WAV for a whole text, reusing cached sentences.
+
+    :return: (wav bytes, number of sentences, number served from cache)
+    """
+    engine, cache = get_engine(), get_cache()
+    sentences = split_sentences(text)
+    gap = b"\0\0" * int(SAMPLE_RATE * SENTENCE_GAP_SECONDS)
+    parts, hits = [], 0
+    for sentence in sentences:
+        pcm, cached = sentence_audio(sentence, engine, cache)
+        hits += cached
+        parts.append(pcm)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(gap.join(parts))
+    return out.getvalue(), len(sentences), hits
+
+
+def get_stats() -> dict:
+    """Sentence cache counters; the engine is reported once loaded (stats never load it)."""
+    cache = get_cache()
+    engine = _engine.id if _engine is not None else None
+    return {"engine": engine, "max_bytes": cache.max_bytes, "usage_bytes": cache.usage, **cache.stats}
@@ -0,0 +1,127 @@
+# Full-text search over the word bank.
+# On SQLite the words table is indexed by an external-content FTS5 table (words_fts) over
+# text, definition and example_sentence; triggers keep it in sync on every insert, update
+# and delete, so the index never needs a batch job. Other databases fall back to LIKE.
+import re
+
+from sqlalchemy import or_, text
+
+from .. import db
+from ..models import Word
+
+FTS_TABLE = 'words_fts'
+COLUMNS = ('text', 'definition', 'example_sentence')
+# bm25 weights per column: a hit in the headword ranks above one in the definition or example
+RANK_WEIGHTS = (10.0, 2.0, 1.0)
+
+DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, definition, example_sentence,
+        content='words', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS words_fts_ai AFTER INSERT ON words BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text, definition, example_sentence)
+        VALUES (new.id, new.text, new.definition, new.example_sentence);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS words_fts_ad AFTER DELETE ON words BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, definition, example_sentence)
+        VALUES ('delete', old.id, old.text, old.definition, old.example_sentence);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS words_fts_au AFTER UPDATE ON words BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, definition, example_sentence)
+        VALUES ('delete', old.id, old.text, old.definition, old.example_sentence);
+        INSERT INTO {FTS_TABLE}(rowid, text, definition, example_sentence)
+        VALUES (new.id, new.text, new.definition, new.example_sentence);
+    END""",
+]
+DROP = [
+    'DROP TRIGGER IF EXISTS words_fts_au',
+    'DROP TRIGGER IF EXISTS words_fts_ad',
+    'DROP TRIGGER IF EXISTS words_fts_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+class InvalidQuery(ValueError):
+    """Raised when a search string contains no searchable terms."""
+
+
+def uses_fts(connection=None) -> bool:
+    return (connection or db.engine).dialect.name == 'sqlite'
+
+
+def ensure_index(connection) -> bool:
+    """Create the FTS table and triggers if missing; index existing rows when newly created.
+
+    :return: True if the index was created by this call
+    """
+    if not uses_fts(connection):
+        return False
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first()
+    for statement in DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text(REBUILD))
+    return not exists
+
+
+def match_expression(q: str, prefix: bool = False, column: str = None) -> str:
+    """Turn user input into an FTS5 MATCH expression: every term must match.
+
+    Terms are quoted so FTS5 operators in the input are taken literally; with prefix the
+    last term matches any word starting with it (autocomplete).
+    """
+    terms = _TERM.findall(q or '')
+    if not terms:
+        raise InvalidQuery('empty search query')
+    parts = [f'"{t}"' for t in terms]
+    if prefix:
+        parts[-1] += '*'
+    expression = ' '.join(parts)
+    return f'{column} : ({expression})' if column else expression
+
+
+def search(q: str, limit: int, offset: int = 0, prefix: bool = False, column: str = None,
+           with_total: bool = False):
+    """Words matching q, best match first.
+
+    :param column: restrict matching to one of COLUMNS (e.g. 'text' for headword autocomplete)
+    :return: (words, total or None)
+    """
+    if column is not None and column not in COLUMNS:
+        raise InvalidQuery(f'unknown column: {column}')
+    if not uses_fts():
+        return _search_like(q, limit, offset, prefix, column, with_total)
+
+    params = {'match': match_expression(q, prefix, column), 'limit': limit, 'offset': offset}
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    ids = [row[0] for row in db.session.execute(text(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match '
+        f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid LIMIT :limit OFFSET :offset'
+    ), params)]
+    by_id = {word.id: word for word in Word.query.filter(Word.id.in_(ids))} if ids else {}
+    total = None
+    if with_total:
+        total = db.session.execute(text(
+            f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match'
+        ), params).scalar()
+    return [by_id[i] for i in ids if i in by_id], total
+
+
+def _search_like(q, limit, offset, prefix, column, with_total):
+    terms = _TERM.findall(q or '')
+    if not terms:
+        raise InvalidQuery('empty search query')
+    columns = [getattr(Word, column)] if column else [getattr(Word, c) for c in COLUMNS]
+    query = Word.query
+    for i, term in enumerate(terms):
+        pattern = f'{term}%' if prefix and i == len(terms) - 1 and column == 'text' else f'%{term}%'
+        query = query.filter(or_(*(c.ilike(pattern) for c in columns)))
+    total = query.count() if with_total else None
+    return query.order_by(Word.text, Word.id).offset(offset).limit(limit).all(), total
@@ -0,0 +1,72 @@
+"""Per-request decode latency: old WAV->MP3->PCM ffmpeg round trip vs. the in-process loader.
+
+Usage (from backend/):  python -m benchmarks.bench_audio_loader [--seconds 5] [--repeat 20]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.audio_loader import AudioDecodeError, load_audio, _decode_with_ffmpeg  # noqa: E402
+
+
+def write_clip(path: str, seconds: float, sample_rate: int) -> None:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes((signal * 32767).astype("<i2").tobytes())
+
+
+def old_path(wav_path: str) -> np.ndarray:
+    # what create_recording used to do: encode a 192k MP3 next to the upload, then the model decodes it
+    mp3_path = wav_path.replace(".wav", ".mp3")
+    subprocess.run(["ffmpeg", "-y", "-v", "error", "-i", wav_path, "-ab", "192k", mp3_path], check=True)
+    try:
+        return _decode_with_ffmpeg(mp3_path)
+    finally:
+        os.remove(mp3_path)
+
+
+def bench(fn, path: str, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(path)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    arr = np.array(timings)
+    print(f"{name:<28} mean {arr.mean():8.2f} ms   p50 {np.percentile(arr, 50):8.2f} ms   p95 {np.percentile(arr, 95):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0, help="clip length")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for sample_rate in (16000, 48000):
+            path = os.path.join(tmp, f"clip_{sample_rate}.wav")
+            write_clip(path, args.seconds, sample_rate)
+            print(f"--- {args.seconds}s mono WAV @ {sample_rate} Hz")
+            report("in-process load_audio", bench(load_audio, path, args.repeat))
+            try:
+                report("ffmpeg wav->mp3->pcm (old)", bench(old_path, path, args.repeat))
+            except (OSError, subprocess.CalledProcessError, AudioDecodeError) as e:
+                print(f"old path skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
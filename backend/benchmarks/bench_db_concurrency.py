@@ -0,0 +1,155 @@
+"""Concurrent writes on SQLite: default rollback journal vs. the tuned engine (WAL + pragmas).
+
+Usage (from backend/):  python -m benchmarks.bench_db_concurrency [--writers 8] [--readers 4] [--seconds 10]
+
+Each mode runs in its own process against a fresh database built by create_app. Writer
+threads mix the two hot write paths (a recording insert, a task item completion through
+task_progress.complete_item), each committed on its own; reader threads keep running the
+aggregate queries of the history pages. Reported per mode: committed writes per second,
+commit latency percentiles, "database is locked" failures and completed reads.
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = {
+    "rollback journal (before)": {"DB_ENGINE_TUNING": "0"},
+    "WAL + pragmas (tuned)": {"DB_ENGINE_TUNING": "1"},
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_mode(args):
+    """Child process: load the database, hammer it, print one JSON line of results."""
+    from sqlalchemy import func, insert
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db
+    from app.models import Recording, Task, TaskItem, User, Word
+    from app.services import task_progress, task_stats
+
+    app = create_app()
+    with app.app_context():
+        journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        db.session.add(User(id="bench", username="bench", email="bench@example.com", password_hash="x"))
+        db.session.add(Word(id=1, text="bench", definition="a long seat", example_sentence="", difficulty_level=1))
+        task = Task(id=str(uuid.uuid4()), user_id="bench", cycle_type="once", task_type="practice",
+                    task_plan_date=datetime.datetime.now(), task_num=1_000_000)
+        db.session.add(task)
+        db.session.flush()
+        task_stats.apply_delta("bench", added=(task.task_status, task.task_type))
+        db.session.execute(insert(TaskItem), [{"user_id": "bench", "task_id": task.id} for _ in range(200_000)])
+        db.session.execute(insert(Recording), [
+            {"user_id": "bench", "word_id": 1, "audio_file_path": f"/tmp/{i}.wav", "score": i % 100,
+             "recognized_text": "bench"} for i in range(50_000)])
+        db.session.commit()
+        task_id = task.id
+        item_ids = [i for (i,) in db.session.query(TaskItem.id).filter_by(task_id=task_id)]
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies, locked, reads = [], [0], [0]
+
+    def writer(n):
+        with app.app_context():
+            for i in range(n, len(item_ids), args.writers):
+                if stop.is_set():
+                    return
+                started = time.perf_counter()
+                try:
+                    if i % 2:
+                        db.session.add(Recording(user_id="bench", word_id=1, audio_file_path=f"/tmp/w{i}.wav",
+                                                 score=80, recognized_text="bench"))
+                    else:
+                        task_progress.complete_item(db.session.get(TaskItem, item_ids[i]), 90)
+                    db.session.commit()
+                except OperationalError as e:
+                    db.session.rollback()
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        locked[0] += 1
+                    continue
+                finally:
+                    db.session.remove()
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+    def reader():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    db.session.query(Recording.user_id, func.count(), func.avg(Recording.score)) \
+                        .group_by(Recording.user_id).all()
+                    db.session.query(func.count(TaskItem.id)).filter(TaskItem.score.is_(None)).scalar()
+                    with lock:
+                        reads[0] += 1
+                except OperationalError:
+                    pass
+                finally:
+                    db.session.remove()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    stop.wait(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "journal_mode": journal_mode,
+        "writes_per_s": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "locked": locked[0],
+        "reads": reads[0],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_mode(args)
+
+    print(f"{args.writers} writer + {args.readers} reader threads, {args.seconds:g}s per mode")
+    print(f"{'mode':28} {'journal':>8} {'writes/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'locked':>7} {'reads':>7}")
+    for label, env in MODES.items():
+        workdir = tempfile.mkdtemp(prefix="bench_db_concurrency_")
+        child_env = dict(os.environ, **env, ASR_PRELOAD="0",
+                         DATABASE_URL="sqlite:///" + os.path.join(workdir, "bench.db"))
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_db_concurrency", "--child", "--writers", str(args.writers),
+             "--readers", str(args.readers), "--seconds", str(args.seconds)],
+            env=child_env, capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{label:28} {r['journal_mode']:>8} {r['writes_per_s']:9.0f} {r['p50_ms']:6.1f}ms "
+              f"{r['p95_ms']:6.1f}ms {r['p99_ms']:6.1f}ms {r['locked']:7d} {r['reads']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Batch pronunciation scoring: vectorized NumPy edit distance vs. a pure-Python DP.
+
+Usage (from backend/):  python -m benchmarks.bench_scoring [--items 5000] [--words 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services import pronunciation_scoring  # noqa: E402
+
+VOCAB = ("the quick brown fox jumps over lazy dog she sells sea shells by shore "
+         "good morning teacher how are you today I am fine thank you very much").split()
+
+
+def python_levenshtein(a: list, b: list) -> int:
+    prev = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        cur = [i]
+        for j, y in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (x != y)))
+        prev = cur
+    return prev[-1]
+
+
+def make_pairs(items: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    refs, hyps = [], []
+    for _ in range(items):
+        ref = [rng.choice(VOCAB) for _ in range(rng.randint(max(1, words // 2), words))]
+        hyp = [w if rng.random() > 0.15 else rng.choice(VOCAB) for w in ref if rng.random() > 0.05]
+        refs.append(" ".join(ref))
+        hyps.append(" ".join(hyp))
+    return refs, hyps
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=20)
+    args = parser.parse_args()
+
+    refs, hyps = make_pairs(args.items, args.words)
+    ref_tokens = [pronunciation_scoring.tokenize(t) for t in refs]
+    hyp_tokens = [pronunciation_scoring.tokenize(t) for t in hyps]
+
+    expected, t_python = timed(lambda: [python_levenshtein(r, h) for r, h in zip(ref_tokens, hyp_tokens)])
+    got, t_numpy = timed(lambda: pronunciation_scoring.edit_distances(ref_tokens, hyp_tokens))
+    assert list(got) == expected, "vectorized distances differ from the reference implementation"
+    _, t_full = timed(lambda: pronunciation_scoring.score_batch(refs, hyps))
+
+    print(f"{args.items} recordings, up to {args.words} words each")
+    print(f"pure-Python word edit distance   {t_python * 1000:9.1f} ms")
+    print(f"NumPy batched word edit distance {t_numpy * 1000:9.1f} ms   ({t_python / t_numpy:.1f}x)")
+    print(f"score_batch (words+chars+diffs)  {t_full * 1000:9.1f} ms   ({t_full / args.items * 1e6:.1f} us/recording)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Word bank search: FTS5 MATCH vs. LIKE scans on a generated dictionary.
+
+Usage (from backend/):  python -m benchmarks.bench_word_search [--words 200000] [--queries 50]
+
+Builds a throw-away SQLite database through create_app (so the FTS table and triggers are
+the ones the app uses), bulk-loads synthetic words, then times full-text, prefix
+(autocomplete) and paginated list queries.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYLLABLES = ("ab ac ad al an ar as at be ca ce co de di do el en er es fa fi fo ga ge go "
+             "ha he hi in is it ka ke la le li lo ma me mi mo na ne ni no or pa pe pi po "
+             "ra re ri ro sa se si so ta te ti to un ur va ve vi wa we wi ya yo za ze").split()
+GLOSS = ("a small animal that lives in water; the act of moving quickly; a feeling of great "
+         "happiness; a place where people meet; to speak in a loud voice; a tool used for "
+         "cutting; the colour of the sky; a plant with yellow flowers; a story about the past").split("; ")
+
+
+def make_word(rng, i):
+    text = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + str(i % 97)
+    definition = rng.choice(GLOSS)
+    example = f"She said the {text} was {rng.choice(GLOSS)}."
+    return {"text": text, "definition": definition, "example_sentence": example, "difficulty_level": rng.randint(1, 5)}
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_word_search_")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "words.db")
+    os.environ["ASR_PRELOAD"] = "0"
+    from sqlalchemy import insert, or_
+    from app import create_app, db
+    from app.models import Word
+    from app.pagination import keyset_page
+    from app.services import word_search
+
+    app = create_app()
+    rng = random.Random(3)
+    with app.app_context():
+        started = time.perf_counter()
+        rows = [make_word(rng, i) for i in range(args.words)]
+        for i in range(0, len(rows), 10_000):
+            db.session.execute(insert(Word), rows[i:i + 10_000])  # triggers index every row
+        db.session.commit()
+        print(f"loaded {args.words} words (FTS kept in sync by triggers) in {time.perf_counter() - started:.1f}s")
+
+        samples = [rng.choice(rows)["text"] for _ in range(args.queries)]
+        prefixes = [s[:3] for s in samples]
+        n = args.queries
+
+        def like(term, columns, pattern):
+            return Word.query.filter(or_(*(getattr(Word, c).ilike(pattern.format(term)) for c in columns))).limit(20).all()
+
+        cases = [
+            ("full text, exact word", n, lambda: [word_search.search(s, 20) for s in samples],
+             lambda: [like(s, word_search.COLUMNS, "%{}%") for s in samples]),
+            ("full text, common phrase", 1, lambda: word_search.search("yellow flowers", 20),
+             lambda: Word.query.filter(Word.definition.ilike("%yellow flowers%")).limit(20).all()),
+            ("autocomplete on headword", n, lambda: [word_search.search(p, 10, prefix=True, column="text") for p in prefixes],
+             lambda: [like(p, ["text"], "{}%") for p in prefixes]),
+        ]
+        print(f"{'query':36} {'FTS5':>10} {'LIKE':>10}")
+        for label, per, fts, scan in cases:
+            _, t_fts = timed(fts, 3)
+            _, t_like = timed(scan, 3)
+            print(f"{label:36} {t_fts / per:8.2f}ms {t_like / per:8.2f}ms")
+
+        deep_cursor = None
+        for _ in range(50):
+            _, deep_cursor = keyset_page(Word.query, [Word.id], cursor=deep_cursor, limit=100)
+        _, t_cursor = timed(lambda: keyset_page(Word.query, [Word.id], cursor=deep_cursor, limit=100), 20)
+        _, t_offset = timed(lambda: Word.query.order_by(Word.id).offset(5000).limit(100).all(), 20)
+        _, t_all = timed(lambda: Word.query.all(), 1)
+        print(f"{'list page 51 (cursor / OFFSET)':36} {t_cursor:8.2f}ms {t_offset:8.2f}ms")
+        print(f"{'old /words/ (whole table)':36} {t_all:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Concurrency check for task progress counters: score every item of one task from many threads.
+
+Usage (from backend/):  python -m benchmarks.hammer_task_progress [--items 200] [--threads 16] [--repeat 2]
+
+Each item is scored --repeat times by different threads through PUT /task-items/<id>. Exits
+non-zero unless finished_task_num equals the number of items, the task ended up completed
+exactly once and the per-user task counters still match the tasks table.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_task(app, items: int, user_id: str = "hammer"):
+    """Create a user and a once-task with `items` open items; returns (task id, item ids, auth headers)."""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Task, TaskItem, User
+    from app.services import task_stats
+
+    with app.app_context():
+        db.session.add(User(id=user_id, username=user_id, email=f"{user_id}@example.com", password_hash="x"))
+        task = Task(id=str(uuid.uuid4()), user_id=user_id, cycle_type="once", task_type="practice",
+                    task_plan_date=datetime.datetime.now(), task_num=items)
+        db.session.add(task)
+        db.session.flush()
+        task_stats.apply_delta(user_id, added=(task.task_status, task.task_type))
+        db.session.execute(insert(TaskItem), [{"user_id": user_id, "task_id": task.id} for _ in range(items)])
+        db.session.commit()
+        task_id = task.id
+        item_ids = [i for (i,) in db.session.query(TaskItem.id).filter_by(task_id=task_id)]
+        headers = {"Authorization": "Bearer " + create_access_token(identity=user_id)}
+    return task_id, item_ids, headers
+
+
+def hammer(app, item_ids, headers, threads: int = 16, repeat: int = 2) -> list:
+    """Score every item `repeat` times from `threads` threads; returns the failed requests."""
+    jobs = [item_id for item_id in item_ids for _ in range(repeat)]
+    random.Random(1).shuffle(jobs)
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not jobs:
+                    return
+                item_id = jobs.pop()
+            response = client.put(f"/task-items/{item_id}", json={"score": 90}, headers=headers)
+            if response.status_code != 200:
+                with lock:
+                    errors.append((item_id, response.status_code, response.get_json()))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=2, help="How many times each item is scored.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hammer_task_progress_")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "hammer.db")
+    os.environ["ASR_PRELOAD"] = "0"
+    from app import create_app, db
+    from app.models import Task
+    from app.services import task_stats
+
+    app = create_app()
+    task_id, item_ids, headers = seed_task(app, args.items)
+
+    started = time.perf_counter()
+    errors = hammer(app, item_ids, headers, args.threads, args.repeat)
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        mismatches = task_stats.rebuild(["hammer"], check_only=True)
+        print(f"{args.items * args.repeat} updates from {args.threads} threads in {elapsed:.2f}s, {len(errors)} failed")
+        print(f"finished_task_num={task.finished_task_num}/{task.task_num} status={task.task_status} "
+              f"finish_date={task.task_finish_date}")
+        ok = (not errors and task.finished_task_num == args.items and task.task_status == "completed"
+              and not mismatches)
+        if errors:
+            print("first errors:", errors[:3])
+        if mismatches:
+            print("task_stats mismatch:", mismatches)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""add recordings.model_version
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-18 17:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # create_app() still runs db.create_all(), so fresh databases may already have it
+    return column in [c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def upgrade():
+    if not _has_column('recordings', 'model_version'):
+        op.add_column('recordings', sa.Column('model_version', sa.String(length=128), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('recordings') as batch_op:
+        batch_op.drop_column('model_version')
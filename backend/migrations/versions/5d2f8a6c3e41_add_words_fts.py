@@ -0,0 +1,55 @@
+"""add words_fts full-text index (SQLite FTS5) with sync triggers
+
+Revision ID: 5d2f8a6c3e41
+Revises: c4a7e15f2b08
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2f8a6c3e41'
+down_revision = 'c4a7e15f2b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases search with LIKE and need no schema change
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    exists = bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_fts'")).first()
+    op.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+        text, definition, example_sentence,
+        content='words', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS words_fts_ai AFTER INSERT ON words BEGIN
+        INSERT INTO words_fts(rowid, text, definition, example_sentence)
+        VALUES (new.id, new.text, new.definition, new.example_sentence);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS words_fts_ad AFTER DELETE ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, text, definition, example_sentence)
+        VALUES ('delete', old.id, old.text, old.definition, old.example_sentence);
+    END""")
+    op.execute("""CREATE TRIGGER IF NOT EXISTS words_fts_au AFTER UPDATE ON words BEGIN
+        INSERT INTO words_fts(words_fts, rowid, text, definition, example_sentence)
+        VALUES ('delete', old.id, old.text, old.definition, old.example_sentence);
+        INSERT INTO words_fts(rowid, text, definition, example_sentence)
+        VALUES (new.id, new.text, new.definition, new.example_sentence);
+    END""")
+    if not exists:
+        # index the rows that are already there
+        op.execute("INSERT INTO words_fts(words_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS words_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS words_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS words_fts_ai')
+    op.execute('DROP TABLE IF EXISTS words_fts')
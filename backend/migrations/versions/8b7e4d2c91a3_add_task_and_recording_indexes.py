@@ -0,0 +1,40 @@
+"""add composite and partial indexes for task, task item and recording queries
+
+Revision ID: 8b7e4d2c91a3
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b7e4d2c91a3'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+UNCOMPLETED = sa.text('end_time IS NULL AND score IS NULL')
+
+
+def upgrade():
+    # if_not_exists: create_app() runs db.create_all(), which already builds these on fresh databases
+    op.create_index('ix_task_items_uncompleted', 'task_items', ['user_id', 'plan_time', 'id'],
+                    sqlite_where=UNCOMPLETED, postgresql_where=UNCOMPLETED, if_not_exists=True)
+    op.create_index('ix_task_items_task_user_plan', 'task_items', ['task_id', 'user_id', 'plan_time'],
+                    if_not_exists=True)
+    op.create_index('ix_task_items_user_create', 'task_items', ['user_id', 'create_date'], if_not_exists=True)
+    op.create_index('ix_tasks_user_status_create', 'tasks', ['user_id', 'task_status', 'create_date'],
+                    if_not_exists=True)
+    op.create_index('ix_tasks_user_create', 'tasks', ['user_id', 'create_date'], if_not_exists=True)
+    op.create_index('ix_recordings_user_created', 'recordings', ['user_id', 'created_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_recordings_user_created', table_name='recordings', if_exists=True)
+    op.drop_index('ix_tasks_user_create', table_name='tasks', if_exists=True)
+    op.drop_index('ix_tasks_user_status_create', table_name='tasks', if_exists=True)
+    op.drop_index('ix_task_items_user_create', table_name='task_items', if_exists=True)
+    op.drop_index('ix_task_items_task_user_plan', table_name='task_items', if_exists=True)
+    op.drop_index('ix_task_items_uncompleted', table_name='task_items', if_exists=True)
@@ -0,0 +1,39 @@
+"""add resource_segments (sentence-level VAD segments of uploaded resources)
+
+Revision ID: a93d6e2b7c14
+Revises: e81b3c9f0a57
+Create Date: 2026-10-19 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d6e2b7c14'
+down_revision = 'e81b3c9f0a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so fresh databases may already have the table;
+    # resources uploaded before this revision simply have no segments
+    if sa.inspect(op.get_bind()).has_table('resource_segments'):
+        return
+    op.create_table(
+        'resource_segments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('uploaded_file_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('start_ms', sa.Integer(), nullable=False),
+        sa.Column('end_ms', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['uploaded_file_id'], ['uploaded_files.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('uploaded_file_id', 'seq', name='uq_resource_segments_file_seq'),
+    )
+
+
+def downgrade():
+    op.drop_table('resource_segments')
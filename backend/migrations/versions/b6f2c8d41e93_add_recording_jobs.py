@@ -0,0 +1,47 @@
+"""add recording_jobs (asynchronous submissions visible to every web worker)
+
+Revision ID: b6f2c8d41e93
+Revises: a93d6e2b7c14
+Create Date: 2026-10-19 14:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f2c8d41e93'
+down_revision = 'a93d6e2b7c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so fresh databases may already have the table
+    if sa.inspect(op.get_bind()).has_table('recording_jobs'):
+        return
+    op.create_table(
+        'recording_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('owner_id', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.String(length=64), nullable=False),
+        sa.Column('word_id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=512), nullable=False),
+        sa.Column('reference_text', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('recording_id', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['recording_id'], ['recordings.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recording_jobs_status_created', 'recording_jobs', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_recording_jobs_status_created', table_name='recording_jobs')
+    op.drop_table('recording_jobs')
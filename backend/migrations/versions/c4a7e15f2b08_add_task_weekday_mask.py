@@ -0,0 +1,32 @@
+"""add tasks.weekday_mask
+
+Revision ID: c4a7e15f2b08
+Revises: 8b7e4d2c91a3
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e15f2b08'
+down_revision = '8b7e4d2c91a3'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # create_app() still runs db.create_all(), so fresh databases may already have it
+    return column in [c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)]
+
+
+def upgrade():
+    # existing tasks keep their materialized task_items: the column stays NULL for them
+    if not _has_column('tasks', 'weekday_mask'):
+        op.add_column('tasks', sa.Column('weekday_mask', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('weekday_mask')
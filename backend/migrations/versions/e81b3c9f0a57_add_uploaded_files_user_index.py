@@ -0,0 +1,25 @@
+"""add uploaded_files (user_id, id) index for the per-user resource listing
+
+Revision ID: e81b3c9f0a57
+Revises: 5d2f8a6c3e41
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b3c9f0a57'
+down_revision = '5d2f8a6c3e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: create_app() runs db.create_all(), which already builds it on fresh databases
+    op.create_index('ix_uploaded_files_user', 'uploaded_files', ['user_id', 'id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_uploaded_files_user', table_name='uploaded_files', if_exists=True)
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'  # in-memory, one shared connection
+    ASR_PRELOAD = False
+
+
+def make_app(monkeypatch, tmp_path, **overrides):
+    # uploads/ is created under the working directory
+    monkeypatch.chdir(tmp_path)
+    return create_app(type('Config', (TestConfig,), overrides))
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    app = make_app(monkeypatch, tmp_path)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """auth_headers(user_id) creates the user if needed and returns a bearer token header."""
+    def make(user_id='1'):
+        with app.app_context():
+            if db.session.get(User, user_id) is None:
+                db.session.add(User(id=user_id, username=f'user{user_id}', email=f'{user_id}@example.com',
+                                    password_hash='x'))
+                db.session.commit()
+            return {'Authorization': 'Bearer ' + create_access_token(identity=user_id)}
+    return make
+
+
+@pytest.fixture
+def queries(app):
+    """SQL statements sent to the database; clear() it right before the request under test."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', count)
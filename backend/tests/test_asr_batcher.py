@@ -0,0 +1,86 @@
+import sys
+import threading
+import types
+
+import click
+import pytest
+from conftest import make_app
+
+from app.services import asr_batcher, asr_client, asr_model
+
+
+@pytest.fixture
+def postprocess(monkeypatch):
+    """A stand-in for funasr's text postprocessing, so the batcher runs without the ASR stack."""
+    module = types.ModuleType('funasr.utils.postprocess_utils')
+    module.rich_transcription_postprocess = lambda text: text
+    monkeypatch.setitem(sys.modules, 'funasr', types.ModuleType('funasr'))
+    monkeypatch.setitem(sys.modules, 'funasr.utils', types.ModuleType('funasr.utils'))
+    monkeypatch.setitem(sys.modules, 'funasr.utils.postprocess_utils', module)
+
+
+@pytest.fixture
+def blocked_model(monkeypatch):
+    """asr_model.recognize waits until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def recognize(inputs, vad=True, config=None):
+        started.set()
+        release.wait(5)
+        return [{'text': f'text of {x}'} for x in inputs]
+
+    monkeypatch.setattr(asr_model, 'recognize', recognize)
+    yield started
+    release.set()
+
+
+def use_batcher(app, monkeypatch, **kwargs):
+    batcher = asr_batcher.MicroBatcher(app.config, window_ms=0, **kwargs)
+    monkeypatch.setattr(asr_batcher, '_batcher', batcher)
+    return batcher
+
+
+def test_local_timeout_is_an_asr_backend_error(app, monkeypatch, postprocess, blocked_model):
+    use_batcher(app, monkeypatch)
+    with app.app_context():
+        with pytest.raises(asr_client.ASRTimeout):
+            asr_batcher.transcribe_many(['a.wav'], timeout=0.05)
+
+
+def test_full_local_queue_is_busy(app, monkeypatch, postprocess, blocked_model):
+    batcher = use_batcher(app, monkeypatch, max_pending=1)
+    batcher.submit('a.wav')
+    assert blocked_model.wait(5)  # a.wav is being recognized, the queue is empty again
+    batcher.submit('b.wav')
+    with pytest.raises(asr_client.ASRBusy):
+        batcher.submit('c.wav')
+
+
+def test_postprocess_import_failure_reaches_callers(app, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'funasr.utils.postprocess_utils', None)  # import raises ImportError
+    monkeypatch.setattr(asr_model, 'recognize', lambda inputs, vad=True, config=None: [{'text': 'x'}] * len(inputs))
+    batcher = use_batcher(app, monkeypatch)
+    with pytest.raises(ImportError):
+        batcher.submit('a.wav').result(timeout=5)
+    assert batcher._thread.is_alive()
+
+
+def test_local_timeout_maps_to_503(app, monkeypatch, postprocess, blocked_model):
+    use_batcher(app, monkeypatch)
+    app.config['ASR_REQUEST_TIMEOUT'] = 0.05
+    with app.test_request_context():
+        try:
+            asr_batcher.transcribe('a.wav')
+        except Exception as exc:
+            response = app.make_response(app.handle_user_exception(exc))
+    assert response.status_code == 503
+
+
+def test_preload_skipped_under_flask_cli(monkeypatch, tmp_path):
+    loaded = []
+    monkeypatch.setattr(asr_model, 'preload', loaded.append)
+    with click.Context(click.Command('upgrade')):
+        make_app(monkeypatch, tmp_path, ASR_PRELOAD=True)
+    assert loaded == []
+    app = make_app(monkeypatch, tmp_path, ASR_PRELOAD=True)
+    assert loaded == [app]
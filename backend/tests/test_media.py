@@ -0,0 +1,57 @@
+import io
+import os
+
+import pytest
+
+from app.services import storage, transcoding
+
+AUDIO = b'ID3' + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def mp3_name(app):
+    with app.test_request_context():
+        blob = storage.store_stream(io.BytesIO(AUDIO), 'lesson.mp3')
+    return os.path.basename(blob.path)
+
+
+def test_mp3_range_request(client, auth_headers, mp3_name):
+    response = client.get(f'/mp3/{mp3_name}', headers={**auth_headers(), 'Range': 'bytes=0-99'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 0-99/{len(AUDIO)}'
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.data == AUDIO[:100]
+
+
+def test_mp3_if_none_match(client, auth_headers, mp3_name):
+    headers = auth_headers()
+    response = client.get(f'/mp3/{mp3_name}', headers=headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')  # content hash: a strong validator
+    assert 'immutable' in response.headers['Cache-Control']
+
+    response = client.get(f'/mp3/{mp3_name}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_failed_variant_is_not_pending(app, client, auth_headers, mp3_name, monkeypatch, tmp_path):
+    ffmpeg = tmp_path / 'bin' / 'ffmpeg'
+    ffmpeg.parent.mkdir()
+    ffmpeg.write_text('#!/bin/sh\necho "unsupported codec" >&2\nexit 1\n')
+    ffmpeg.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{ffmpeg.parent}{os.pathsep}{os.environ["PATH"]}')
+    app.config['PLAYBACK_VARIANTS_ENABLED'] = True
+    headers = {**auth_headers(), 'Accept': 'audio/ogg, */*'}
+    with app.app_context():
+        path = storage.resolve(mp3_name)
+
+    response = client.get(f'/mp3/{mp3_name}', headers=headers)
+    assert response.cache_control.max_age == 60  # variant still expected
+
+    transcoding._run(app, path)
+    assert os.path.exists(transcoding.failure_marker(path))
+    assert not transcoding.schedule(app, path)
+    response = client.get(f'/mp3/{mp3_name}', headers=headers)
+    assert 'immutable' in response.headers['Cache-Control']
@@ -0,0 +1,29 @@
+import datetime
+
+import pytest
+
+from app import db
+from app.models import Task, TaskItem
+from app.pagination import keyset_page, sort_key
+
+COLUMNS = [TaskItem.plan_time, TaskItem.id]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_keyset_pages_over_nullable_column(app, descending):
+    now = datetime.datetime(2024, 9, 1, 8, 0)
+    # NULL plan_times interleaved by id with repeated and distinct non-NULL values
+    plan_times = [None, now, None, now, now + datetime.timedelta(days=1), None, now - datetime.timedelta(days=1)]
+    with app.app_context():
+        db.session.add(Task(id='t', user_id='1', cycle_type='once', task_type='practice', task_plan_date=now))
+        db.session.add_all(TaskItem(user_id='1', task_id='t', plan_time=t) for t in plan_times)
+        db.session.commit()
+        expected = sorted(((i.plan_time, i.id) for i in TaskItem.query), key=sort_key, reverse=descending)
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = keyset_page(TaskItem.query, COLUMNS, cursor=cursor, limit=2, descending=descending)
+            seen += [(i.plan_time, i.id) for i in items]
+            if cursor is None:
+                break
+    assert seen == expected
@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+from app import db
+from app.models import Recording, Task, TaskItem, UploadedFile, Word
+
+
+def seed(app, user_id, n):
+    """n tasks with 3 items each, n resources and n recordings, all owned by user_id."""
+    now = datetime.datetime.now()
+    with app.app_context():
+        word = Word(text='hello', definition='', example_sentence='', difficulty_level=1)
+        db.session.add(word)
+        resources = [UploadedFile(user_id=user_id, filename=f'r{i}.mp3', file_path=f'/tmp/r{i}.mp3',
+                                  text_content='hello', file_type='mp3') for i in range(n)]
+        db.session.add_all(resources)
+        db.session.flush()
+        for i, resource in enumerate(resources):
+            task = Task(id=f'{user_id}-t{i}', user_id=user_id, resource_id=resource.id, cycle_type='daily',
+                        task_type='practice', task_plan_date=now, task_num=3,
+                        create_date=now - datetime.timedelta(minutes=i))
+            db.session.add(task)
+            for day in range(3):
+                db.session.add(TaskItem(user_id=user_id, task_id=task.id, resource_id=resource.id,
+                                        plan_time=now - datetime.timedelta(days=day, minutes=i)))
+            db.session.add(Recording(user_id=user_id, word_id=word.id, audio_file_path=f'/tmp/rec{i}.wav'))
+        db.session.commit()
+
+
+# related users/resources are eager-loaded, so the count must not depend on the number of rows
+@pytest.mark.parametrize('n', [3, 12])
+@pytest.mark.parametrize('url, expected', [
+    ('/tasks', 2),  # page + total
+    ('/tasks?limit=5', 1),  # cursor page, no total
+    ('/task-items', 2),
+    ('/task-items?limit=5', 1),
+    ('/records/user/1', 2),  # user + recordings
+    ('/resources', 1),
+])
+def test_list_query_count(app, client, auth_headers, queries, url, expected, n):
+    headers = auth_headers('1')
+    seed(app, '1', n)
+    queries.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert len(queries) == expected, queries
@@ -0,0 +1,15 @@
+from app.services import query_plans
+
+
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        results = query_plans.check_hot_queries()
+    assert len(results) == len(query_plans.hot_queries())
+    full_scans = {name: plan for name, plan, scans in results if scans}
+    assert full_scans == {}
+
+
+def test_perf_explain_command(app):
+    result = app.test_cli_runner().invoke(args=['perf', 'explain'])
+    assert result.exit_code == 0, result.output
+    assert 'FULL SCAN' not in result.output
@@ -0,0 +1,32 @@
+from app import db
+from app.models import Recording, UploadedFile
+from app.services import asr_model
+
+
+def seed(app):
+    with app.app_context():
+        db.session.add(UploadedFile(id=1, user_id='1', filename='w.mp3', file_path='/tmp/w.mp3',
+                                    text_content='hello world', file_type='mp3'))
+        db.session.add_all([
+            Recording(user_id='1', word_id=1, audio_file_path='/tmp/a.wav', recognized_text='hello world',
+                      score=10, model_version='old-model'),
+            Recording(user_id='1', word_id=1, audio_file_path='/tmp/b.wav', recognized_text='hello', score=10),
+        ])
+        db.session.commit()
+
+
+def test_rescore_skip_asr_keeps_model_version(app, tmp_path):
+    seed(app)
+    result = app.test_cli_runner().invoke(args=[
+        'recordings', 'rescore', '--skip-asr', '--checkpoint', str(tmp_path / 'ck.json')])
+    assert result.exit_code == 0, result.output
+    assert '2 recording(s) rescored' in result.output
+    with app.app_context():
+        rows = Recording.query.order_by(Recording.id).all()
+        assert [r.score for r in rows] == [100.0, 50.0]
+        assert all(r.feedback for r in rows)
+        assert [r.recognized_text for r in rows] == ['hello world', 'hello']
+        assert [r.model_version for r in rows] == ['old-model', None]
+        # still stale for the current model, so a later --only-stale run with ASR picks them up
+        current = asr_model.model_version(app.config)
+        assert Recording.query.filter(Recording.model_version.is_distinct_from(current)).count() == 2
@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+
+from app import db
+from app.models import ResourceSegment, Task, TaskItem, UploadedFile
+
+
+@pytest.fixture
+def resource(app, auth_headers):
+    auth_headers('teacher')
+    with app.app_context():
+        resource = UploadedFile(user_id='teacher', filename='lesson.mp3', file_path='/tmp/lesson.mp3',
+                                text_content='hello world', file_type='mp3')
+        resource.segments.append(ResourceSegment(seq=0, start_ms=0, end_ms=800, text='hello world'))
+        db.session.add(resource)
+        db.session.commit()
+        return resource.id
+
+
+def assign(app, user_id, resource_id, as_item=False):
+    now = datetime.datetime.now()
+    with app.app_context():
+        task = Task(id=f'{user_id}-task', user_id=user_id, cycle_type='once', task_type='practice',
+                    task_plan_date=now, resource_id=None if as_item else resource_id)
+        db.session.add(task)
+        if as_item:
+            db.session.add(TaskItem(user_id=user_id, task_id=task.id, resource_id=resource_id, plan_time=now))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('as_item', [False, True])
+def test_segments_of_assigned_resource(app, client, auth_headers, resource, as_item):
+    headers = auth_headers('student')
+    assert client.get(f'/resources/{resource}/segments', headers=headers).status_code == 404
+    assign(app, 'student', resource, as_item)
+    response = client.get(f'/resources/{resource}/segments', headers=headers)
+    assert response.status_code == 200
+    assert [s['text'] for s in response.get_json()['segments']] == ['hello world']
+
+
+def test_segments_of_own_resource(client, auth_headers, resource):
+    assert client.get(f'/resources/{resource}/segments', headers=auth_headers('teacher')).status_code == 200
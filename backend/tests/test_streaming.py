@@ -0,0 +1,52 @@
+import numpy as np
+
+from app import db
+from app.models import Recording, UploadedFile
+
+
+def seed_word(app):
+    with app.app_context():
+        db.session.add(UploadedFile(id=1, user_id='1', filename='w.mp3', file_path='/tmp/w.mp3',
+                                    text_content='hello', file_type='mp3'))
+        db.session.commit()
+
+
+def test_stream_recording_belongs_to_the_caller(app, client, auth_headers, monkeypatch):
+    from app.services import asr_batcher
+    monkeypatch.setattr(asr_batcher, 'transcribe', lambda waveform, timeout=None: 'hello')
+    auth_headers('1')
+    headers = auth_headers('2')
+    seed_word(app)
+    response = client.post('/records/stream', json={'word_id': 1, 'user_id': '1'}, headers=headers)
+    assert response.status_code == 201
+    session_id = response.get_json()['session_id']
+    pcm = (np.ones(16000) * 1000).astype('<i2').tobytes()
+    response = client.post(f'/records/stream/{session_id}/finish', data=pcm, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    with app.app_context():
+        assert [r.user_id for r in Recording.query] == ['2']
+
+
+def test_stream_partials_without_streaming_model(app, client, auth_headers, monkeypatch):
+    from app.services import asr_batcher
+    calls = []
+
+    def transcribe(waveform, timeout=None):
+        calls.append(waveform.size)
+        return f'{waveform.size} samples'
+
+    monkeypatch.setattr(asr_batcher, 'transcribe', transcribe)
+    assert not app.config['ASR_STREAMING_MODEL']
+    headers = auth_headers('1')
+    seed_word(app)
+    session_id = client.post('/records/stream', json={'word_id': 1}, headers=headers).get_json()['session_id']
+    half_second = (np.ones(8000) * 1000).astype('<i2').tobytes()
+
+    body = client.post(f'/records/stream/{session_id}/chunk', data=half_second, headers=headers).get_json()
+    assert body['partial'] == ''  # less than ASR_STREAM_PARTIAL_STRIDES strides so far
+    for _ in range(2):
+        body = client.post(f'/records/stream/{session_id}/chunk', data=half_second, headers=headers).get_json()
+    assert body['partial'] == '24000 samples'
+    assert body['received_ms'] == 1500
+    body = client.post(f'/records/stream/{session_id}/finish', headers=headers).get_json()
+    assert body['partial'] == body['text'] == '24000 samples'
@@ -0,0 +1,53 @@
+import datetime
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import Task, TaskItem
+
+
+def seed_overdue(app, user_id, n):
+    now = datetime.datetime.now()
+    with app.app_context():
+        db.session.add(Task(id='t', user_id=user_id, cycle_type='once', task_type='practice',
+                            task_plan_date=now, task_num=n))
+        db.session.execute(insert(TaskItem), [
+            {'user_id': user_id, 'task_id': 't', 'plan_time': now - datetime.timedelta(hours=i + 1)}
+            for i in range(n)])
+        db.session.commit()
+
+
+def test_uncompleted_without_paging_args_returns_everything(app, client, auth_headers):
+    headers = auth_headers('1')
+    seed_overdue(app, '1', 60)
+    body = client.get('/task-items/uncompleted', headers=headers).get_json()
+    assert body['total'] == 60
+    assert len(body['task_items']) == 60
+    plan_times = [item['plan_time'] for item in body['task_items']]
+    assert plan_times == sorted(plan_times, key=lambda t: datetime.datetime.strptime(t, '%a, %d %b %Y %H:%M:%S GMT'),
+                                reverse=True)
+
+
+def test_uncompleted_cursor_pages(app, client, auth_headers):
+    headers = auth_headers('1')
+    seed_overdue(app, '1', 60)
+    first = client.get('/task-items/uncompleted?limit=50', headers=headers).get_json()
+    assert len(first['task_items']) == 50 and first['has_more']
+    second = client.get(f'/task-items/uncompleted?cursor={first["next_cursor"]}', headers=headers).get_json()
+    assert len(second['task_items']) == 10 and not second['has_more']
+    ids = [item['id'] for item in first['task_items'] + second['task_items']]
+    assert len(set(ids)) == 60
+
+
+def test_create_once_and_recurring_tasks(client, auth_headers):
+    headers = auth_headers('1')
+    base = {'task_type': 'practice', 'task_plan_date': '2030-01-07T08:00:00', 'week_days': ''}
+    once = client.post('/tasks', json={**base, 'cycle_type': 'once'}, headers=headers).get_json()
+    assert once['task_num'] == 1
+    assert client.get(f'/tasks/{once["id"]}/items', headers=headers).get_json()['total'] == 1
+
+    weekly = client.post('/tasks', json={**base, 'cycle_type': 'weekly', 'week_days': '0,2',
+                                         'task_finish_date': '2030-01-20T09:00:00'}, headers=headers).get_json()
+    assert weekly['task_num'] == 4  # Mondays and Wednesdays of two weeks, none stored up front
+    body = client.get(f'/tasks/{weekly["id"]}/items', headers=headers).get_json()
+    assert body['total'] == 4
@@ -0,0 +1,30 @@
+import pytest
+
+from app import db
+from app.models import Task
+from app.services import task_stats
+from benchmarks.hammer_task_progress import hammer, seed_task
+
+from conftest import make_app
+
+
+@pytest.fixture
+def file_app(monkeypatch, tmp_path):
+    # concurrent transactions need their own connections: a file database, not the shared in-memory one
+    app = make_app(monkeypatch, tmp_path, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "hammer.db"}')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_concurrent_item_scoring_counts_each_item_once(file_app):
+    task_id, item_ids, headers = seed_task(file_app, items=60)
+    errors = hammer(file_app, item_ids, headers, threads=12, repeat=2)
+    assert errors == []
+    with file_app.app_context():
+        task = db.session.get(Task, task_id)
+        assert task.finished_task_num == len(item_ids)
+        assert task.task_status == 'completed'
+        assert task.task_finish_date is not None
+        assert task_stats.rebuild(['hammer'], check_only=True) == []
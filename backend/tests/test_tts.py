@@ -0,0 +1,20 @@
+import io
+
+from app.services import tts
+
+
+def test_sentence_cache_metrics_in_asr_stats(app, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(tts, '_cache', None)
+    monkeypatch.setattr(tts, '_engine', None)
+    app.config.update(TTS_ENGINE='stub', TTS_AUDIO_FOLDER=str(tmp_path / 'tts'))
+
+    assert client.get('/convert/asr/stats').json['tts']['engine'] is None  # stats do not load the engine
+    for _ in range(2):
+        response = client.post('/convert/text-to-speech',
+                               data={'file': (io.BytesIO(b'Hello there. How are you?'), 'a.txt')})
+        assert response.status_code == 200
+
+    stats = client.get('/convert/asr/stats').json['tts']
+    assert stats['engine'] == 'stub-v1'
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert stats['usage_bytes'] > 0
@@ -1,5 +1,7 @@
 import axios from 'axios';
 
+const OPUS_SUPPORTED = typeof Audio !== 'undefined' && new Audio().canPlayType('audio/ogg; codecs=opus') !== '';
+
 const apiClient = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL || '/api', // 从环境变量或默认 /api
   headers: {
@@ -106,8 +108,11 @@ export default {
   },
 
   // 单词相关
-  getWords() {
-    return apiClient.get('/words');
+  getWords(params?: any) {
+    return apiClient.get('/words/', { params });
+  },
+  searchWords(q: string, params?: any) {
+    return apiClient.get('/words/search', { params: { q, ...params } });
   },
   getWordById(id: string | number) {
     return apiClient.get(`/words/${id}`);
@@ -124,10 +129,27 @@ export default {
   getUserRecordings() {
     return apiClient.get('/records/history');
   },
+  // 流式跟读：分片上传 16 位 PCM，每片返回部分识别结果
+  startRecordingStream(data: { word_id: number; sample_rate?: number }) {
+    return apiClient.post('/records/stream', data);
+  },
+  sendRecordingChunk(sessionId: string, pcm: ArrayBuffer) {
+    return apiClient.post(`/records/stream/${sessionId}/chunk`, pcm, {
+      headers: { 'Content-Type': 'application/octet-stream' },
+    });
+  },
+  finishRecordingStream(sessionId: string, pcm?: ArrayBuffer) {
+    return apiClient.post(`/records/stream/${sessionId}/finish`, pcm ?? null, {
+      headers: { 'Content-Type': 'application/octet-stream' },
+    });
+  },
+  cancelRecordingStream(sessionId: string) {
+    return apiClient.delete(`/records/stream/${sessionId}`);
+  },
   // 更多API方法...
   // 获取资源库文件列表
-  getResourceList() {
-    return apiClient.get('/resources');
+  getResourceList(params?: any) {
+    return apiClient.get('/resources', { params });
   },
 
   getResourceById(id: string | number) {
@@ -136,6 +158,13 @@ export default {
   updateResource(id: string | number, data: any) {
     return apiClient.put(`/resources/${id}`, data);
   },
+  // 资源分句（识别时的 VAD 切分）及单句音频
+  getResourceSegments(id: string | number) {
+    return apiClient.get(`/resources/${id}/segments`);
+  },
+  getResourceSegmentAudio(id: string | number, seq: number) {
+    return apiClient.get(`/resources/${id}/segments/${seq}/audio`, { responseType: 'blob' });
+  },
   // 新增：文本转语音
   textToSpeech(formData: FormData) {
     return apiClient.post('/convert/text-to-speech', formData, {
@@ -149,8 +178,10 @@ export default {
     });
   },
 
-  getMp3(url: string, config = {}) {
-    return apiClient.get(`/mp3/${url}`, { ...config, responseType: 'blob' });
+  // 浏览器能播放 Ogg/Opus 时请求低码率版本；后端还没有该版本时仍返回原文件
+  getMp3(url: string, config: any = {}) {
+    const accept = OPUS_SUPPORTED ? { Accept: 'audio/ogg; codecs=opus, audio/mpeg;q=0.9, */*;q=0.5' } : {};
+    return apiClient.get(`/mp3/${url}`, { ...config, headers: { ...accept, ...config.headers }, responseType: 'blob' });
   },
 
   // 任务相关
@@ -199,6 +230,12 @@ export default {
   getUncompletedTaskItems() {
     return apiClient.get('/task-items/uncompleted');
   },
+  getTaskOccurrences(taskId: string, params?: any) {
+    return apiClient.get(`/tasks/${taskId}/occurrences`, { params });
+  },
+  materializeTaskOccurrence(taskId: string, occurrenceDate: string) {
+    return apiClient.post(`/tasks/${taskId}/occurrences/${occurrenceDate}`);
+  },
 
   test() {
     return apiClient.get('/test');